@@ -0,0 +1,67 @@
+"""
+Benchmark of the response extraction on large adversarial inputs.
+
+Times the linear scanner in `easy_fnc.utils` on multi-megabyte responses,
+where its time per megabyte stays flat, and compares it with the regex it
+replaced on small responses, where the regex already grows super-linearly
+on malformed input.
+
+Usage:
+    python -m benchmarks.bench_extraction [--sizes 0.5 1 2 4] [--regex-sizes 2 4 8] [--skip-regex]
+"""
+import argparse
+import re
+import time
+
+from easy_fnc.utils import scan_response
+
+REGEX_PATTERN = r'<\|thoughts\|>(.*?)<\|end_thoughts\|>\s*<\|function_calls\|>(.*?)<\|end_function_calls\|>'
+
+def regex_extract(raw_response: str) -> tuple[str, str]:
+    """The regex based extraction the scanner replaced."""
+    match = re.search(REGEX_PATTERN, raw_response, re.DOTALL)
+    if match:
+        return match.group(1).strip(), match.group(2).strip()
+    return "", ""
+
+def adversarial_inputs(size: int) -> dict[str, str]:
+    """Malformed and well-formed responses of roughly `size` characters."""
+    block = '<|thoughts|>think<|end_thoughts|>\n<|function_calls|>[{"name": "f", "kwargs": {}, "returns": []}]<|end_function_calls|>\n'
+    return {
+        "repeated_thoughts_start": ("<|thoughts|>" * (size // len("<|thoughts|>"))),
+        "missing_function_calls_end": "<|thoughts|>x<|end_thoughts|><|function_calls|>" * (size // 47),
+        "missing_thoughts_end": "<|thoughts|>" + "x" * size,
+        "many_blocks": block * (size // len(block)),
+    }
+
+def time_call(function, raw_response: str) -> float:
+    start = time.perf_counter()
+    function(raw_response)
+    return time.perf_counter() - start
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=float, nargs="+", default=[0.5, 1, 2, 4], help="Scanner input sizes in megabytes")
+    parser.add_argument("--regex-sizes", type=float, nargs="+", default=[2, 4, 8], help="Regex comparison input sizes in kilobytes")
+    parser.add_argument("--skip-regex", action="store_true", help="Only time the scanner")
+    args = parser.parse_args()
+
+    print(f"{'input':<28}{'size (MB)':>10}{'scanner (ms)':>14}{'ms/MB':>8}")
+    for size_mb in args.sizes:
+        for name, raw_response in adversarial_inputs(int(size_mb * 1024 * 1024)).items():
+            scanner_time = time_call(scan_response, raw_response) * 1000
+            print(f"{name:<28}{size_mb:>10}{scanner_time:>14.1f}{scanner_time / size_mb:>8.1f}")
+
+    if args.skip_regex:
+        return
+
+    print()
+    print(f"{'input':<28}{'size (KB)':>10}{'scanner (ms)':>14}{'regex (ms)':>12}")
+    for size_kb in args.regex_sizes:
+        for name, raw_response in adversarial_inputs(int(size_kb * 1024)).items():
+            scanner_time = time_call(scan_response, raw_response) * 1000
+            regex_time = time_call(regex_extract, raw_response) * 1000
+            print(f"{name:<28}{size_kb:>10}{scanner_time:>14.2f}{regex_time:>12.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Benchmark of the tool retrieval index on large tool catalogs.
+
+Times building the index and selecting the tools of a query, and compares
+the size of the system prompt listing the whole catalog with the prompt
+listing only the selected tools.
+
+Usage:
+    python -m benchmarks.bench_tool_index [--sizes 100 500 2000] [--top-k 10] [--queries 200]
+"""
+import argparse
+import time
+
+from easy_fnc.models.prompt_cache import compile_system_prompt
+from easy_fnc.tool_index import ToolIndex
+from easy_fnc.utils import load_template, get_template_path
+from benchmarks.synthetic import make_tool_catalog, make_catalog_queries
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 500, 2000], help="Catalog sizes in tools")
+    parser.add_argument("--top-k", type=int, default=10, help="Tools selected per query")
+    parser.add_argument("--queries", type=int, default=200, help="Queries timed per catalog")
+    args = parser.parse_args()
+
+    template = load_template(file_path=get_template_path(), file_type="toml")
+    queries = make_catalog_queries(args.queries)
+
+    print(f"{'tools':>6}{'build (ms)':>12}{'select (us)':>13}{'full (KB)':>11}{'top-k (KB)':>12}{'full tokens':>13}{'top-k tokens':>14}")
+    for size in args.sizes:
+        catalog = make_tool_catalog(size)
+
+        start = time.perf_counter()
+        index = ToolIndex(catalog)
+        build_time = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        selections = [index.select(query, args.top_k) for query in queries]
+        select_time = (time.perf_counter() - start) / len(queries) * 1_000_000
+
+        full_prompt = compile_system_prompt(template, catalog)
+        selected_prompts = [compile_system_prompt(template, selection) for selection in selections]
+        selected_bytes = sum(prompt.num_bytes for prompt in selected_prompts) / len(selected_prompts)
+        selected_tokens = sum(prompt.num_tokens for prompt in selected_prompts) / len(selected_prompts)
+        print(
+            f"{size:>6}{build_time:>12.1f}{select_time:>13.1f}{full_prompt.num_bytes / 1024:>11.1f}"
+            f"{selected_bytes / 1024:>12.1f}{full_prompt.num_tokens:>13}{selected_tokens:>14.0f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+An in-process backend standing in for Ollama and Groq in the benchmarks.
+"""
+from typing import List, Optional
+
+from easy_fnc.models.model import EasyFNCModel
+from easy_fnc.schemas import FunctionMetadata
+
+class FakeModel(EasyFNCModel):
+    """
+    A model that answers every query with a canned response, without any I/O.
+
+    Goes through the same message handling as the real backends, so timing
+    `generate` measures the overhead of easy_fnc around a round trip.
+    """
+    def __init__(self, functions: List[FunctionMetadata], response: str = "", **kwargs) -> None:
+        super().__init__(functions, **kwargs)
+        self.response = response
+        self.model_name: Optional[str] = "fake"
+
+    def generate(self, user_input: str, output_turn: Optional[bool] = None) -> str:
+        self._add_user_message(user_input)
+        model_response = self._complete(self.messages)
+        self.history.append("assistant", model_response)
+        return model_response
+
+    def _chat(self, messages: List[dict], structured: bool = False) -> str:
+        return self.response
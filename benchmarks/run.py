@@ -0,0 +1,211 @@
+"""
+Benchmark suite for the parse -> validate -> resolve -> execute pipeline.
+
+Times every stage separately on synthetic model responses that vary in the
+number of function calls, chain depth, kwargs payload size and thoughts
+length, with an in-process backend standing in for Ollama and Groq.
+
+Usage:
+    python -m benchmarks.run [--scenarios small wide] [--json results.json]
+    python -m benchmarks.run --baseline results.json [--tolerance 0.2] [--noise-floor 1e-6]
+
+With `--baseline`, the results are compared with a stored run and the exit
+code is 1 if any stage got slower by more than the tolerance. Stages are
+compared on their fastest repetition, which is the least affected by other
+load on the machine, and a slowdown must also exceed the noise floor.
+"""
+from typing import Callable, Dict, List, Optional
+import argparse
+import platform
+import logging
+import statistics
+import json
+import time
+import sys
+
+import easy_fnc
+from easy_fnc.executor import copy_kwargs
+from easy_fnc.function_caller import FunctionCallingEngine, map_previous_outputs
+from easy_fnc.models.prompt_cache import clear_prompt_cache
+from easy_fnc.schemas import FunctionCall, ModelResponse
+from easy_fnc.utils import extract_thoughts_and_function_calls
+
+from benchmarks.fake_backend import FakeModel
+from benchmarks.synthetic import SCENARIOS, Scenario, get_tools, make_functions_metadata, make_raw_response
+
+# Define constants
+DEFAULT_MIN_TIME = 0.2
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.2
+DEFAULT_NOISE_FLOOR = 1e-6
+
+def measure(function: Callable[[], object], min_time: float, repeat: int) -> Dict[str, float]:
+    """
+    Time a function, returning the median and minimum time per call in seconds.
+
+    Every repetition runs the function as many times as fit in `min_time`.
+    """
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 10 or iterations >= 1_000_000:
+            break
+        iterations *= 2
+    iterations = max(1, int(iterations * min_time / max(elapsed * 10, 1e-9)))
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            function()
+        timings.append((time.perf_counter() - start) / iterations)
+    return {"median_s": statistics.median(timings), "min_s": min(timings), "iterations": iterations}
+
+def scenario_stages(scenario: Scenario) -> Dict[str, Callable[[], object]]:
+    """Return the stages to time for a scenario."""
+    raw_response = make_raw_response(scenario)
+    parsed = ModelResponse.from_raw_response(raw_response)
+
+    def new_engine() -> FunctionCallingEngine:
+        engine = FunctionCallingEngine(auto_load_core_utils=False)
+        engine.functions.update(get_tools())
+        return engine
+
+    def fresh_calls() -> List[FunctionCall]:
+        # call_functions maps outputs into the kwargs in place, so every run needs its own copy
+        return [
+            FunctionCall.model_construct(name=call.name, kwargs=copy_kwargs(call.kwargs), returns=call.returns)
+            for call in parsed.function_calls
+        ]
+
+    resolved_engine = new_engine()
+    resolved_engine.call_functions(fresh_calls())
+
+    def resolve() -> None:
+        for function_call in parsed.function_calls:
+            map_previous_outputs(resolved_engine.outputs, copy_kwargs(function_call.kwargs))
+
+    def call(parallel: bool = False, validate: bool = False) -> Callable[[], object]:
+        return lambda: new_engine().call_functions(fresh_calls(), parallel=parallel, validate=validate)
+
+    shared_engine = new_engine()
+
+    def call_in_context() -> object:
+        return shared_engine.call_functions(fresh_calls(), context=shared_engine.create_context())
+
+    plan_engine = new_engine()
+    plan = plan_engine.compile_plan(raw_response)
+
+    metadata = make_functions_metadata(scenario.num_calls)
+    model = FakeModel(metadata, response=raw_response)
+
+    def system_prompt() -> str:
+        clear_prompt_cache()
+        model._compiled_prompt = None
+        return model.generate_system_prompt()
+
+    def format_output() -> str:
+        return model.format_output(resolved_engine.outputs, "Run the plan.")
+
+    def generate() -> str:
+        del model.messages[1:]
+        return model.generate("Run the plan.")
+
+    return {
+        "extract_thoughts_and_function_calls": lambda: extract_thoughts_and_function_calls(raw_response),
+        "from_raw_response": lambda: ModelResponse.from_raw_response(raw_response),
+        "validate_function_calls": lambda: resolved_engine.validate_function_calls(parsed.function_calls),
+        "map_previous_outputs": resolve,
+        "call_functions": call(),
+        "call_functions_parallel": call(parallel=True),
+        "call_functions_validated": call(validate=True),
+        "call_functions_context": call_in_context,
+        "compile_plan_cached": lambda: plan_engine.compile_plan(raw_response),
+        "run_plan": lambda: new_engine().run_plan(plan),
+        "generate_system_prompt": system_prompt,
+        "generate_system_prompt_cached": model.generate_system_prompt,
+        "format_output": format_output,
+        "fake_backend_generate": generate,
+    }
+
+def run(scenarios: List[Scenario], min_time: float, repeat: int) -> Dict[str, Dict[str, float]]:
+    """Run the benchmarks and return the timings keyed by `scenario/stage`."""
+    results = {}
+    for scenario in scenarios:
+        for stage, function in scenario_stages(scenario).items():
+            results[f"{scenario.name}/{stage}"] = measure(function, min_time, repeat)
+    return results
+
+def compare(
+        results: Dict[str, Dict[str, float]],
+        baseline: Dict[str, Dict[str, float]],
+        tolerance: float,
+        noise_floor: float = DEFAULT_NOISE_FLOOR
+    ) -> List[str]:
+    """
+    Print the change of every stage against the baseline and return the regressed ones.
+
+    Stages are compared on their minimum time per call. A stage regressed if
+    it got slower by more than `tolerance` and by more than `noise_floor`
+    seconds per call, so that jitter on the fastest stages is not flagged.
+    """
+    regressions = []
+    print(f"{'benchmark':<56}{'baseline (us)':>15}{'current (us)':>15}{'change':>10}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]["min_s"], result["min_s"]
+        change = after / before - 1 if before else 0.0
+        regressed = change > tolerance and after - before > noise_floor
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<56}{before * 1e6:>15.1f}{after * 1e6:>15.1f}{change:>+10.1%}{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=[s.name for s in SCENARIOS], help="The scenarios to run, defaults to all")
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME, help="The minimum time per repetition, in seconds")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="The number of repetitions per benchmark")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Compare the results with the results stored in this file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="The allowed slowdown against the baseline")
+    parser.add_argument("--noise-floor", type=float, default=DEFAULT_NOISE_FLOOR, help="The slowdown per call, in seconds, below which a stage is not flagged")
+    args = parser.parse_args(argv)
+    logging.getLogger("easy_fnc").setLevel(logging.WARNING)
+
+    scenarios = [s for s in SCENARIOS if args.scenarios is None or s.name in args.scenarios]
+    results = run(scenarios, args.min_time, args.repeat)
+
+    output = {
+        "metadata": {
+            "easy_fnc": easy_fnc.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(output, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r") as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.tolerance, args.noise_floor)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}")
+            return 1
+        return 0
+
+    print(f"{'benchmark':<56}{'median (us)':>15}{'min (us)':>15}")
+    for name, result in results.items():
+        print(f"{name:<56}{result['median_s'] * 1e6:>15.1f}{result['min_s'] * 1e6:>15.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Synthetic model responses and tools for the benchmarks.
+"""
+from typing import Any, Dict, List, NamedTuple
+import json
+
+from easy_fnc.function_caller import create_functions_metadata
+from easy_fnc.schemas import FunctionMetadata
+
+class Scenario(NamedTuple):
+    """The shape of a synthetic model response."""
+    name: str
+    num_calls: int
+    chain_depth: int
+    payload_size: int
+    thoughts_length: int
+
+SCENARIOS = [
+    Scenario("small", num_calls=4, chain_depth=2, payload_size=16, thoughts_length=200),
+    Scenario("wide", num_calls=64, chain_depth=1, payload_size=64, thoughts_length=1000),
+    Scenario("deep", num_calls=64, chain_depth=16, payload_size=64, thoughts_length=1000),
+    Scenario("large", num_calls=256, chain_depth=8, payload_size=4096, thoughts_length=20000),
+]
+
+def step(value: int, payload: Dict[str, Any]) -> int:
+    """Returns the value plus the number of items in the payload."""
+    return value + len(payload["items"])
+
+def get_tools() -> Dict[str, Any]:
+    """The tools the synthetic responses call."""
+    return {"step": step}
+
+def make_function_calls(scenario: Scenario) -> List[Dict[str, Any]]:
+    """
+    Make the function calls of a scenario.
+
+    The calls are split into independent chains of `chain_depth` calls, where
+    every call after the first takes the output of the previous one.
+    """
+    items = ["x" * 8] * max(scenario.payload_size // 10, 1)
+    function_calls = []
+    for index in range(scenario.num_calls):
+        chain, depth = divmod(index, scenario.chain_depth)
+        value = f"chain_{chain}_{depth - 1}" if depth else index
+        function_calls.append({
+            "name": "step",
+            "kwargs": {"value": value, "payload": {"items": items, "meta": {"index": index}}},
+            "returns": [f"chain_{chain}_{depth}"],
+        })
+    return function_calls
+
+def make_raw_response(scenario: Scenario) -> str:
+    """Make the raw model response of a scenario."""
+    thoughts = ("I should call the step function. " * (scenario.thoughts_length // 33 + 1))[:scenario.thoughts_length]
+    return (
+        f"<|thoughts|>\n{thoughts}\n<|end_thoughts|>\n"
+        f"<|function_calls|>\n{json.dumps(make_function_calls(scenario), indent=4)}\n<|end_function_calls|>\n"
+    )
+
+def make_functions_metadata(num_functions: int) -> List[FunctionMetadata]:
+    """Make the metadata of a catalog of `num_functions` tools, for the system prompt."""
+    metadata = create_functions_metadata({"step": step})[0]
+    return [
+        metadata.model_copy(update={"name": f"step_{index}", "description": f"Tool number {index}. {metadata.description}"})
+        for index in range(num_functions)
+    ]
+
+CATALOG_VERBS = ["get", "create", "update", "delete", "list", "search", "convert", "summarize", "send", "schedule"]
+CATALOG_OBJECTS = [
+    "weather_forecast", "stock_price", "calendar_event", "email_message", "invoice", "customer_record",
+    "flight_booking", "hotel_reservation", "exchange_rate", "news_article", "support_ticket", "file_upload",
+    "user_profile", "shipping_label", "payment", "playlist", "recipe", "translation", "meeting_note", "reminder",
+]
+
+def make_tool_catalog(num_functions: int) -> List[FunctionMetadata]:
+    """
+    Make the metadata of a catalog of `num_functions` distinct tools, named
+    after a verb and an object, for the tool retrieval benchmark.
+    """
+    metadata = create_functions_metadata({"step": step})[0]
+    catalog = []
+    for index in range(num_functions):
+        verb = CATALOG_VERBS[index % len(CATALOG_VERBS)]
+        obj = CATALOG_OBJECTS[index // len(CATALOG_VERBS) % len(CATALOG_OBJECTS)]
+        name = f"{verb}_{obj}_{index}"
+        readable = obj.replace("_", " ")
+        catalog.append(metadata.model_copy(update={
+            "name": name,
+            "description": f"{verb.capitalize()} the {readable} with the given {readable} id and options.",
+            "parameters": {
+                "type": "object",
+                "properties": {f"{obj}_id": {"type": "str"}, "options": {"type": "dict"}},
+                "required": [f"{obj}_id"],
+            },
+        }))
+    return catalog
+
+def make_catalog_queries(num_queries: int) -> List[str]:
+    """Make user queries that each ask for one kind of tool of the catalog."""
+    return [
+        f"Please {CATALOG_VERBS[index % len(CATALOG_VERBS)]} my {CATALOG_OBJECTS[index * 7 % len(CATALOG_OBJECTS)].replace('_', ' ')} for tomorrow"
+        for index in range(num_queries)
+    ]
@@ -0,0 +1,84 @@
+from concurrent.futures import Future
+from typing import Dict, List, Callable, Any, NamedTuple, Optional, Tuple
+import threading
+
+class BatchPolicy(NamedTuple):
+    """
+    The batch variant of a function: `batch_function` takes a list of kwargs
+    dicts and returns the outputs in the same order.
+
+    At most `max_batch_size` calls are passed per invocation (None means no
+    limit), and with a `window` of more than 0 seconds, calls from concurrent
+    plans are coalesced for that long before the batch is sent.
+    """
+    batch_function: Callable[[List[Dict[str, Any]]], List[Any]]
+    max_batch_size: Optional[int] = None
+    window: float = 0.0
+
+def call_in_batches(
+        function_name: str,
+        batch_function: Callable[[List[Dict[str, Any]]], List[Any]],
+        inputs: List[Dict[str, Any]],
+        max_batch_size: Optional[int] = None
+    ) -> List[Any]:
+    """
+    Call a batch function on the inputs in chunks of at most `max_batch_size`.
+    """
+    size = max_batch_size or len(inputs) or 1
+    outputs: List[Any] = []
+    for start in range(0, len(inputs), size):
+        chunk = inputs[start:start + size]
+        results = list(batch_function(chunk))
+        if len(results) != len(chunk):
+            raise ValueError(f"Batch function of '{function_name}' returned {len(results)} outputs for {len(chunk)} calls")
+        outputs.extend(results)
+    return outputs
+
+class Coalescer:
+    """
+    Coalesces the calls to one batch function from concurrent plans.
+
+    The first caller waits up to `window` seconds, or until `max_batch_size`
+    calls are waiting, then sends every waiting call in one batch and hands
+    each caller its own outputs.
+    """
+    def __init__(self, function_name: str, policy: BatchPolicy) -> None:
+        self.function_name = function_name
+        self.policy = policy
+        self._pending: List[Tuple[Dict[str, Any], Future]] = []
+        self._full = threading.Event()
+        self._lock = threading.Lock()
+
+    def submit(self, inputs: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Add the kwargs of calls to the next batch and wait for their outputs.
+        """
+        futures = [Future() for _ in inputs]
+        with self._lock:
+            leader = not self._pending
+            if leader:
+                self._full = threading.Event()
+            full = self._full
+            self._pending.extend(zip(inputs, futures))
+            if self.policy.max_batch_size is not None and len(self._pending) >= self.policy.max_batch_size:
+                full.set()
+
+        if leader:
+            full.wait(self.policy.window)
+            with self._lock:
+                batch, self._pending = self._pending, []
+            try:
+                outputs = call_in_batches(
+                    self.function_name,
+                    self.policy.batch_function,
+                    [function_input for function_input, _ in batch],
+                    self.policy.max_batch_size
+                )
+            except BaseException as e:
+                for _, future in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future), output in zip(batch, outputs):
+                    future.set_result(output)
+
+        return [future.result() for future in futures]
@@ -0,0 +1,133 @@
+from collections import OrderedDict
+from typing import Dict, Callable, Any, NamedTuple, Optional, Tuple
+import threading
+import json
+import time
+
+from easy_fnc.utils import approximate_size
+
+# Define constants
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+class CachePolicy(NamedTuple):
+    """The caching policy of a function; a `ttl` of None means results never expire."""
+    ttl: Optional[float] = None
+
+class CacheStats:
+    """Hit, miss and eviction counters of a cached function."""
+    __slots__ = ("hits", "misses", "evictions")
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def __repr__(self) -> str:
+        return f"CacheStats(hits={self.hits}, misses={self.misses}, evictions={self.evictions})"
+
+def cacheable(function: Optional[Callable] = None, *, ttl: Optional[float] = None) -> Callable:
+    """
+    Mark a function as pure, so that the engine caches its results.
+
+    Can be used as `@cacheable` or `@cacheable(ttl=60)`.
+    """
+    def mark(function: Callable) -> Callable:
+        function.__easy_fnc_cache__ = CachePolicy(ttl)
+        return function
+
+    return mark(function) if function is not None else mark
+
+def get_cache_policy(function: Callable) -> Optional[CachePolicy]:
+    """
+    Return the caching policy a function was marked with, if any.
+    """
+    return getattr(function, "__easy_fnc_cache__", None)
+
+def make_cache_key(function_name: str, kwargs: Dict[str, Any]) -> Optional[str]:
+    """
+    Create a cache key from the function name and its canonicalized kwargs.
+
+    Returns None if the kwargs cannot be canonicalized, in which case the
+    call is not cached.
+    """
+    try:
+        return function_name + ":" + json.dumps(kwargs, sort_keys=True, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return None
+
+class ResultCache:
+    """
+    A bounded, thread-safe cache of function results.
+
+    Entries are evicted in least recently used order once there are more than
+    `max_entries` of them or their approximate size exceeds `max_bytes`, and
+    expire after the TTL of the function that produced them. Cached values
+    are returned as is, so they should not be mutated by the caller.
+    """
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats: Dict[str, CacheStats] = {}
+        self.size = 0
+        self._entries: "OrderedDict[str, Tuple[str, Any, Optional[float], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, function_name: str, key: str) -> Tuple[bool, Any]:
+        """
+        Look up a result, returning whether it was found and the result.
+        """
+        with self._lock:
+            stats = self._stats(function_name)
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] <= time.monotonic():
+                self._remove(key)
+                stats.evictions += 1
+                entry = None
+            if entry is None:
+                stats.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            stats.hits += 1
+            return True, entry[1]
+
+    def put(self, function_name: str, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a result, evicting the least recently used entries if needed.
+        """
+        size = approximate_size(value)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (function_name, value, expires_at, size)
+            self.size += size
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                evicted_key = next(iter(self._entries))
+                self._stats(self._entries[evicted_key][0]).evictions += 1
+                self._remove(evicted_key)
+
+    def clear(self) -> None:
+        """
+        Remove every entry from the cache, keeping the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _remove(self, key: str) -> None:
+        self.size -= self._entries.pop(key)[3]
+
+    def _stats(self, function_name: str) -> CacheStats:
+        stats = self.stats.get(function_name)
+        if stats is None:
+            stats = self.stats[function_name] = CacheStats()
+        return stats
@@ -1,4 +1,22 @@
-from typing import Union
+from typing import Any, Dict, List, Optional, Union
+from collections import Counter
+import functools
+import operator
+import array
+import heapq
+import math
+
+# Define constants
+NUMPY_THRESHOLD = 1024
+INT64_LIMIT = 2 ** 63
+COMPARISONS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
 
 def get_core_utils() -> dict[str, callable]:
     """ Returns the core utility functions. """
@@ -6,8 +24,68 @@ def get_core_utils() -> dict[str, callable]:
         "get_val_from_dict": _get_val_from_dict,
         "concatenate_strings": _concatenate_strings,
         "_mean": _mean,
+        "join_strings": _join_strings,
+        "sum_values": _sum_values,
+        "mean": _mean,
+        "median": _median,
+        "min_value": _min_value,
+        "max_value": _max_value,
+        "variance": _variance,
+        "standard_deviation": _standard_deviation,
+        "describe_values": _describe_values,
+        "sort_values": _sort_values,
+        "top_k_values": _top_k_values,
+        "filter_values": _filter_values,
+        "unique_values": _unique_values,
+        "count_values": _count_values,
+        "group_by_key": _group_by_key,
     }
 
+@functools.lru_cache(maxsize=None)
+def _numpy() -> Optional[Any]:
+    """ Returns the numpy module, or None if it is not installed. """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+def _as_array(values: Any) -> Optional[Any]:
+    """
+    Returns the values as a numeric NumPy array if the fast path applies, else None.
+
+    Arrays and buffers (`array.array`, `memoryview`) are used without a copy;
+    lists and tuples are converted when they hold at least NUMPY_THRESHOLD
+    numbers of a single type, so that the results keep the types of the items.
+    """
+    numpy = _numpy()
+    if numpy is None:
+        return None
+    if isinstance(values, numpy.ndarray):
+        return values if values.dtype.kind in "biuf" else None
+    if isinstance(values, (array.array, memoryview)):
+        return numpy.asarray(values)
+    if isinstance(values, (list, tuple)) and len(values) >= NUMPY_THRESHOLD:
+        if set(map(type, values)) not in ({int}, {float}):
+            return None
+        converted = numpy.asarray(values)
+        return converted if converted.dtype.kind in "biuf" else None
+    return None
+
+def _as_output(result: Any, values: Any) -> Any:
+    """ Keeps array results as arrays for array and buffer inputs, and converts them to lists for lists. """
+    return result.tolist() if isinstance(values, (list, tuple)) else result
+
+def _may_overflow(values: Any) -> bool:
+    """ Whether the sum of an integer array could overflow the 64-bit integers NumPy adds them in. """
+    if values.dtype.kind not in "iu" or not len(values):
+        return False
+    return len(values) * max(abs(int(values.min())), abs(int(values.max()))) >= INT64_LIMIT
+
+def _as_list(values: Any) -> list:
+    """ Returns a sequence of values as a list, for the pure-Python paths. """
+    return values if isinstance(values, list) else list(values)
+
 def _get_val_from_dict(key: str, dictionary: dict[str, any]) -> any:
     """ Gets a value from a dictionary. """
     return dictionary[key]
@@ -16,6 +94,128 @@ def _concatenate_strings(lst: list[str]) -> str:
     """ Concatenates a list of strings. """
     return "".join(lst)
 
+def _join_strings(lst: list[str], separator: str = "") -> str:
+    """ Joins a list of strings with a separator. """
+    return separator.join(map(str, lst))
+
+def _sum_values(lst: list[Union[int, float]]) -> float:
+    """ Calculates the sum of a list of numbers. """
+    values = _as_array(lst)
+    if values is not None:
+        if _may_overflow(values):
+            return sum(values.tolist())
+        return values.sum().item()
+    return sum(lst)
+
 def _mean(lst: list[Union[int, float]]) -> float:
     """ Calculates the mean of a list of numbers. """
-    return sum(lst) / len(lst)
\ No newline at end of file
+    values = _as_array(lst)
+    if values is not None:
+        return float(values.mean())
+    lst = _as_list(lst)
+    return sum(lst) / len(lst)
+
+def _median(lst: list[Union[int, float]]) -> float:
+    """ Calculates the median of a list of numbers. """
+    values = _as_array(lst)
+    if values is not None:
+        return float(_numpy().median(values))
+    ordered = sorted(lst)
+    middle = len(ordered) // 2
+    return float(ordered[middle]) if len(ordered) % 2 else (ordered[middle - 1] + ordered[middle]) / 2
+
+def _min_value(lst: list[Union[int, float]]) -> float:
+    """ Finds the smallest of a list of numbers. """
+    values = _as_array(lst)
+    if values is not None:
+        return values.min().item()
+    return min(lst)
+
+def _max_value(lst: list[Union[int, float]]) -> float:
+    """ Finds the largest of a list of numbers. """
+    values = _as_array(lst)
+    if values is not None:
+        return values.max().item()
+    return max(lst)
+
+def _variance(lst: list[Union[int, float]]) -> float:
+    """ Calculates the population variance of a list of numbers. """
+    values = _as_array(lst)
+    if values is not None:
+        return float(values.var())
+    lst = _as_list(lst)
+    mean = sum(lst) / len(lst)
+    return sum((value - mean) ** 2 for value in lst) / len(lst)
+
+def _standard_deviation(lst: list[Union[int, float]]) -> float:
+    """ Calculates the population standard deviation of a list of numbers. """
+    return math.sqrt(_variance(lst))
+
+def _describe_values(lst: list[Union[int, float]]) -> dict[str, float]:
+    """ Calculates the count, mean, standard deviation, minimum, median and maximum of a list of numbers. """
+    values = _as_array(lst)
+    if values is None:
+        values = _as_list(lst)
+    return {
+        "count": len(values),
+        "mean": _mean(values),
+        "std": _standard_deviation(values),
+        "min": _min_value(values),
+        "median": _median(values),
+        "max": _max_value(values),
+    }
+
+def _sort_values(lst: list[Union[int, float, str]], reverse: bool = False) -> list[Union[int, float, str]]:
+    """ Sorts a list of values, in descending order if reverse is true. """
+    values = _as_array(lst)
+    if values is not None:
+        ordered = _numpy().sort(values)
+        return _as_output(ordered[::-1] if reverse else ordered, lst)
+    return sorted(lst, reverse=reverse)
+
+def _top_k_values(lst: list[Union[int, float]], k: int, largest: bool = True) -> list[Union[int, float]]:
+    """ Returns the k largest values of a list, or the k smallest if largest is false, in order. """
+    values = _as_array(lst)
+    if values is not None:
+        numpy = _numpy()
+        k = max(0, min(k, len(values)))
+        if k == 0:
+            return _as_output(values[:0], lst)
+        if largest:
+            selected = numpy.partition(values, len(values) - k)[len(values) - k:]
+            return _as_output(numpy.sort(selected)[::-1], lst)
+        return _as_output(numpy.sort(numpy.partition(values, k - 1)[:k]), lst)
+    return heapq.nlargest(k, lst) if largest else heapq.nsmallest(k, lst)
+
+def _filter_values(lst: list[Union[int, float, str]], comparison: str, value: Union[int, float, str]) -> list[Union[int, float, str]]:
+    """ Keeps the values of a list for which `item <comparison> value` holds, with comparison one of >, >=, <, <=, ==, !=. """
+    if comparison not in COMPARISONS:
+        raise ValueError(f"Unknown comparison '{comparison}', expected one of {', '.join(COMPARISONS)}")
+    compare = COMPARISONS[comparison]
+    values = _as_array(lst) if isinstance(value, (int, float)) else None
+    if values is not None:
+        return _as_output(values[compare(values, value)], lst)
+    return [item for item in lst if compare(item, value)]
+
+def _unique_values(lst: list[Union[int, float, str]]) -> list[Union[int, float, str]]:
+    """ Returns the distinct values of a list, sorted. """
+    values = _as_array(lst)
+    if values is not None:
+        return _as_output(_numpy().unique(values), lst)
+    return sorted(set(lst))
+
+def _count_values(lst: list[Union[int, float, str]]) -> dict[Union[int, float, str], int]:
+    """ Counts how often each value occurs in a list. """
+    values = _as_array(lst)
+    if values is not None:
+        distinct, counts = _numpy().unique(values, return_counts=True)
+        return dict(zip(distinct.tolist(), counts.tolist()))
+    return dict(Counter(lst))
+
+def _group_by_key(items: list[dict[str, any]], key: str) -> dict[str, list[dict[str, any]]]:
+    """ Groups a list of dictionaries by their value for a key; dictionaries without the key are left out. """
+    groups: Dict[Any, List[Dict[str, Any]]] = {}
+    for item in items:
+        if key in item:
+            groups.setdefault(item[key], []).append(item)
+    return groups
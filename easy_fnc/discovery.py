@@ -0,0 +1,216 @@
+from typing import Dict, List, Callable, Any, Optional
+import importlib
+import importlib.util
+import hashlib
+import inspect
+import logging
+import json
+import ast
+import sys
+import os
+
+from easy_fnc.executor import REMAINING_TIME_PARAMETER
+from easy_fnc.utils import SYNTHETIC_MODULE_PREFIX
+
+logger = logging.getLogger(__name__)
+
+# Define constants
+MANIFEST_VERSION = 2
+MANIFEST_SUFFIX = ".easy_fnc-manifest.json"
+EXCLUDED_FUNCTIONS = {"get_user_defined_functions"}
+
+_discovered: Dict[str, tuple] = {}
+
+def discover_functions(file_path: str) -> Dict[str, Callable]:
+    """
+    Discover the top-level public functions defined in a file.
+
+    The module is imported once per process and file version, and a fresh
+    copy of it is loaded when the file changed since it was last discovered. Nested
+    functions, methods and names starting with an underscore are ignored.
+    The manifest of the file is refreshed as a side effect, so that later
+    calls to `load_function_descriptions` do not need to import it.
+    """
+    path = os.path.abspath(file_path)
+    stat = _stat(path)
+    cached = _discovered.get(path)
+    if cached is not None and cached[0] == stat:
+        return dict(cached[1])
+
+    manifest = _read_manifest(path, stat)
+    names = [d["name"] for d in manifest["functions"]] if manifest else _top_level_function_names(path)
+
+    module = _import_module(path, reload=cached is not None)
+    functions: Dict[str, Callable] = {}
+    for name in names:
+        function = getattr(module, name, None)
+        if callable(function):
+            functions[name] = function
+
+    if manifest is None:
+        _write_manifest(path, stat, [describe_function(name, function) for name, function in functions.items()])
+
+    _discovered[path] = (stat, functions)
+    return dict(functions)
+
+def load_function_descriptions(file_path: str) -> List[Dict[str, Any]]:
+    """
+    Return the descriptions of the functions defined in a file.
+
+    The descriptions are read from the manifest next to the file when it is
+    up to date, without importing or inspecting the module; otherwise the
+    functions are discovered and the manifest is rewritten.
+    """
+    path = os.path.abspath(file_path)
+    manifest = _read_manifest(path, _stat(path))
+    if manifest is not None:
+        return manifest["functions"]
+    return [describe_function(name, function) for name, function in discover_functions(path).items()]
+
+def describe_function(name: str, function: Callable) -> Dict[str, Any]:
+    """
+    Describe the name, docstring, parameter types and return type of a function.
+    """
+    annotations = function.__annotations__
+    return {
+        "name": name,
+        "description": function.__doc__,
+        "parameters": {
+            param: annotations.get(param, Any).__name__
+            for param in inspect.signature(function).parameters
+            if param != 'return' and param != REMAINING_TIME_PARAMETER
+        },
+        "returns": annotations.get('return', Any).__name__,
+    }
+
+def get_manifest_path(file_path: str) -> str:
+    """
+    Return the path of the manifest of a file, in the `__pycache__` directory next to it.
+    """
+    directory, filename = os.path.split(os.path.abspath(file_path))
+    return os.path.join(directory, "__pycache__", os.path.splitext(filename)[0] + MANIFEST_SUFFIX)
+
+def _stat(path: str) -> tuple:
+    """Return the modification time and size of a file."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"File {path} not found")
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _hash_file(path: str) -> str:
+    """Return the SHA-256 hash of the contents of a file."""
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+def _read_manifest(path: str, stat: tuple) -> Optional[Dict[str, Any]]:
+    """
+    Read the manifest of a file, returning None if it is missing or outdated.
+
+    The modification time and size are checked first; if they changed but the
+    contents hash is the same, the manifest is still valid and is updated.
+    """
+    try:
+        with open(get_manifest_path(path), "r") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("python") != list(sys.version_info[:2]):
+        return None
+    if [manifest.get("mtime_ns"), manifest.get("size")] == list(stat):
+        return manifest
+    if manifest.get("sha256") == _hash_file(path):
+        _write_manifest(path, stat, manifest["functions"], manifest["sha256"])
+        return manifest
+    return None
+
+def _write_manifest(path: str, stat: tuple, descriptions: List[Dict[str, Any]], sha256: Optional[str] = None) -> None:
+    """Write the manifest of a file, ignoring directories that are not writable."""
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "python": list(sys.version_info[:2]),
+        "mtime_ns": stat[0],
+        "size": stat[1],
+        "sha256": sha256 or _hash_file(path),
+        "functions": descriptions,
+    }
+    manifest_path = get_manifest_path(path)
+    temporary_path = f"{manifest_path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+        with open(temporary_path, "w") as file:
+            json.dump(manifest, file)
+        os.replace(temporary_path, manifest_path)
+    except (OSError, TypeError) as e:
+        logger.debug(f"Could not write the function manifest for {path}: {str(e)}")
+
+def _top_level_function_names(path: str) -> List[str]:
+    """Return the names of the top-level public functions defined in a file."""
+    with open(path, "r") as file:
+        tree = ast.parse(file.read())
+    return [
+        node.name for node in tree.body
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+        and not node.name.startswith("_")
+        and node.name not in EXCLUDED_FUNCTIONS
+    ]
+
+def _import_module(path: str, reload: bool = False):
+    """
+    Import the module at the given path, or load a fresh copy of it if `reload` is set.
+
+    If the file lies under an entry of `sys.path`, it is imported under its
+    dotted module name, so it is the same module object as a regular import.
+    Otherwise it is loaded directly from its location.
+
+    A changed file is loaded again into a new module object under its
+    synthetic name, compiled from the source: the module of a regular import
+    is left as it is, and so is the bytecode cache, which is only checked
+    against the mtime in seconds and the size and so could still hold the
+    version of an edit within the same second.
+    """
+    if not reload:
+        module_name = _module_name(path)
+        if module_name is not None:
+            module = importlib.import_module(module_name)
+            if os.path.abspath(getattr(module, "__file__", "") or "") == path:
+                return module
+
+    module_name = get_synthetic_module_name(path)
+    previous_module = sys.modules.get(module_name)
+    if previous_module is not None and not reload:
+        return previous_module
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    try:
+        if reload:
+            exec(spec.loader.source_to_code(spec.loader.get_data(path), path), module.__dict__)
+        else:
+            spec.loader.exec_module(module)
+    except Exception:
+        if previous_module is not None:
+            sys.modules[module_name] = previous_module
+        else:
+            del sys.modules[module_name]
+        raise
+    return module
+
+def get_synthetic_module_name(path: str) -> str:
+    """
+    Return the name a file outside of `sys.path` is imported under.
+    """
+    return SYNTHETIC_MODULE_PREFIX + hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+
+def _module_name(path: str) -> Optional[str]:
+    """Return the dotted module name of a file relative to the first matching `sys.path` entry."""
+    for entry in sys.path:
+        root = os.path.abspath(entry or os.getcwd())
+        relative_path = os.path.relpath(path, root)
+        if relative_path.startswith(os.pardir) or os.path.isabs(relative_path):
+            continue
+        parts = os.path.splitext(relative_path)[0].split(os.sep)
+        if all(part.isidentifier() for part in parts):
+            return ".".join(parts)
+    return None
@@ -0,0 +1,506 @@
+from __future__ import annotations
+
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import ChainMap
+from collections.abc import MutableMapping
+from typing import TYPE_CHECKING, AbstractSet, Dict, List, Set, Sequence, Callable, Awaitable, Any, NamedTuple, Optional
+import threading
+import logging
+import heapq
+import time
+import os
+
+if TYPE_CHECKING:
+    from easy_fnc.schemas import FunctionCall
+
+logger = logging.getLogger(__name__)
+
+# Define constants
+REMAINING_TIME_PARAMETER = "remaining_time"
+
+class PlanResult(NamedTuple):
+    """
+    The outcome of a plan run with a deadline, by index of the function calls.
+
+    Calls in `not_run` were skipped because the deadline was spent or a call
+    they depend on failed, timed out or did not run.
+    """
+    outputs: Dict[str, Any]
+    completed: List[int]
+    timed_out: List[int]
+    failed: Dict[int, Exception]
+    not_run: List[int]
+
+    @property
+    def ok(self) -> bool:
+        """Whether every call completed."""
+        return not (self.timed_out or self.failed or self.not_run)
+
+class ExecutionContext:
+    """
+    The state of one request: the outputs of its function calls.
+
+    Contexts are cheap to create, so a service can create one per request
+    and share a single engine between concurrent requests.
+    """
+    __slots__ = ("outputs",)
+
+    def __init__(self, outputs: Optional[MutableMapping] = None) -> None:
+        self.outputs: MutableMapping = outputs if outputs is not None else {}
+
+def collect_references(value: Any, references: Set[str]) -> Set[str]:
+    """
+    Collect every string in the given kwargs value that could name a previous output.
+    """
+    if isinstance(value, str):
+        references.add(value)
+    elif isinstance(value, dict):
+        for item in value.values():
+            collect_references(item, references)
+    elif isinstance(value, list):
+        for item in value:
+            collect_references(item, references)
+    return references
+
+def build_dependency_graph(function_calls: List[FunctionCall]) -> List[Set[int]]:
+    """
+    Build the dependency graph of a list of function calls.
+
+    Returns, for every call, the indices of the earlier calls whose outputs
+    it references through its kwargs. A name refers to the latest earlier
+    call that returns it, which is what the serial executor would resolve.
+    """
+    producers: Dict[str, int] = {}
+    dependencies: List[Set[int]] = []
+    for index, function_call in enumerate(function_calls):
+        references = collect_references(function_call.kwargs, set())
+        dependencies.append({producers[name] for name in references if name in producers})
+        for name in function_call.returns:
+            producers[name] = index
+    return dependencies
+
+def copy_kwargs(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Copy the dict and list structure of the kwargs so that mapping outputs
+    into them does not mutate the original function call.
+    """
+    return {key: _copy_value(value) for key, value in kwargs.items()}
+
+def _copy_value(value: Any) -> Any:
+    """Copy a kwargs value if it is a dict or a list."""
+    if isinstance(value, dict):
+        return copy_kwargs(value)
+    if isinstance(value, list):
+        return [_copy_value(item) for item in value]
+    return value
+
+def store_returns(outputs: Dict[str, Any], function_call: FunctionCall, output: Any) -> None:
+    """
+    Store the output of a function call under its return names.
+    """
+    if function_call.returns:
+        if len(function_call.returns) == 1:
+            outputs[function_call.returns[0]] = output
+        else:
+            for i, return_value in enumerate(function_call.returns):
+                outputs[return_value] = output[i]
+
+def run_parallel(
+        function_calls: List[FunctionCall],
+        call: Callable[[FunctionCall, Dict[str, Any]], Any],
+        map_outputs: Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]],
+        outputs: Dict[str, Any],
+        max_workers: Optional[int] = None,
+        is_batchable: Optional[Callable[[FunctionCall], bool]] = None,
+        call_batch: Optional[Callable[[List[FunctionCall], List[Dict[str, Any]]], List[Any]]] = None,
+        dependencies: Optional[Sequence[AbstractSet[int]]] = None
+    ) -> Dict[str, Any]:
+    """
+    Run the function calls on a thread pool, following their dependency graph.
+
+    Independent calls run concurrently. Each call resolves its kwargs against
+    the outputs of the calls it depends on, falling back to the outputs that
+    existed before the plan started, so the results are identical to running
+    the calls in order. The outputs are written to `outputs` in plan order
+    once every call has finished. If a call fails, only the calls downstream
+    of it are cancelled; the first error in plan order is raised afterwards.
+    Batchable calls to the same function that become ready together are
+    coalesced into one call of its batch variant.
+
+    Args:
+    - function_calls (List[FunctionCall]):
+        The function calls to run.
+    - call (callable):
+        Calls a function with the resolved kwargs and returns its output.
+    - map_outputs (callable):
+        Maps the previous outputs to the kwargs of a function call.
+    - outputs (dict):
+        The outputs of the previous function calls, updated in place.
+    - max_workers (int, optional):
+        The maximum number of threads to use.
+    - is_batchable (callable, optional):
+        Whether a function call should go through the batch variant of its function.
+    - call_batch (callable, optional):
+        Calls the batch variant of a function with the function calls and
+        their resolved kwargs, and returns their outputs in order.
+    - dependencies (sequence, optional):
+        The dependency graph of the function calls as returned by
+        `build_dependency_graph`, e.g. the one of a compiled plan; built
+        from the function calls if not given.
+    """
+    if dependencies is None:
+        dependencies = build_dependency_graph(function_calls)
+    dependents: List[List[int]] = [[] for _ in function_calls]
+    for index, upstream in enumerate(dependencies):
+        for dependency in upstream:
+            dependents[dependency].append(index)
+
+    produced: Dict[int, Dict[str, Any]] = {}
+    errors: Dict[int, Exception] = {}
+    remaining = [len(upstream) for upstream in dependencies]
+
+    def resolve(index: int) -> Dict[str, Any]:
+        upstream_outputs: Dict[str, Any] = {}
+        for dependency in sorted(dependencies[index]):
+            upstream_outputs.update(produced[dependency])
+        return map_outputs(ChainMap(upstream_outputs, outputs), copy_kwargs(function_calls[index].kwargs))
+
+    def run(index: int) -> Dict[int, Dict[str, Any]]:
+        result: Dict[str, Any] = {}
+        store_returns(result, function_calls[index], call(function_calls[index], resolve(index)))
+        return {index: result}
+
+    def run_batch(indices: List[int]) -> Dict[int, Dict[str, Any]]:
+        batch_outputs = call_batch([function_calls[index] for index in indices], [resolve(index) for index in indices])
+        results: Dict[int, Dict[str, Any]] = {}
+        for index, output in zip(indices, batch_outputs):
+            results[index] = {}
+            store_returns(results[index], function_calls[index], output)
+        return results
+
+    def submit(indices: List[int]) -> None:
+        batches: Dict[str, List[int]] = {}
+        for index in indices:
+            if is_batchable is not None and is_batchable(function_calls[index]):
+                batches.setdefault(function_calls[index].name, []).append(index)
+            else:
+                running[executor.submit(run, index)] = [index]
+        for batch in batches.values():
+            running[executor.submit(run_batch, batch)] = batch
+
+    running: Dict[Future, List[int]] = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        submit([index for index, count in enumerate(remaining) if count == 0])
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            ready: List[int] = []
+            for future in done:
+                indices = running.pop(future)
+                try:
+                    produced.update(future.result())
+                except Exception as e:
+                    errors.update((index, e) for index in indices)
+                    continue
+                for index in indices:
+                    for dependent in dependents[index]:
+                        remaining[dependent] -= 1
+                        if remaining[dependent] == 0:
+                            ready.append(dependent)
+            submit(sorted(ready))
+
+    return _merge_results(function_calls, produced, errors, outputs)
+
+def run_serial_batched(
+        function_calls: List[FunctionCall],
+        call: Callable[[FunctionCall, Dict[str, Any]], Any],
+        map_outputs: Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]],
+        outputs: Dict[str, Any],
+        is_batchable: Callable[[FunctionCall], bool],
+        call_batch: Callable[[List[FunctionCall], List[Dict[str, Any]]], List[Any]]
+    ) -> Dict[str, Any]:
+    """
+    Run the function calls in order, coalescing batchable calls to the same function.
+
+    When a batchable call is reached, the later calls to the same function
+    that do not depend on any call from there on run in the same batch. Their
+    outputs are stored when the plan reaches them, so the outputs are the
+    same as when running every call on its own, in order.
+
+    Args:
+    - function_calls (List[FunctionCall]):
+        The function calls to run.
+    - call (callable):
+        Calls a function with the resolved kwargs and returns its output.
+    - map_outputs (callable):
+        Maps the previous outputs to the kwargs of a function call.
+    - outputs (dict):
+        The outputs of the previous function calls, updated in place.
+    - is_batchable (callable):
+        Whether a function call should go through the batch variant of its function.
+    - call_batch (callable):
+        Calls the batch variant of a function with the function calls and
+        their resolved kwargs, and returns their outputs in order.
+    """
+    dependencies = build_dependency_graph(function_calls)
+    pending: Dict[int, Any] = {}
+    for index, function_call in enumerate(function_calls):
+        if index in pending:
+            store_returns(outputs, function_call, pending.pop(index))
+            continue
+        if not is_batchable(function_call):
+            store_returns(outputs, function_call, call(function_call, map_outputs(outputs, function_call.kwargs)))
+            continue
+
+        batch = [index] + [
+            later for later in range(index + 1, len(function_calls))
+            if function_calls[later].name == function_call.name
+            and later not in pending
+            and all(dependency < index for dependency in dependencies[later])
+        ]
+        batch_outputs = call_batch(
+            [function_calls[i] for i in batch],
+            [map_outputs(outputs, function_calls[i].kwargs) for i in batch]
+        )
+        store_returns(outputs, function_call, batch_outputs[0])
+        pending.update(zip(batch[1:], batch_outputs[1:]))
+
+    return outputs
+
+async def run_async(
+        function_calls: List[FunctionCall],
+        call: Callable[[FunctionCall, Dict[str, Any]], Awaitable[Any]],
+        map_outputs: Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]],
+        outputs: Dict[str, Any],
+        is_batchable: Optional[Callable[[FunctionCall], bool]] = None,
+        call_batch: Optional[Callable[[List[FunctionCall], List[Dict[str, Any]]], Awaitable[List[Any]]]] = None
+    ) -> Dict[str, Any]:
+    """
+    Run the function calls as asyncio tasks, following their dependency graph.
+
+    The asyncio counterpart of `run_parallel`: every call is a task that
+    awaits the calls it depends on, so independent calls are gathered and
+    the results are identical to running the calls in order. Batchable calls
+    to the same function that become ready in the same iteration of the
+    event loop are coalesced into one call of its batch variant.
+
+    Args:
+    - function_calls (List[FunctionCall]):
+        The function calls to run.
+    - call (callable):
+        Awaits a function with the resolved kwargs and returns its output.
+    - map_outputs (callable):
+        Maps the previous outputs to the kwargs of a function call.
+    - outputs (dict):
+        The outputs of the previous function calls, updated in place.
+    - is_batchable (callable, optional):
+        Whether a function call should go through the batch variant of its function.
+    - call_batch (callable, optional):
+        Awaits the batch variant of a function with the function calls and
+        their resolved kwargs, and returns their outputs in order.
+    """
+    import asyncio
+
+    dependencies = build_dependency_graph(function_calls)
+    tasks: List[asyncio.Task] = []
+    batches: Dict[str, List[tuple]] = {}
+
+    async def call_in_batch(index: int, function_input: Dict[str, Any]) -> Any:
+        name = function_calls[index].name
+        future = asyncio.get_running_loop().create_future()
+        batch = batches.setdefault(name, [])
+        batch.append((index, function_input, future))
+        if len(batch) == 1:
+            # The calls that reach this point before the event loop comes back here join the batch
+            await asyncio.sleep(0)
+            del batches[name]
+            try:
+                batch_outputs = await call_batch(
+                    [function_calls[batched] for batched, _, _ in batch],
+                    [batched_input for _, batched_input, _ in batch]
+                )
+            except Exception as e:
+                for _, _, batched_future in batch:
+                    batched_future.set_exception(e)
+            else:
+                for (_, _, batched_future), output in zip(batch, batch_outputs):
+                    batched_future.set_result(output)
+        return await future
+
+    async def run(index: int) -> Dict[str, Any]:
+        function_call = function_calls[index]
+        upstream = await asyncio.gather(*(tasks[d] for d in sorted(dependencies[index])), return_exceptions=True)
+        upstream_outputs: Dict[str, Any] = {}
+        for result in upstream:
+            if isinstance(result, BaseException):
+                raise _UpstreamFailed()
+            upstream_outputs.update(result)
+        function_input = map_outputs(ChainMap(upstream_outputs, outputs), copy_kwargs(function_call.kwargs))
+        result: Dict[str, Any] = {}
+        if is_batchable is not None and is_batchable(function_call):
+            store_returns(result, function_call, await call_in_batch(index, function_input))
+        else:
+            store_returns(result, function_call, await call(function_call, function_input))
+        return result
+
+    for index in range(len(function_calls)):
+        tasks.append(asyncio.ensure_future(run(index)))
+
+    produced: Dict[int, Dict[str, Any]] = {}
+    errors: Dict[int, Exception] = {}
+    for index, result in enumerate(await asyncio.gather(*tasks, return_exceptions=True)):
+        if isinstance(result, _UpstreamFailed):
+            continue
+        elif isinstance(result, BaseException):
+            errors[index] = result
+        else:
+            produced[index] = result
+
+    return _merge_results(function_calls, produced, errors, outputs)
+
+def run_with_deadline(
+        function_calls: List[FunctionCall],
+        call: Callable[[FunctionCall, Dict[str, Any], Optional[float]], Any],
+        map_outputs: Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]],
+        outputs: Dict[str, Any],
+        deadline: Optional[float] = None,
+        get_timeout: Callable[[FunctionCall], Optional[float]] = lambda function_call: None,
+        parallel: bool = False,
+        max_workers: Optional[int] = None
+    ) -> PlanResult:
+    """
+    Run the function calls within a deadline and per-call timeouts.
+
+    Every call runs in its own thread, so a call that exceeds its time limit
+    is abandoned rather than waited for: its output is discarded and the
+    calls that depend on it are not run. Calls that have not started when the
+    deadline passes are not run either. Otherwise the calls run as in
+    `run_parallel`, or one at a time in plan order if `parallel` is False.
+    Errors are reported in the result instead of being raised.
+
+    Args:
+    - function_calls (List[FunctionCall]):
+        The function calls to run.
+    - call (callable):
+        Calls a function with the resolved kwargs and the seconds left
+        before its time limit (None if it has none), and returns its output.
+    - map_outputs (callable):
+        Maps the previous outputs to the kwargs of a function call.
+    - outputs (dict):
+        The outputs of the previous function calls, updated in place.
+    - deadline (float, optional):
+        The `time.monotonic()` time by which the plan must be done.
+    - get_timeout (callable):
+        Returns the timeout of a function call in seconds, or None.
+    - parallel (bool):
+        Whether to run independent calls concurrently.
+    - max_workers (int, optional):
+        The maximum number of calls running concurrently when parallel.
+    """
+    dependencies = build_dependency_graph(function_calls)
+    dependents: List[List[int]] = [[] for _ in function_calls]
+    for index, upstream in enumerate(dependencies):
+        for dependency in upstream:
+            dependents[dependency].append(index)
+
+    concurrency = (max_workers or min(32, (os.cpu_count() or 1) + 4)) if parallel else 1
+    produced: Dict[int, Dict[str, Any]] = {}
+    errors: Dict[int, Exception] = {}
+    timed_out: List[int] = []
+    remaining = [len(upstream) for upstream in dependencies]
+    ready = [index for index, count in enumerate(remaining) if count == 0]
+    running: Dict[Future, tuple] = {}
+
+    def run(index: int, time_limit: Optional[float]) -> Dict[str, Any]:
+        function_call = function_calls[index]
+        upstream_outputs: Dict[str, Any] = {}
+        for dependency in sorted(dependencies[index]):
+            upstream_outputs.update(produced[dependency])
+        function_input = map_outputs(ChainMap(upstream_outputs, outputs), copy_kwargs(function_call.kwargs))
+        result: Dict[str, Any] = {}
+        store_returns(result, function_call, call(function_call, function_input, time_limit))
+        return result
+
+    while True:
+        now = time.monotonic()
+        while ready and len(running) < concurrency and (deadline is None or now < deadline):
+            index = heapq.heappop(ready)
+            timeout = get_timeout(function_calls[index])
+            expiry = deadline if timeout is None else now + timeout if deadline is None else min(deadline, now + timeout)
+            running[_start_thread(run, index, None if expiry is None else expiry - now)] = (index, expiry)
+        if not running:
+            break
+
+        expiries = [expiry for _, expiry in running.values() if expiry is not None]
+        done, _ = wait(running, timeout=max(min(expiries) - now, 0) if expiries else None, return_when=FIRST_COMPLETED)
+        for future in done:
+            index, _ = running.pop(future)
+            try:
+                produced[index] = future.result()
+            except Exception as e:
+                errors[index] = e
+                continue
+            for dependent in dependents[index]:
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    heapq.heappush(ready, dependent)
+
+        now = time.monotonic()
+        for future, (index, expiry) in list(running.items()):
+            if expiry is not None and now >= expiry:
+                del running[future]
+                timed_out.append(index)
+                logger.warning(f"Function {function_calls[index].name} timed out")
+
+    for index in range(len(function_calls)):
+        if index in produced:
+            outputs.update(produced[index])
+    finished = set(produced) | set(errors) | set(timed_out)
+    return PlanResult(
+        outputs=outputs,
+        completed=sorted(produced),
+        timed_out=sorted(timed_out),
+        failed=dict(sorted(errors.items())),
+        not_run=[index for index in range(len(function_calls)) if index not in finished]
+    )
+
+def _start_thread(function: Callable[..., Any], *args: Any) -> Future:
+    """
+    Run a function in a new daemon thread and return the future of its result.
+
+    Unlike a pool thread, a thread that is abandoned after a timeout does not
+    hold up later calls or the exit of the interpreter.
+    """
+    future: Future = Future()
+
+    def target() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(function(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=target, daemon=True).start()
+    return future
+
+class _UpstreamFailed(Exception):
+    """Raised by a function call whose upstream function call failed."""
+
+def _merge_results(
+        function_calls: List[FunctionCall],
+        produced: Dict[int, Dict[str, Any]],
+        errors: Dict[int, Exception],
+        outputs: Dict[str, Any]
+    ) -> Dict[str, Any]:
+    """
+    Write the produced outputs in plan order and raise the first error, if any.
+    """
+    for index, function_call in enumerate(function_calls):
+        if index in produced:
+            outputs.update(produced[index])
+        elif index not in errors:
+            logger.warning(f"Skipped function {function_call.name}: an upstream function call failed")
+
+    if errors:
+        raise errors[min(errors)]
+    return outputs
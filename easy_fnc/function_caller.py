@@ -1,92 +1,595 @@
+from __future__ import annotations
+
+import contextlib
 import inspect
-from typing import Dict, List, Callable, Any
+import functools
+import time
+from typing import TYPE_CHECKING, ContextManager, Dict, List, Iterable, Callable, Any, MutableMapping, Optional, Set
 import logging
 
-from easy_fnc.functions import get_user_defined_functions
-from easy_fnc.core_utils import get_core_utils
-from easy_fnc.schemas import FunctionCall, ModelResponse, FunctionMetadata, FunctionReturn
+from easy_fnc.registry import FunctionRegistry, core_utils_registry
+from easy_fnc.discovery import describe_function, load_function_descriptions
 from easy_fnc.utils import extract_thoughts_and_function_calls
+from easy_fnc.executor import ExecutionContext, PlanResult, REMAINING_TIME_PARAMETER, run_parallel, run_serial_batched, run_async, run_with_deadline, store_returns
+from easy_fnc.caching import CachePolicy, ResultCache, get_cache_policy, make_cache_key
+from easy_fnc.output_store import OutputStore
+from easy_fnc.validation import ArgumentValidator, validate_function_calls
+from easy_fnc.instrumentation import Instrumentation, get_instrumentation
+from easy_fnc.process_pool import ProcessPoolBackend, check_picklable, is_cpu_bound
+from easy_fnc.batching import BatchPolicy, Coalescer, call_in_batches
+from easy_fnc.plans import CompiledPlan, PlanCache, compile_plan, hash_response
+
+# The schemas import pydantic, which is only loaded once a response is parsed
+if TYPE_CHECKING:
+    from easy_fnc.schemas import FunctionCall, ModelResponse, FunctionMetadata
+    from easy_fnc.streaming import StreamingResponseParser
 
 # Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 class FunctionCallingEngine:
     """
     Function calling engine for EasyFNC.
+
+    The functions are copied from a `FunctionRegistry`, the core utilities
+    by default. Function calls store their outputs in `outputs`, or in the
+    `ExecutionContext` they are given: with one context per request, a
+    single engine can serve concurrent requests. `outputs` is an
+    `OutputStore`, a dict bounded to `DEFAULT_MAX_BYTES` unless another
+    store is given.
     """
     def __init__(
             self,
             extraction_function: Callable = extract_thoughts_and_function_calls,
-            auto_load_core_utils: bool = True
+            auto_load_core_utils: bool = True,
+            max_workers: Optional[int] = None,
+            result_cache: Optional[ResultCache] = None,
+            output_store: Optional[OutputStore] = None,
+            validate_calls: bool = False,
+            instrumentation: Optional[Instrumentation] = None,
+            process_pool: Optional[ProcessPoolBackend] = None,
+            call_timeout: Optional[float] = None,
+            plan_cache: Optional[PlanCache] = None,
+            registry: Optional[FunctionRegistry] = None
         ):
-        self.functions: Dict[str, Callable] = {**get_core_utils()} if auto_load_core_utils else {}
-        self.outputs: Dict[str, Any] = {}
+        if registry is None:
+            registry = core_utils_registry() if auto_load_core_utils else FunctionRegistry()
+        self.registry: FunctionRegistry = registry
+        self.functions: Dict[str, Callable] = registry.copy()
+        self.outputs: Dict[str, Any] = output_store if output_store is not None else OutputStore()
         self.extraction_function: Callable = extraction_function
+        self.max_workers: Optional[int] = max_workers
+        self.result_cache: ResultCache = result_cache if result_cache is not None else ResultCache()
+        self.cache_policies: Dict[str, CachePolicy] = {}
+        self.validate_calls: bool = validate_calls
+        self._validators: Dict[str, tuple] = {}
+        self._instrumentation: Optional[Instrumentation] = instrumentation
+        self.process_pool: ProcessPoolBackend = process_pool if process_pool is not None else ProcessPoolBackend()
+        self.process_functions: Set[str] = set()
+        self.call_timeout: Optional[float] = call_timeout
+        self.call_timeouts: Dict[str, float] = {}
+        self.batch_policies: Dict[str, BatchPolicy] = {}
+        self._coalescers: Dict[str, Coalescer] = {}
+        self.plan_cache: PlanCache = plan_cache if plan_cache is not None else PlanCache()
         logger.info("FunctionCallingEngine initialized")
 
+    @property
+    def instrumentation(self) -> Instrumentation:
+        """
+        The instrumentation of the engine, the process-wide one unless given.
+        """
+        return self._instrumentation if self._instrumentation is not None else get_instrumentation()
+
     def add_user_functions(self, file_path: str) -> None:
         """
         Add user-defined functions from the specified file path.
         """
         try:
-            user_functions = get_user_defined_functions(file_path)
-            self.functions.update(user_functions)
+            self.functions.update(FunctionRegistry().with_user_functions(file_path))
             logger.info(f"Added user functions from {file_path}")
         except Exception as e:
             logger.error(f"Error adding user functions: {str(e)}")
             raise
 
+    def create_context(self, outputs: Optional[Dict[str, Any]] = None) -> ExecutionContext:
+        """
+        Create the execution context of a request, to pass to the `call_functions` methods.
+
+        The outputs of the request are kept in the context instead of the
+        engine, in a plain dict unless a dict or an OutputStore is given.
+        """
+        return ExecutionContext(outputs)
+
+    def _get_outputs(self, context: Optional[ExecutionContext]) -> MutableMapping:
+        """Return the outputs of a context, or those of the engine without one."""
+        return self.outputs if context is None else context.outputs
+
+    def mark_cacheable(self, function_name: str, ttl: Optional[float] = None) -> None:
+        """
+        Mark a registered function as pure, so that its results are cached.
+
+        Results are keyed on the canonicalized kwargs and expire after `ttl`
+        seconds, or never if `ttl` is None. Functions can also be marked with
+        the `easy_fnc.caching.cacheable` decorator.
+        """
+        if function_name not in self.functions:
+            raise ValueError(f"Function '{function_name}' not found")
+        self.cache_policies[function_name] = CachePolicy(ttl)
+
+    def mark_cpu_bound(self, function_name: str) -> None:
+        """
+        Run a registered function in the engine's process pool instead of the calling thread.
+
+        The function must be picklable, i.e. defined at the top level of a
+        module, which is checked here. Functions can also be marked with the
+        `easy_fnc.process_pool.cpu_bound` decorator.
+        """
+        if function_name not in self.functions:
+            raise ValueError(f"Function '{function_name}' not found")
+        check_picklable(function_name, self.functions[function_name])
+        self.process_functions.add(function_name)
+
+    def register_batch_function(
+            self,
+            function_name: str,
+            batch_function: Callable[[List[Dict[str, Any]]], List[Any]],
+            max_batch_size: Optional[int] = None,
+            window: float = 0.0
+        ) -> None:
+        """
+        Register the batch variant of a registered function.
+
+        Calls to the function in a plan that can run together are coalesced
+        into calls of `batch_function`, which takes a list of kwargs dicts
+        and returns their outputs in the same order. The outputs are stored
+        under the `returns` of each call, as if it had run on its own.
+
+        Args:
+        - function_name (str):
+            The name of the registered function.
+        - batch_function (callable):
+            The batch variant of the function.
+        - max_batch_size (int, optional):
+            The maximum number of calls per invocation of `batch_function`.
+        - window (float):
+            How long to wait, in seconds, for calls from concurrent plans to
+            join a batch; 0 only coalesces the calls within a plan.
+        """
+        if function_name not in self.functions:
+            raise ValueError(f"Function '{function_name}' not found")
+        policy = BatchPolicy(batch_function, max_batch_size, window)
+        self.batch_policies[function_name] = policy
+        self._coalescers[function_name] = Coalescer(function_name, policy)
+
+    def set_call_timeout(self, function_name: str, timeout: Optional[float]) -> None:
+        """
+        Set the timeout of calls to a registered function in `call_functions_with_deadline`.
+
+        Overrides the `call_timeout` default of the engine; None removes the override.
+        """
+        if function_name not in self.functions:
+            raise ValueError(f"Function '{function_name}' not found")
+        if timeout is None:
+            self.call_timeouts.pop(function_name, None)
+        else:
+            self.call_timeouts[function_name] = timeout
+
+    @property
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        The hit, miss and eviction counters of every cached function.
+        """
+        return {name: stats.as_dict() for name, stats in self.result_cache.stats.items()}
+
     def parse_model_response(self, raw_response: str) -> ModelResponse:
         """
         Parse the model response and return the ModelResponse object.
         """
+        from easy_fnc.schemas import ModelResponse
+
         try:
-            return ModelResponse.from_raw_response(raw_response, self.extraction_function)
+            with self.instrumentation.span("parse"):
+                return ModelResponse.from_raw_response(raw_response, self.extraction_function)
         except Exception as e:
             logger.error(f"Error parsing model response: {str(e)}")
             raise
     
-    def call_functions(self, function_calls: List[FunctionCall]) -> Dict[str, Any]:
+    def compile_plan(self, raw_response: str) -> CompiledPlan:
+        """
+        Parse the model response into a compiled plan, ready to run with `run_plan`.
+
+        The reference slots of the kwargs are found and the functions are
+        bound once per plan. Plans are cached by the hash of the response, so
+        a byte-identical response skips parsing altogether.
+        """
+        key = hash_response(raw_response)
+        plan = self.plan_cache.get(key)
+        if plan is None:
+            plan = compile_plan(self.parse_model_response(raw_response), self.functions)
+            self.plan_cache.put(key, plan)
+        return plan
+
+    def run_plan(
+            self,
+            plan: CompiledPlan,
+            parallel: bool = False,
+            validate: Optional[bool] = None,
+            context: Optional[ExecutionContext] = None
+        ) -> Dict[str, Any]:
+        """
+        Call the functions of a compiled plan, with the same outputs as `call_functions`.
+
+        The plan is not modified, so it can run any number of times. Parallel
+        runs reuse the dependency graph of the plan; validated and batched
+        runs go through `call_functions` with fresh copies of the function calls.
+        """
+        if (self.validate_calls if validate is None else validate) or self.batch_policies:
+            return self.call_functions(plan.function_calls, parallel=parallel, validate=validate, context=context)
+
+        outputs = self._get_outputs(context)
+        with _pinned(outputs):
+            if parallel:
+                return run_parallel(
+                    plan.function_calls, self._call_function, map_previous_outputs, outputs, self.max_workers,
+                    dependencies=plan.dependencies
+                )
+            for call in plan.calls:
+                function_call = call.function_call
+                # A function registered under the same name since compiling replaces the bound one
+                function = call.function if self.functions.get(function_call.name) is call.function else None
+                output = self._call_function(function_call, call.resolve(outputs), function)
+                store_returns(outputs, function_call, output)
+        return outputs
+
+    def validate_function_calls(self, function_calls: List[FunctionCall], context: Optional[ExecutionContext] = None) -> None:
+        """
+        Validate the kwargs of every function call against the signature of its function.
+
+        All calls are checked in one pass and simple types are coerced in
+        place (e.g. "5" to 5 for an `int` parameter). If any call is invalid,
+        a FunctionCallValidationError listing every error is raised, before
+        any function has run.
+        """
+        validate_function_calls(function_calls, self._get_validator, self._get_outputs(context).__contains__)
+
+    def _get_validator(self, function_name: str) -> Optional[ArgumentValidator]:
+        """
+        Return the argument validator of a function, compiling it on first use.
+        """
+        function = self.functions.get(function_name)
+        if function is None:
+            return None
+        cached = self._validators.get(function_name)
+        if cached is None or cached[0] is not function:
+            cached = self._validators[function_name] = (function, ArgumentValidator(function))
+        return cached[1]
+
+    def call_functions(
+            self,
+            function_calls: List[FunctionCall],
+            parallel: bool = False,
+            validate: Optional[bool] = None,
+            context: Optional[ExecutionContext] = None
+        ) -> Dict[str, Any]:
         """
         Call the functions from the given input.
+
+        Args:
+        - function_calls (List[FunctionCall]):
+            The function calls to make, in the order given by the model.
+        - parallel (bool):
+            Whether to run the function calls that do not depend on each other
+            concurrently, on a thread pool of at most `max_workers` threads.
+            The outputs are the same as when running them in order.
+        - validate (bool, optional):
+            Whether to validate every function call before running any of
+            them, defaults to the `validate_calls` setting of the engine.
+        - context (ExecutionContext, optional):
+            The context of the request, which holds the outputs instead of the engine.
+        """
+        outputs = self._get_outputs(context)
+        if self.validate_calls if validate is None else validate:
+            self.validate_function_calls(function_calls, context)
+
+        with _pinned(outputs):
+            return self._run_function_calls(function_calls, parallel, outputs)
+
+    def _run_function_calls(self, function_calls: List[FunctionCall], parallel: bool, outputs: MutableMapping) -> Dict[str, Any]:
         """
-        def map_previous_outputs(outputs_dict: Dict[str, Any], inputs_dict: Dict[str, Any]) -> Dict[str, Any]:
-            """Map the previous outputs to the input."""
-            for key, value in inputs_dict.items():
-                if isinstance(value, str) and value in outputs_dict:
-                    inputs_dict[key] = outputs_dict[value]
-                elif isinstance(value, dict):
-                    inputs_dict[key] = map_previous_outputs(outputs_dict, value)
-            return inputs_dict
-        
+        Call the functions in order, in parallel or in batches, storing their outputs in `outputs`.
+        """
+        batched = bool(self.batch_policies) and any(map(self._is_batchable, function_calls))
+        if parallel:
+            if batched:
+                return run_parallel(
+                    function_calls, self._call_function, map_previous_outputs, outputs, self.max_workers,
+                    is_batchable=self._is_batchable, call_batch=self._call_batch
+                )
+            return run_parallel(function_calls, self._call_function, map_previous_outputs, outputs, self.max_workers)
+
+        if batched:
+            return run_serial_batched(
+                function_calls, self._call_function, map_previous_outputs, outputs,
+                is_batchable=self._is_batchable, call_batch=self._call_batch
+            )
+
         for function_call in function_calls:
-            function_name = function_call.name
-            function_input = function_call.kwargs
-
-            try:
-                function_input = map_previous_outputs(self.outputs, function_input)
-                
-                if function_name not in self.functions:
-                    raise ValueError(f"Function '{function_name}' not found")
-
-                function = self.functions[function_name]
-                output = function(**function_input)
-
-                if function_call.returns:
-                    if len(function_call.returns) == 1:
-                        self.outputs[function_call.returns[0]] = output
-                    else:
-                        for i, return_value in enumerate(function_call.returns):
-                            self.outputs[return_value] = output[i]
-                
-                logger.info(f"Successfully called function: {function_name}")
-            except Exception as e:
-                logger.error(f"Error calling function {function_name}: {str(e)}")
-                raise
-
-        return self.outputs
-    
+            function_input = map_previous_outputs(outputs, function_call.kwargs)
+            output = self._call_function(function_call, function_input)
+            store_returns(outputs, function_call, output)
+
+        return outputs
+
+    def call_functions_with_deadline(
+            self,
+            function_calls: List[FunctionCall],
+            timeout: Optional[float] = None,
+            deadline: Optional[float] = None,
+            parallel: bool = False,
+            validate: Optional[bool] = None,
+            context: Optional[ExecutionContext] = None
+        ) -> PlanResult:
+        """
+        Call the functions from the given input within a time budget.
+
+        Every call is limited by the plan's deadline and by its function's
+        timeout (see `set_call_timeout`). A call that runs out of time is
+        abandoned and the calls depending on it are skipped, as are all calls
+        that have not started when the deadline passes. Functions with a
+        `remaining_time` parameter are passed the seconds left to them, so
+        they can degrade instead of timing out.
+
+        Args:
+        - function_calls (List[FunctionCall]):
+            The function calls to make, in the order given by the model.
+        - timeout (float, optional):
+            The time budget of the whole plan, in seconds.
+        - deadline (float, optional):
+            The `time.monotonic()` time by which the plan must be done, e.g.
+            propagated from the request; the earlier of the two limits applies.
+        - parallel (bool):
+            Whether to run the function calls that do not depend on each other concurrently.
+        - validate (bool, optional):
+            Whether to validate every function call before running any of
+            them, defaults to the `validate_calls` setting of the engine.
+        - context (ExecutionContext, optional):
+            The context of the request, which holds the outputs instead of the engine.
+
+        Returns a PlanResult with the outputs and the indices of the calls
+        that completed, timed out, failed or did not run.
+        """
+        if self.validate_calls if validate is None else validate:
+            self.validate_function_calls(function_calls, context)
+
+        if timeout is not None:
+            deadline = time.monotonic() + timeout if deadline is None else min(deadline, time.monotonic() + timeout)
+        outputs = self._get_outputs(context)
+        with _pinned(outputs):
+            return run_with_deadline(
+                function_calls,
+                self._call_function_within,
+                map_previous_outputs,
+                outputs,
+                deadline=deadline,
+                get_timeout=self._get_call_timeout,
+                parallel=parallel,
+                max_workers=self.max_workers
+            )
+
+    def _get_call_timeout(self, function_call: FunctionCall) -> Optional[float]:
+        """
+        Return the timeout of a function call, in seconds.
+        """
+        return self.call_timeouts.get(function_call.name, self.call_timeout)
+
+    def _call_function_within(self, function_call: FunctionCall, function_input: Dict[str, Any], remaining_time: Optional[float]) -> Any:
+        """
+        Call a single function, passing it the time it has left if it accepts it.
+        """
+        if remaining_time is not None and _accepts_remaining_time(self.functions.get(function_call.name)):
+            function_input = {**function_input, REMAINING_TIME_PARAMETER: remaining_time}
+        return self._call_function(function_call, function_input)
+
+    def call_functions_stream(
+            self,
+            chunks: Iterable[str],
+            parser: Optional[StreamingResponseParser] = None,
+            context: Optional[ExecutionContext] = None
+        ) -> Dict[str, Any]:
+        """
+        Call the functions from a streamed model response as they are decoded.
+
+        Each function call is executed as soon as its JSON object is complete,
+        while the model is still generating the rest of the response.
+
+        Args:
+        - chunks (Iterable[str]):
+            The chunks of the response, e.g. from `generate_stream`.
+        - parser (StreamingResponseParser, optional):
+            The parser to use, pass one to access the thoughts afterwards.
+        - context (ExecutionContext, optional):
+            The context of the request, which holds the outputs instead of the engine.
+        """
+        from easy_fnc.streaming import StreamingResponseParser
+
+        parser = parser if parser is not None else StreamingResponseParser()
+        outputs = self._get_outputs(context)
+        with _pinned(outputs):
+            for chunk in chunks:
+                for function_call in parser.feed(chunk):
+                    function_input = map_previous_outputs(outputs, function_call.kwargs)
+                    output = self._call_function(function_call, function_input)
+                    store_returns(outputs, function_call, output)
+
+        return outputs
+
+    def _call_function(self, function_call: FunctionCall, function_input: Dict[str, Any], function: Optional[Callable] = None) -> Any:
+        """
+        Call a single function with its already mapped input, looking the function up unless it is given.
+        """
+        function_name = function_call.name
+        try:
+            with self.instrumentation.span("function_call", function_name):
+                function, policy, cache_key = self._prepare_call(function_name, function_input, function)
+                if cache_key is not None:
+                    hit, output = self.result_cache.get(function_name, cache_key)
+                    if hit:
+                        return output
+
+                if function_name in self.process_functions or is_cpu_bound(function):
+                    output = self.process_pool.call(function, function_input)
+                else:
+                    output = function(**function_input)
+
+                if cache_key is not None:
+                    self.result_cache.put(function_name, cache_key, output, policy.ttl)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Successfully called function: %s", function_name)
+            return output
+        except Exception as e:
+            logger.error(f"Error calling function {function_name}: {str(e)}")
+            raise
+
+    def _is_batchable(self, function_call: FunctionCall) -> bool:
+        """
+        Whether a function call goes through the batch variant of its function.
+        """
+        return function_call.name in self.batch_policies
+
+    def _call_batch(self, function_calls: List[FunctionCall], function_inputs: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Call the batch variant of a function with the already mapped inputs of several calls to it.
+        """
+        function_name = function_calls[0].name
+        try:
+            policy = self.batch_policies[function_name]
+            with self.instrumentation.span("function_call_batch", function_name):
+                if policy.window > 0:
+                    outputs = self._coalescers[function_name].submit(function_inputs)
+                else:
+                    outputs = call_in_batches(function_name, policy.batch_function, function_inputs, policy.max_batch_size)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Successfully called function %s in a batch of %d", function_name, len(function_inputs))
+            return outputs
+        except Exception as e:
+            logger.error(f"Error calling function {function_name} in a batch: {str(e)}")
+            raise
+
+    def _prepare_call(self, function_name: str, function_input: Dict[str, Any], function: Optional[Callable] = None) -> tuple:
+        """
+        Look up a function, its caching policy and the cache key of the call.
+        """
+        if function is None:
+            if function_name not in self.functions:
+                raise ValueError(f"Function '{function_name}' not found")
+            function = self.functions[function_name]
+        policy = self.cache_policies.get(function_name) or get_cache_policy(function)
+        cache_key = make_cache_key(function_name, function_input) if policy is not None else None
+        return function, policy, cache_key
+
+    async def acall_functions(
+            self,
+            function_calls: List[FunctionCall],
+            validate: Optional[bool] = None,
+            context: Optional[ExecutionContext] = None
+        ) -> Dict[str, Any]:
+        """
+        Call the functions from the given input without blocking the event loop.
+
+        Coroutine functions are awaited, plain functions are run in the event
+        loop's default executor. Function calls that do not depend on each
+        other are gathered; the outputs are the same as with `call_functions`.
+        Calls to functions with a batch variant that become ready together go
+        through it as one batch, run in the default executor, and with a
+        coalescing window they share their batches with concurrent plans.
+        """
+        if self.validate_calls if validate is None else validate:
+            self.validate_function_calls(function_calls, context)
+
+        outputs = self._get_outputs(context)
+        with _pinned(outputs):
+            if self.batch_policies and any(map(self._is_batchable, function_calls)):
+                return await run_async(
+                    function_calls, self._acall_function, map_previous_outputs, outputs,
+                    is_batchable=self._is_batchable, call_batch=self._acall_batch
+                )
+            return await run_async(function_calls, self._acall_function, map_previous_outputs, outputs)
+
+    async def _acall_batch(self, function_calls: List[FunctionCall], function_inputs: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Call the batch variant of a function in the event loop's default executor.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._call_batch, function_calls, function_inputs)
+
+    async def _acall_function(self, function_call: FunctionCall, function_input: Dict[str, Any]) -> Any:
+        """
+        Await a single function with its already mapped input.
+        """
+        import asyncio
+
+        function_name = function_call.name
+        try:
+            with self.instrumentation.span("function_call", function_name):
+                function, policy, cache_key = self._prepare_call(function_name, function_input)
+                if cache_key is not None:
+                    hit, output = self.result_cache.get(function_name, cache_key)
+                    if hit:
+                        return output
+
+                if function_name in self.process_functions or is_cpu_bound(function):
+                    output = self.process_pool.receive(await asyncio.wrap_future(self.process_pool.submit(function, function_input)))
+                elif inspect.iscoroutinefunction(function):
+                    output = await function(**function_input)
+                else:
+                    loop = asyncio.get_running_loop()
+                    output = await loop.run_in_executor(None, functools.partial(function, **function_input))
+
+                if cache_key is not None:
+                    self.result_cache.put(function_name, cache_key, output, policy.ttl)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Successfully called function: %s", function_name)
+            return output
+        except Exception as e:
+            logger.error(f"Error calling function {function_name}: {str(e)}")
+            raise
+
+def _pinned(outputs: MutableMapping) -> ContextManager:
+    """Keep the outputs a plan stores from being evicted until it finishes, if they are in an OutputStore."""
+    return outputs.pin() if isinstance(outputs, OutputStore) else contextlib.nullcontext()
+
+@functools.lru_cache(maxsize=1024)
+def _accepts_remaining_time(function: Optional[Callable]) -> bool:
+    """Whether a function has a `remaining_time` parameter."""
+    try:
+        return function is not None and REMAINING_TIME_PARAMETER in inspect.signature(function).parameters
+    except (TypeError, ValueError):
+        return False
+
+def map_previous_outputs(outputs_dict: Dict[str, Any], inputs_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Map the previous outputs to the input."""
+    for key, value in inputs_dict.items():
+        if isinstance(value, str) and value in outputs_dict:
+            inputs_dict[key] = outputs_dict[value]
+        elif isinstance(value, dict):
+            inputs_dict[key] = map_previous_outputs(outputs_dict, value)
+        elif isinstance(value, list):
+            inputs_dict[key] = _map_previous_outputs_in_list(outputs_dict, value)
+    return inputs_dict
+
+def _map_previous_outputs_in_list(outputs_dict: Dict[str, Any], inputs_list: List[Any]) -> List[Any]:
+    """Map the previous outputs to the items of a list in the input."""
+    for index, value in enumerate(inputs_list):
+        if isinstance(value, str) and value in outputs_dict:
+            inputs_list[index] = outputs_dict[value]
+        elif isinstance(value, dict):
+            inputs_list[index] = map_previous_outputs(outputs_dict, value)
+        elif isinstance(value, list):
+            inputs_list[index] = _map_previous_outputs_in_list(outputs_dict, value)
+    return inputs_list
+
 def create_functions_metadata(
         functions: Dict[str, Callable] = None,
         file_path: str = None
@@ -98,32 +601,36 @@ def create_functions_metadata(
         raise ValueError("Either functions or file_path must be specified")
     
     if functions is None:
-        functions = get_user_defined_functions(file_path)
+        return _create_metadata_from_descriptions(load_function_descriptions(file_path))
 
     return _create_functions_metadata(functions)
 
 def _create_functions_metadata(functions: Dict[str, Callable]) -> List[FunctionMetadata]:
     """Creates the functions metadata for the prompt."""
-    functions_metadata = []
+    descriptions = []
     for name, function in functions.items():
         try:
-            annotations = function.__annotations__
-            parameters = {
-                param: annotations.get(param, Any).__name__
-                for param in inspect.signature(function).parameters
-                if param != 'return'
-            }
-            returns = [FunctionReturn(name=f"{name}_output", type=annotations.get('return', Any).__name__)]
-            
-            metadata = FunctionMetadata(
-                name=name,
-                description=function.__doc__ or "No description provided",
-                parameters={"properties": parameters, "required": list(parameters.keys())},
-                returns=returns
-            )
-            functions_metadata.append(metadata)
+            descriptions.append(describe_function(name, function))
         except Exception as e:
             logger.error(f"Error creating metadata for function {name}: {str(e)}")
             raise
 
-    return functions_metadata
\ No newline at end of file
+    return _create_metadata_from_descriptions(descriptions)
+
+def _create_metadata_from_descriptions(descriptions: List[Dict[str, Any]]) -> List[FunctionMetadata]:
+    """Creates the functions metadata from the function descriptions."""
+    from easy_fnc.schemas import FunctionMetadata, FunctionReturn
+
+    functions_metadata = []
+    for description in descriptions:
+        name = description["name"]
+        parameters = description["parameters"]
+        metadata = FunctionMetadata(
+            name=name,
+            description=description["description"] or "No description provided",
+            parameters={"properties": parameters, "required": list(parameters.keys())},
+            returns=[FunctionReturn(name=f"{name}_output", type=description["returns"])]
+        )
+        functions_metadata.append(metadata)
+
+    return functions_metadata
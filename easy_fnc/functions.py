@@ -1,29 +1,10 @@
 import random
-import importlib
-import ast
+
+from easy_fnc.discovery import discover_functions
 
 def get_user_defined_functions(filename: str) -> dict[str, callable]:
     """Retrieves the user defined functions from a file"""
-    # Parse the file
-    try:
-        with open(filename, 'r') as file:
-            tree = ast.parse(file.read())
-    except FileNotFoundError:
-        raise FileNotFoundError(f"File {filename} not found")
-
-    # Get the user defined functions
-    functions: dict[str, callable] = {}
-    for node in ast.walk(tree):
-        if isinstance(node, ast.FunctionDef):
-            # Import function by name
-            module = importlib.import_module(filename.split(".")[0].replace("/", "."))
-            function = getattr(module, node.name)
-
-            # Append the function to the list (exclude the get_user_defined_functions function)
-            if node.name != "get_user_defined_functions":
-                functions[node.name] = function
-
-    return functions
+    return discover_functions(filename)
 
 # Example functions
 def get_weather_forecast(location: str) -> dict[str, str]:
@@ -0,0 +1,173 @@
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Dict, List, NamedTuple, Optional, Tuple
+import threading
+import time
+
+# Define constants
+HISTOGRAM_BUCKETS = tuple(10 ** (exponent / 4) * 1e-6 for exponent in range(0, 33))
+
+class SpanEvent(NamedTuple):
+    """A finished span: what was timed, when, for how long, and whether it failed."""
+    name: str
+    label: Optional[str]
+    start_time: float
+    duration: float
+    error: Optional[str]
+
+class Exporter(ABC):
+    """
+    Receives every finished span, e.g. to forward it to a metrics stack.
+    """
+    @abstractmethod
+    def export(self, event: SpanEvent) -> None:
+        pass
+
+class LatencyHistogram:
+    """
+    A latency histogram with logarithmic buckets from 1 microsecond to 100 seconds.
+    """
+    __slots__ = ("counts", "count", "total", "errors")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+
+    def record(self, duration: float, error: bool = False) -> None:
+        self.counts[bisect_left(HISTOGRAM_BUCKETS, duration)] += 1
+        self.count += 1
+        self.total += duration
+        if error:
+            self.errors += 1
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percentile: float) -> float:
+        """
+        Return the upper bound of the bucket holding the given percentile (0-100).
+        """
+        if not self.count:
+            return 0.0
+        rank = percentile / 100 * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return HISTOGRAM_BUCKETS[min(index, len(HISTOGRAM_BUCKETS) - 1)]
+        return HISTOGRAM_BUCKETS[-1]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_s": self.mean,
+            "p50_s": self.percentile(50),
+            "p90_s": self.percentile(90),
+            "p99_s": self.percentile(99),
+        }
+
+class _NullSpan:
+    """The span of the no-op instrumentation, shared by every call."""
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class Instrumentation:
+    """
+    The no-op instrumentation used by default.
+
+    `span` returns a shared context manager that does nothing, so
+    instrumented code costs a method call when no instrumentation is set.
+    """
+    def span(self, name: str, label: Optional[str] = None):
+        """
+        Time a block of code, e.g. `with instrumentation.span("function_call", "get_weather"):`.
+        """
+        return _NULL_SPAN
+
+class _Span:
+    """A span of the metrics instrumentation, recorded when it exits."""
+    __slots__ = ("instrumentation", "name", "label", "start_time", "start")
+
+    def __init__(self, instrumentation: "MetricsInstrumentation", name: str, label: Optional[str]) -> None:
+        self.instrumentation = instrumentation
+        self.name = name
+        self.label = label
+
+    def __enter__(self) -> "_Span":
+        self.start_time = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        duration = time.perf_counter() - self.start
+        # A closed generator (e.g. a stream that was not read to the end) is not a failure
+        failed = exc_type is not None and not issubclass(exc_type, GeneratorExit)
+        error = f"{exc_type.__name__}: {exc_value}" if failed else None
+        self.instrumentation._record(SpanEvent(self.name, self.label, self.start_time, duration, error))
+        return False
+
+class MetricsInstrumentation(Instrumentation):
+    """
+    Keeps an in-process latency histogram and error count per span name and
+    label (e.g. per function), and passes every finished span to the exporters.
+    """
+    def __init__(self, exporters: Optional[List[Exporter]] = None) -> None:
+        self.exporters: List[Exporter] = list(exporters or [])
+        self.histograms: Dict[Tuple[str, Optional[str]], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, label: Optional[str] = None) -> _Span:
+        return _Span(self, name, label)
+
+    def histogram(self, name: str, label: Optional[str] = None) -> LatencyHistogram:
+        """
+        Return the histogram of a span name and label.
+        """
+        with self._lock:
+            return self.histograms.setdefault((name, label), LatencyHistogram())
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Return the count, errors, mean and percentiles of every histogram,
+        keyed by `name` or `name:label`.
+        """
+        with self._lock:
+            return {
+                name if label is None else f"{name}:{label}": histogram.summary()
+                for (name, label), histogram in self.histograms.items()
+            }
+
+    def _record(self, event: SpanEvent) -> None:
+        with self._lock:
+            histogram = self.histograms.get((event.name, event.label))
+            if histogram is None:
+                histogram = self.histograms[(event.name, event.label)] = LatencyHistogram()
+            histogram.record(event.duration, event.error is not None)
+        for exporter in self.exporters:
+            exporter.export(event)
+
+_instrumentation: Instrumentation = Instrumentation()
+
+def get_instrumentation() -> Instrumentation:
+    """
+    Return the process-wide instrumentation, the no-op one unless set.
+    """
+    return _instrumentation
+
+def set_instrumentation(instrumentation: Optional[Instrumentation]) -> None:
+    """
+    Set the process-wide instrumentation; None restores the no-op default.
+    """
+    global _instrumentation
+    _instrumentation = instrumentation if instrumentation is not None else Instrumentation()
@@ -1,2 +1,40 @@
-from easy_fnc.models.ollama import OllamaModel
-from easy_fnc.models.groq import GroqModel
\ No newline at end of file
+from typing import TYPE_CHECKING, Dict, List, Type
+import importlib
+
+if TYPE_CHECKING:
+    from easy_fnc.models.model import EasyFNCModel
+
+# The backends, by class name, and the modules that define them. A backend
+# module and its client library are only imported when the class is first used.
+BACKENDS: Dict[str, str] = {
+    "OllamaModel": "easy_fnc.models.ollama",
+    "GroqModel": "easy_fnc.models.groq",
+}
+
+__all__ = ["BACKENDS", "register_backend", "get_backend", *BACKENDS]
+
+def register_backend(class_name: str, module_name: str) -> None:
+    """
+    Register a backend class, to be imported from its module on first use.
+    """
+    BACKENDS[class_name] = module_name
+
+def get_backend(class_name: str) -> Type["EasyFNCModel"]:
+    """
+    Return a backend class, importing its module if needed.
+    """
+    try:
+        module_name = BACKENDS[class_name]
+    except KeyError:
+        raise ValueError(f"Unknown backend '{class_name}'. Expected one of {list(BACKENDS)}") from None
+    return getattr(importlib.import_module(module_name), class_name)
+
+def __getattr__(name: str) -> Type["EasyFNCModel"]:
+    if name in BACKENDS:
+        backend = get_backend(name)
+        globals()[name] = backend
+        return backend
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__() -> List[str]:
+    return sorted(list(globals()) + list(BACKENDS))
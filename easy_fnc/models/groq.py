@@ -1,8 +1,8 @@
 import os
+from typing import Iterator, Optional
 
-from groq import Groq
+from groq import Groq, AsyncGroq, APIConnectionError, RateLimitError, InternalServerError
 
-from easy_fnc.utils import get_template_path
 from easy_fnc.models.model import EasyFNCModel
 
 class GroqModel(EasyFNCModel):
@@ -10,37 +10,114 @@ class GroqModel(EasyFNCModel):
     def __init__(
             self, 
             functions: list[dict[str, str]],
-            model_name: str = os.environ.get("GROQ_MODEL"),
-            template_path: str = get_template_path(),
-            template_type: str = "toml"
+            model_name: Optional[str] = None,
+            template_path: Optional[str] = None,
+            template_type: str = "toml",
+            **kwargs
         ):
-        super().__init__(functions, template_path, template_type)
+        """Additional keyword arguments are passed to `EasyFNCModel`"""
+        super().__init__(functions, template_path, template_type, **kwargs)
         self.client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
-        self.model_name = model_name
-        self.messages = [{"role": "system", "content": self.generate_system_prompt().replace("<|user_query|>", "")}]
+        self.async_client = AsyncGroq(api_key=os.environ.get("GROQ_API_KEY"))
+        self.model_name = model_name or os.environ.get("GROQ_MODEL")
 
-        if os.environ.get("GROQ_MODEL") is None:
+        if self.model_name is None:
             print("No GROQ_MODEL environment variable found. Using: llama3-8b-8192.")
             self.model_name = "llama3-8b-8192"
-        else: 
-            self.model_name = os.environ.get("GROQ_MODEL")
 
         if os.environ.get("GROQ_API_KEY") is None:
             print("No GROQ_API_KEY environment variable found. Please set it to your Groq API key.")
 
-    def generate(self, user_message: str) -> str:
+    def generate(self, user_message: str, output_turn: Optional[bool] = None) -> str:
         """Chat with the model and return the response"""
         # Create a message object for the user input
-        self.messages.append({"role": "user", "content": self.format_user_input(user_message)})
+        structured = self._use_structured_output(user_message, output_turn)
+        self._add_user_message(user_message, output_turn)
 
         # Get the chat completion from the model
-        return self._get_chat_completion(self.messages)
+        return self._get_chat_completion(self.messages, structured)
 
-    def _get_chat_completion(self, messages) -> str:
+    def _get_chat_completion(self, messages, structured: bool = False) -> str:
         """Get the chat completion from the model"""
-        model_response = self.client.chat.completions.create(messages=messages, model=self.model_name).choices[0].message.content
+        model_response = self._complete(messages, structured=structured)
 
         # Add the model response to the messages
-        self.messages.append({"role": "assistant", "content": model_response})
+        self.history.append("assistant", model_response)
+
+        return model_response
+
+    def _chat(self, messages, structured: bool = False) -> str:
+        """Send the messages to Groq and return the content of the response, over the client's pooled connections"""
+        with self.instrumentation.span("generate", self.model_name):
+            completion = self.client.chat.completions.create(messages=messages, model=self.model_name, **self._request_parameters(structured))
+        return self._finish_response(completion.choices[0].message.content, structured)
+
+    def _request_parameters(self, structured: bool = False) -> dict:
+        """The sampling options of a request, with the stop sequences or, if it is structured, the JSON response format"""
+        kwargs = dict(self.options)
+        if structured:
+            kwargs["response_format"] = {"type": "json_object"}
+        elif self.early_stop:
+            kwargs["stop"] = self.stop_sequences
+        return kwargs
+
+    def _is_retryable(self, error: Exception) -> bool:
+        """Retry connection errors, rate limited requests and server errors"""
+        return isinstance(error, (APIConnectionError, RateLimitError, InternalServerError, ConnectionError, TimeoutError))
+
+    def generate_stream(self, user_message: str, output_turn: Optional[bool] = None) -> Iterator[str]:
+        """Chat with the model and yield the response as it is decoded"""
+        # Create a message object for the user input
+        structured = self._use_structured_output(user_message, output_turn)
+        self._add_user_message(user_message, output_turn)
+
+        # A partial JSON response cannot be converted, so it is yielded whole
+        if structured:
+            yield self._get_chat_completion(self.messages, structured)
+            return
+
+        # Return a cached response at once
+        key, cached = self._lookup_response(self.messages)
+        if cached is not None:
+            self.history.append("assistant", cached)
+            yield cached
+            return
+
+        # Stream the chat completion from the model
+        chunks = []
+        with self.instrumentation.span("generate", self.model_name):
+            for chunk in self.client.chat.completions.create(messages=self.messages, model=self.model_name, stream=True, **self._request_parameters()):
+                content = chunk.choices[0].delta.content
+                if content:
+                    chunks.append(content)
+                    yield content
+
+        # Close the block an early stop left open
+        tail = self._stream_tail("".join(chunks))
+        if tail:
+            chunks.append(tail)
+            yield tail
+
+        # Add the model response to the messages
+        model_response = "".join(chunks)
+        self._store_response(key, model_response)
+        self.history.append("assistant", model_response)
+
+    async def agenerate(self, user_message: str, output_turn: Optional[bool] = None) -> str:
+        """Chat with the model using the async Groq client and return the response"""
+        # Create a message object for the user input
+        structured = self._use_structured_output(user_message, output_turn)
+        self._add_user_message(user_message, output_turn)
+
+        # Get the chat completion from the model, unless it is cached
+        key, model_response = self._lookup_response(self.messages, structured)
+        if model_response is None:
+            with self.instrumentation.span("generate", self.model_name):
+                completion = await self.async_client.chat.completions.create(messages=self.messages, model=self.model_name, **self._request_parameters(structured))
+            model_response = self._finish_response(completion.choices[0].message.content, structured)
+            self._store_response(key, model_response)
+
+        # Add the model response to the messages
+        self.history.append("assistant", model_response)
 
         return model_response
\ No newline at end of file
@@ -0,0 +1,132 @@
+from typing import Callable, Dict, List, Optional
+
+from easy_fnc.models.prompt_cache import estimate_tokens
+
+# Define constants
+DEFAULT_TRIM_RATIO = 0.75
+
+class ConversationHistory:
+    """
+    Conversation history with token and character budgets.
+
+    The system prompt and the most recent turns are always kept verbatim.
+    When the history exceeds one of its budgets, the oldest turns are
+    dropped, or compacted into a single summary message if a `summarizer` is
+    given, until it is back under `trim_ratio` of the budget. Trimming in one
+    large step, rather than a turn at a time, keeps the message prefix
+    byte-stable between trims, so the backend's prefix cache can be reused.
+
+    `messages` is a plain list that is updated in place, so it can be passed
+    to the backend clients directly.
+    """
+    def __init__(
+            self,
+            system_prompt: str,
+            max_tokens: Optional[int] = None,
+            max_characters: Optional[int] = None,
+            keep_last_turns: int = 2,
+            trim_ratio: float = DEFAULT_TRIM_RATIO,
+            token_counter: Optional[Callable[[str], int]] = None,
+            summarizer: Optional[Callable[[List[Dict[str, str]]], str]] = None
+        ) -> None:
+        self.max_tokens = max_tokens
+        self.max_characters = max_characters
+        self.keep_last_turns = keep_last_turns
+        self.trim_ratio = trim_ratio
+        self.token_counter = token_counter or estimate_tokens
+        self.summarizer = summarizer
+        self.messages: List[Dict[str, str]] = [{"role": "system", "content": system_prompt}]
+        self._has_summary = False
+        self._characters: List[int] = []
+        self._tokens: List[int] = []
+        self._count()
+
+    @property
+    def num_tokens(self) -> int:
+        """The number of tokens in the history."""
+        self._count()
+        return sum(self._tokens)
+
+    @property
+    def num_characters(self) -> int:
+        """The number of characters in the history."""
+        self._count()
+        return sum(self._characters)
+
+    def append(self, role: str, content: str) -> None:
+        """
+        Append a message to the history, trimming older turns if it is over budget.
+        """
+        self.messages.append({"role": role, "content": content})
+        if self._over_budget():
+            self._trim()
+
+    def set_system_prompt(self, system_prompt: str) -> None:
+        """
+        Replace the system prompt, keeping the counts of the other messages.
+        """
+        if self.messages[0]["content"] == system_prompt:
+            return
+        self.messages[0] = {"role": "system", "content": system_prompt}
+        if self._characters:
+            self._characters[0] = len(system_prompt)
+            self._tokens[0] = self.token_counter(system_prompt) if self.max_tokens is not None else 0
+
+    def _count(self) -> None:
+        """
+        Count the characters and tokens of the messages that have not been counted yet.
+
+        Messages are counted once; if the list was modified other than by
+        appending, every message is counted again.
+        """
+        if len(self._characters) > len(self.messages):
+            self._characters, self._tokens = [], []
+        for message in self.messages[len(self._characters):]:
+            self._characters.append(len(message["content"]))
+            self._tokens.append(self.token_counter(message["content"]) if self.max_tokens is not None else 0)
+
+    def _over_budget(self) -> bool:
+        """Whether the history exceeds one of its budgets."""
+        if self.max_characters is not None and self.num_characters > self.max_characters:
+            return True
+        if self.max_tokens is not None and self.num_tokens > self.max_tokens:
+            return True
+        return False
+
+    def _turn_starts(self) -> List[int]:
+        """The indices of the user messages that start each turn, after the system prompt and summary."""
+        first = 2 if self._has_summary else 1
+        return [i for i in range(first, len(self.messages)) if self.messages[i]["role"] == "user"]
+
+    def _trim(self) -> None:
+        """Drop or compact the oldest turns until the history is under the trim ratio of its budgets."""
+        first = 2 if self._has_summary else 1
+        turn_starts = self._turn_starts()
+        removable = turn_starts[:max(len(turn_starts) - self.keep_last_turns, 0)]
+        if not removable:
+            return
+
+        characters, tokens = self._characters, self._tokens
+        remaining_characters = sum(characters)
+        remaining_tokens = sum(tokens)
+
+        end = first
+        for index in range(len(removable)):
+            turn_end = turn_starts[index + 1] if index + 1 < len(turn_starts) else len(self.messages)
+            remaining_characters -= sum(characters[end:turn_end])
+            remaining_tokens -= sum(tokens[end:turn_end])
+            end = turn_end
+            if (self.max_characters is None or remaining_characters <= self.max_characters * self.trim_ratio) and \
+                    (self.max_tokens is None or remaining_tokens <= self.max_tokens * self.trim_ratio):
+                break
+
+        dropped = self.messages[first:end]
+        if self.summarizer is not None:
+            previous = [self.messages[1]] if self._has_summary else []
+            self.messages[1:end] = [{"role": "system", "content": self.summarizer(previous + dropped)}]
+            self._has_summary = True
+            self._characters, self._tokens = [], []
+        else:
+            del self.messages[first:end]
+            del self._characters[first:end]
+            del self._tokens[first:end]
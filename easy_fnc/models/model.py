@@ -1,32 +1,427 @@
 from abc import ABC, abstractmethod
-import json
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+from typing import Dict, List, Iterator, Callable, Any, Optional, Tuple, Union
 
-from easy_fnc.utils import load_template, get_template_path
+from easy_fnc.utils import load_template, get_template_path, get_response_blocks, close_open_block
 from easy_fnc.schemas import FunctionMetadata
+from easy_fnc.models.prompt_cache import CompiledPrompt, compile_system_prompt
+from easy_fnc.models.history import ConversationHistory
+from easy_fnc.models.rate_limit import TokenBucket, retry_with_backoff
+from easy_fnc.models.response_cache import ResponseCache
+from easy_fnc.models.output_format import DEFAULT_MAX_OUTPUT_BYTES, format_tool_output
+from easy_fnc.models.structured_output import (
+    build_function_calls_schema, structured_output_instruction, to_marker_format, UNSTRUCTURED_ANSWER_INSTRUCTION
+)
+from easy_fnc.instrumentation import Instrumentation, get_instrumentation
+from easy_fnc.tool_index import ToolIndex
 
+# Define constants
+DEFAULT_MAX_TOOLS = 10
+
+class OutputPrompt(str):
+    """
+    A prompt built by `format_output`, which asks for the answer to a query
+    from the outputs of its function calls instead of for function calls.
+    """
 
 class EasyFNCModel(ABC):
     """
     Abstract class for EasyFNC models.
+
+    Args:
+    - functions (List[FunctionMetadata]):
+        The metadata of the functions the model can call.
+    - template_path (str, optional):
+        The path of the prompt template, defaults to the base template.
+    - template_type (str):
+        The file type of the prompt template, "toml" or "json".
+    - compact_prompt (bool):
+        Whether to serialize the functions in the system prompt compactly.
+    - sort_keys (bool):
+        Whether to sort the keys of the functions in the system prompt.
+    - token_counter (callable, optional):
+        Counts the tokens of a text, defaults to an estimate.
+    - max_history_tokens (int, optional):
+        The token budget of the conversation history.
+    - max_history_characters (int, optional):
+        The character budget of the conversation history.
+    - keep_last_turns (int):
+        The number of most recent turns that are never trimmed from the history.
+    - history_summarizer (callable, optional):
+        Compacts trimmed turns into a summary message instead of dropping them.
+    - instrumentation (Instrumentation, optional):
+        Times every round trip to the backend, defaults to the process-wide instrumentation.
+    - response_cache (ResponseCache, optional):
+        Returns the cached response of a request that was answered before,
+        instead of sending it to the backend again.
+    - options (dict, optional):
+        The sampling options passed to the backend, e.g. {"temperature": 0}.
+    - early_stop (bool):
+        Whether to stop the generation at the end markers of the function
+        calls and answer blocks of the template, its `response_blocks`, and
+        append the marker the backend drops.
+    - structured_output (bool):
+        Whether to constrain the response to a JSON schema built from the
+        functions with the backend's structured output mode, and convert it
+        back into the thoughts and function calls blocks.
+    - tool_index (ToolIndex, optional):
+        Selects the functions relevant to each query, so that only those are
+        listed in the system prompt.
+    - max_tools (int):
+        The number of functions the tool index selects per query.
+    - max_output_bytes (int, optional):
+        The byte budget of a function output in `format_output`; larger
+        outputs are shortened with elision markers. None for no limit.
+    - compact_output (bool):
+        Whether to serialize the outputs in `format_output` compactly
+        instead of with an indent of four spaces.
     """
     def __init__(
             self, 
             functions: List[FunctionMetadata],
-            template_path: str = get_template_path(),
-            template_type: str = "toml"
+            template_path: Optional[str] = None,
+            template_type: str = "toml",
+            compact_prompt: bool = False,
+            sort_keys: bool = False,
+            token_counter: Optional[Callable[[str], int]] = None,
+            max_history_tokens: Optional[int] = None,
+            max_history_characters: Optional[int] = None,
+            keep_last_turns: int = 2,
+            history_summarizer: Optional[Callable[[List[dict]], str]] = None,
+            instrumentation: Optional[Instrumentation] = None,
+            response_cache: Optional[ResponseCache] = None,
+            options: Optional[Dict[str, Any]] = None,
+            early_stop: bool = True,
+            structured_output: bool = False,
+            tool_index: Optional[ToolIndex] = None,
+            max_tools: int = DEFAULT_MAX_TOOLS,
+            max_output_bytes: Optional[int] = DEFAULT_MAX_OUTPUT_BYTES,
+            compact_output: bool = True
         ) -> None:
         self.functions = functions
-        self.template = load_template(file_path=template_path, file_type=template_type)
+        self.template = load_template(file_path=template_path or get_template_path(), file_type=template_type)
+        self.compact_prompt = compact_prompt
+        self.sort_keys = sort_keys
+        self.token_counter = token_counter
+        self._compiled_prompt: Optional[CompiledPrompt] = None
+        self._compiled_prompt_functions: tuple = ()
+        self.early_stop = early_stop
+        self.structured_output = structured_output
+        self.response_blocks = get_response_blocks(self.template)
+        self.stop_sequences: List[str] = [end_marker for _, end_marker in self.response_blocks.values()]
+        self.tool_index = tool_index
+        self.max_tools = max_tools
+        self.max_output_bytes = max_output_bytes
+        self.compact_output = compact_output
+        self.output_bytes_saved = 0
+        self.function_calls_schema: Optional[Dict[str, Any]] = None
+        if structured_output:
+            self.function_calls_schema = build_function_calls_schema(
+                [function if isinstance(function, FunctionMetadata) else FunctionMetadata(**function) for function in functions]
+            )
+        self.history = ConversationHistory(
+            self._build_system_prompt(),
+            max_tokens=max_history_tokens,
+            max_characters=max_history_characters,
+            keep_last_turns=keep_last_turns,
+            token_counter=token_counter,
+            summarizer=history_summarizer
+        )
+        self.messages = self.history.messages
+        self._instrumentation = instrumentation
+        self.response_cache = response_cache
+        self.options: Dict[str, Any] = dict(options or {})
+
+    @property
+    def instrumentation(self) -> Instrumentation:
+        """
+        The instrumentation of the model, the process-wide one unless given.
+        """
+        return self._instrumentation if self._instrumentation is not None else get_instrumentation()
 
     def generate_system_prompt(self) -> str:
-        prompt_beginning = self.template["function_call_prompt"]["beginning"]
-        system_prompt_end = self.template["function_call_prompt"]["system_prompt_end"]
-        return prompt_beginning + json.dumps([f.model_dump() for f in self.functions], indent=4) + system_prompt_end
+        return self.compile_system_prompt().text
+
+    def compile_system_prompt(self) -> CompiledPrompt:
+        """
+        Return the compiled system prompt together with its byte and token size.
+
+        The prompt is compiled once per set of functions and shared between
+        model instances through the process-wide prompt cache. It is
+        remembered together with the function objects it was compiled from,
+        which are compared by identity; holding them keeps their ids from
+        being reused by other objects.
+        """
+        compiled_functions = self._compiled_prompt_functions
+        if (
+            self._compiled_prompt is None
+            or len(compiled_functions) != len(self.functions)
+            or any(function is not compiled for function, compiled in zip(self.functions, compiled_functions))
+        ):
+            self._compiled_prompt = compile_system_prompt(
+                self.template,
+                self.functions,
+                compact=self.compact_prompt,
+                sort_keys=self.sort_keys,
+                token_counter=self.token_counter
+            )
+            self._compiled_prompt_functions = tuple(self.functions)
+        return self._compiled_prompt
     
     def format_user_input(self, user_input: str) -> str:
         return "<|user_query|>" + user_input + "<|end_user_query|>"
 
+    def select_functions(self, user_input: str) -> List[FunctionMetadata]:
+        """
+        Return the functions to list in the system prompt for a query: the
+        `max_tools` most relevant ones if the model has a tool index, else all.
+
+        A query that shares no term with any function gets all of them, so it
+        is not left without tools, with the same prompt as without a tool index.
+        """
+        if self.tool_index is None:
+            return self.functions
+        return self.tool_index.select(user_input, self.max_tools) or self.functions
+
+    def _build_system_prompt(self, functions: Optional[List[FunctionMetadata]] = None) -> str:
+        """
+        Return the system prompt for a selection of the functions, or for all of them.
+        """
+        if functions is None or functions is self.functions:
+            system_prompt = self.generate_system_prompt()
+            schema = self.function_calls_schema
+        else:
+            system_prompt = compile_system_prompt(
+                self.template,
+                functions,
+                compact=self.compact_prompt,
+                sort_keys=self.sort_keys,
+                token_counter=self.token_counter
+            ).text
+            schema = build_function_calls_schema(functions) if self.structured_output else None
+        system_prompt = system_prompt.replace("<|user_query|>", "")
+        if schema is not None:
+            system_prompt += structured_output_instruction(schema)
+        return system_prompt
+
+    def _is_output_turn(self, user_input: str, output_turn: Optional[bool] = None) -> bool:
+        """
+        Whether the input asks for the answer to a query instead of function
+        calls: as given, else whether it is the prompt built by `format_output`.
+        """
+        return isinstance(user_input, OutputPrompt) if output_turn is None else output_turn
+
+    def _use_structured_output(self, user_input: str, output_turn: Optional[bool] = None) -> bool:
+        """
+        Whether the response to the input is constrained to the function calls
+        schema: with `structured_output`, except for an output turn, which is
+        answered in the blocks of the template.
+        """
+        return self.structured_output and not self._is_output_turn(user_input, output_turn)
+
+    def _add_user_message(self, user_input: str, output_turn: Optional[bool] = None) -> None:
+        """
+        Append a query to the history, first listing only the functions
+        selected for it in the system prompt if the model has a tool index.
+
+        An output turn keeps the selection of the query it answers. The
+        system prompt of a selection is compiled once and byte-identical
+        every time, but a query with another selection changes the first
+        message, so the backend cannot reuse the prefix it cached for the
+        conversation: the shorter prompt is paid for with a full prompt
+        evaluation whenever the selection changes.
+        """
+        if self.tool_index is not None and not self._is_output_turn(user_input, output_turn):
+            self.history.set_system_prompt(self._build_system_prompt(self.select_functions(user_input)))
+        self.history.append("user", self.format_user_input(user_input))
+
+    def format_output(self, output: Any, original_prompt: str) -> OutputPrompt:
+        """
+        Format the output of the function calls into the prompt that answers the original query.
+
+        The output is serialized within the `max_output_bytes` budget, and the
+        bytes the compaction removed are added to `output_bytes_saved`. The
+        prompt is an `OutputPrompt`, which `generate` answers as an output turn:
+        with `structured_output`, its response is not constrained, and the
+        prompt overrides the JSON instruction of the system prompt.
+        """
+        formatted = format_tool_output(output, max_bytes=self.max_output_bytes, indent=None if self.compact_output else 4)
+        self.output_bytes_saved += formatted.bytes_saved
+
+        prompt = self.template["function_response_prompt"]["beginning"] + original_prompt
+        prompt += self.template["function_response_prompt"]["middle"]
+        prompt += formatted.text
+        prompt += self.template["function_response_prompt"]["end"]
+        if self.structured_output:
+            start_marker, end_marker = self.response_blocks["answer"]
+            prompt += UNSTRUCTURED_ANSWER_INSTRUCTION.format(start=start_marker, end=end_marker)
+
+        return OutputPrompt(prompt)
+
     @abstractmethod
-    def generate(self, user_input: str) -> str:
-        pass
\ No newline at end of file
+    def generate(self, user_input: str, output_turn: Optional[bool] = None) -> str:
+        """
+        Generate a response to the input.
+
+        Args:
+        - user_input (str):
+            The query, or the prompt built by `format_output`.
+        - output_turn (bool, optional):
+            Whether the input asks for the answer to a query instead of
+            function calls; defaults to whether it was built by `format_output`.
+        """
+        pass
+
+    def generate_stream(self, user_input: str, output_turn: Optional[bool] = None) -> Iterator[str]:
+        """
+        Generate a response and yield it in chunks as they are decoded.
+
+        Yields the whole response of `generate` at once; subclasses with a
+        streaming client should override this.
+        """
+        yield self.generate(user_input, output_turn)
+
+    async def agenerate(self, user_input: str, output_turn: Optional[bool] = None) -> str:
+        """
+        Generate a response without blocking the event loop.
+
+        Runs `generate` in the event loop's default executor; subclasses with
+        an async client should override this.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.generate, user_input, output_turn)
+
+    def generate_batch(
+            self,
+            user_inputs: List[str],
+            max_concurrency: int = 8,
+            rate_limiter: Optional[TokenBucket] = None,
+            max_retries: int = 3,
+            return_exceptions: bool = False
+        ) -> List[Union[str, Exception]]:
+        """
+        Generate responses for many independent queries concurrently.
+
+        Every query is answered on its own, with only the system prompt as
+        history, so the conversation history of the model is not changed.
+        With a tool index, each query gets the system prompt of its own
+        selection of functions.
+        The requests share the pooled HTTP connections of the backend client.
+
+        Args:
+        - user_inputs (List[str]):
+            The queries to answer.
+        - max_concurrency (int):
+            The maximum number of requests in flight.
+        - rate_limiter (TokenBucket, optional):
+            Throttles the requests, shared between batches to respect a
+            backend's rate limit.
+        - max_retries (int):
+            How often to retry a request that failed with a retryable error,
+            with jittered exponential backoff.
+        - return_exceptions (bool):
+            Whether to return the errors of failed requests in place of their
+            responses, instead of raising the first one.
+
+        Returns the responses in the order of the queries.
+        """
+        system_message = self.messages[0]
+
+        def answer(user_input: str) -> str:
+            query_system_message = system_message
+            if self.tool_index is not None:
+                query_system_message = {"role": "system", "content": self._build_system_prompt(self.select_functions(user_input))}
+            messages = [query_system_message, {"role": "user", "content": self.format_user_input(user_input)}]
+            structured = self._use_structured_output(user_input)
+
+            def request() -> str:
+                return self._complete(messages, rate_limiter, structured)
+
+            return retry_with_backoff(request, self._is_retryable, max_retries=max_retries)
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            futures = [executor.submit(answer, user_input) for user_input in user_inputs]
+
+        responses: List[Union[str, Exception]] = []
+        for future in futures:
+            error = future.exception()
+            if error is not None and not return_exceptions:
+                raise error
+            responses.append(error if error is not None else future.result())
+        return responses
+
+    def _finish_response(self, content: str, structured: bool = False) -> str:
+        """
+        Convert a structured response into the blocks of the template, or close
+        the block an early stop left open.
+        """
+        if structured:
+            return to_marker_format(content)
+        if self.early_stop:
+            return close_open_block(content, list(self.response_blocks.values()))
+        return content
+
+    def _stream_tail(self, streamed: str) -> str:
+        """
+        Return what `_finish_response` appends to a streamed response, to yield after it.
+        """
+        finished = self._finish_response(streamed)
+        return finished[len(streamed.rstrip()):] if finished != streamed else ""
+
+    def _complete(self, messages: List[dict], rate_limiter: Optional[TokenBucket] = None, structured: bool = False) -> str:
+        """
+        Return the response to the messages, from the response cache if possible,
+        constrained to the function calls schema if `structured` is set.
+
+        Only requests that miss the cache wait for the rate limiter.
+        """
+        key, response = self._lookup_response(messages, structured)
+        if response is not None:
+            return response
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        response = self._chat(messages, structured)
+        self._store_response(key, response)
+        return response
+
+    def _lookup_response(self, messages: List[dict], structured: bool = False) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Return the cache key of a request and its cached response, if any.
+
+        The key covers the parameters the request is sent with, so requests
+        with other stop sequences or another response format do not share it.
+        """
+        if self.response_cache is None:
+            return None, None
+        key = self.response_cache.make_key(getattr(self, "model_name", None), messages, self._request_parameters(structured))
+        return key, self.response_cache.get(key)
+
+    def _request_parameters(self, structured: bool = False) -> Dict[str, Any]:
+        """
+        Return the parameters a request is sent with besides the model and the
+        messages; the sampling options unless a backend overrides this.
+        """
+        return dict(self.options)
+
+    def _store_response(self, key: Optional[str], response: str) -> None:
+        """
+        Cache the response of a request looked up with `_lookup_response`.
+        """
+        if key is not None:
+            self.response_cache.put(key, response)
+
+    def _chat(self, messages: List[dict], structured: bool = False) -> str:
+        """
+        Send the messages to the backend and return the content of the response,
+        constrained to the function calls schema if `structured` is set.
+
+        Used by `generate_batch`; subclasses should implement this.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support batch generation")
+
+    def _is_retryable(self, error: Exception) -> bool:
+        """
+        Whether a failed request should be retried.
+        """
+        return isinstance(error, (ConnectionError, TimeoutError))
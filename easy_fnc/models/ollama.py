@@ -1,9 +1,9 @@
 import ollama
+import httpx
 
-import json
+from typing import Iterator, Optional
 
 from easy_fnc.models.model import EasyFNCModel
-from easy_fnc.utils import get_template_path
 
 class OllamaModel(EasyFNCModel):
     """
@@ -13,36 +13,119 @@ class OllamaModel(EasyFNCModel):
             self, 
             model_name: str, 
             functions: list[dict[str, str]],
-            template_path: str = get_template_path(),
-            template_type: str = "toml"
+            template_path: Optional[str] = None,
+            template_type: str = "toml",
+            **kwargs
         ) -> None:
-        super().__init__(functions, template_path, template_type)
+        """
+        Additional keyword arguments are passed to `EasyFNCModel`.
+        """
+        super().__init__(functions, template_path, template_type, **kwargs)
         self.model_name = model_name
-        self.messages = [{"role": "system", "content": self.generate_system_prompt().replace("<|user_query|>", "")}]
+        self.async_client = None
 
-    def format_output(self, output: any, original_prompt: str) -> str:
-        """ Format the output. """
-        prompt = self.template["function_response_prompt"]["beginning"] + original_prompt
-        prompt += self.template["function_response_prompt"]["middle"]
-        prompt += json.dumps(output, indent=4)
-        prompt += self.template["function_response_prompt"]["end"]
-
-        return prompt
-    
     def generate(
             self, 
-            user_input: str
+            user_input: str,
+            output_turn: Optional[bool] = None
             ) -> str:
         """
-        Generate a response based on the user input.
+        Generate a response based on the user input, or on the prompt built
+        by `format_output` if `output_turn` is set.
         """
         # Get the model response and extract the content
-        self.messages.append({"role": "user", "content": self.format_user_input(user_input)})
-        model_response = ollama.chat(
-            model=self.model_name,
-            messages=self.messages
-        )
+        structured = self._use_structured_output(user_input, output_turn)
+        self._add_user_message(user_input, output_turn)
+        return self._complete(self.messages, structured=structured)
+
+    def _chat(self, messages: list[dict[str, str]], structured: bool = False) -> str:
+        """
+        Send the messages to Ollama and return the content of the response.
+
+        Uses the process-wide Ollama client, which pools its HTTP connections.
+        """
+        with self.instrumentation.span("generate", self.model_name):
+            model_response = ollama.chat(model=self.model_name, messages=messages, **self._request_parameters(structured))
+
+        return self._get_content(model_response, structured)
+
+    def _is_retryable(self, error: Exception) -> bool:
+        """Retry connection errors, and responses that are rate limited or failed on the server."""
+        if isinstance(error, ollama.ResponseError):
+            return error.status_code == 429 or error.status_code >= 500
+        return isinstance(error, (ConnectionError, TimeoutError, httpx.TransportError))
+
+    def generate_stream(
+            self, 
+            user_input: str,
+            output_turn: Optional[bool] = None
+            ) -> Iterator[str]:
+        """
+        Generate a response based on the user input, yielding the content as it is decoded.
+        """
+        structured = self._use_structured_output(user_input, output_turn)
+        self._add_user_message(user_input, output_turn)
+        if structured:
+            # A partial JSON response cannot be converted, so it is yielded whole
+            yield self._complete(self.messages, structured=True)
+            return
+
+        key, cached = self._lookup_response(self.messages)
+        if cached is not None:
+            yield cached
+            return
+
+        chunks = []
+        with self.instrumentation.span("generate", self.model_name):
+            for chunk in ollama.chat(model=self.model_name, messages=self.messages, stream=True, **self._request_parameters()):
+                content = chunk["message"]["content"].replace("\'", "\"")
+                chunks.append(content)
+                yield content
+
+        tail = self._stream_tail("".join(chunks))
+        if tail:
+            chunks.append(tail)
+            yield tail
+        self._store_response(key, "".join(chunks).strip())
+
+    async def agenerate(
+            self, 
+            user_input: str,
+            output_turn: Optional[bool] = None
+            ) -> str:
+        """
+        Generate a response based on the user input, using the async Ollama client.
+        """
+        if self.async_client is None:
+            self.async_client = ollama.AsyncClient()
+
+        structured = self._use_structured_output(user_input, output_turn)
+        self._add_user_message(user_input, output_turn)
+        key, cached = self._lookup_response(self.messages, structured)
+        if cached is not None:
+            return cached
+
+        with self.instrumentation.span("generate", self.model_name):
+            model_response = await self.async_client.chat(model=self.model_name, messages=self.messages, **self._request_parameters(structured))
+
+        content = self._get_content(model_response, structured)
+        self._store_response(key, content)
+        return content
+
+    def _request_parameters(self, structured: bool = False) -> dict:
+        """The parameters of a request: its options and, if it is structured, the function calls schema."""
+        return {"options": self._request_options(structured), "format": self.function_calls_schema if structured else None}
 
-        content = model_response["message"]["content"].strip().replace("\'", "\"")
+    def _request_options(self, structured: bool = False) -> Optional[dict]:
+        """The options of a request: the sampling options and the stop sequences, unless it is structured."""
+        options = dict(self.options)
+        if self.early_stop and not structured:
+            options["stop"] = self.stop_sequences
+        return options or None
 
-        return content
\ No newline at end of file
+    def _get_content(self, model_response, structured: bool = False) -> str:
+        """Extract the content from the model response."""
+        content = model_response["message"]["content"].strip()
+        if not structured:
+            content = content.replace("\'", "\"")
+        return self._finish_response(content, structured)
\ No newline at end of file
@@ -0,0 +1,203 @@
+from collections.abc import Mapping
+from typing import Any, List, NamedTuple, Optional, Tuple
+import functools
+import json
+
+# Define constants
+DEFAULT_MAX_OUTPUT_BYTES = 8192
+DEFAULT_MAX_ITEMS = 32
+DEFAULT_MAX_STRING_LENGTH = 512
+DEFAULT_MAX_DEPTH = 8
+MIN_STRING_LENGTH = 32
+ELIDED_ITEMS = "...({count} more items of {total})"
+ELIDED_NUMBERS = "...({count} more items of {total}; min {min}, max {max}, mean {mean:.6g})"
+ELIDED_KEYS = "...({count} more keys of {total})"
+ELIDED_CHARACTERS = "...({count} more characters)"
+ELIDED_CONTAINER = "...(nested {kind} of length {total})"
+ELIDED_BYTES = "...({total} bytes)"
+ELIDED_TEXT = "...({count} more bytes)"
+ELIDED_KEY = "..."
+
+class FormattedOutput(NamedTuple):
+    """
+    A function output serialized for the prompt.
+
+    `original_bytes` is the size of the whole output serialized the same
+    way, and `num_elisions` the number of elision markers in the text.
+    """
+    text: str
+    num_bytes: int
+    original_bytes: int
+    num_elisions: int
+
+    @property
+    def bytes_saved(self) -> int:
+        """The number of bytes the compaction removed from the output."""
+        return self.original_bytes - self.num_bytes
+
+@functools.lru_cache(maxsize=None)
+def _orjson() -> Optional[Any]:
+    """ Returns the orjson module, or None if it is not installed. """
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+def _to_json(value: Any) -> Any:
+    """Convert a value the JSON encoders do not support, e.g. a numpy array, set or bytes."""
+    if isinstance(value, Mapping):
+        return dict(value)
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, (bytes, bytearray)):
+        return ELIDED_BYTES.format(total=len(value))
+    return str(value)
+
+def encode_json(value: Any, indent: Optional[int] = None) -> str:
+    """
+    Serialize a value to JSON, with compact separators unless an indent is given.
+
+    Uses orjson if it is installed and the output is compact.
+    """
+    orjson = _orjson()
+    if orjson is not None and indent is None:
+        try:
+            return orjson.dumps(value, default=_to_json, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:
+            # e.g. integers beyond 64 bits, which the standard encoder supports
+            pass
+    if indent is None:
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=_to_json)
+    return json.dumps(value, indent=indent, ensure_ascii=False, default=_to_json)
+
+def compact_value(
+        value: Any,
+        max_items: int = DEFAULT_MAX_ITEMS,
+        max_string_length: int = DEFAULT_MAX_STRING_LENGTH,
+        max_depth: int = DEFAULT_MAX_DEPTH
+    ) -> Tuple[Any, int]:
+    """
+    Return a copy of a value with long lists, dicts and strings shortened,
+    and the number of elision markers that replace what was left out.
+
+    Lists keep their first `max_items` items followed by a marker with the
+    number of items left out, and the min, max and mean of a list of
+    numbers. Dicts keep their first `max_items` keys, with a "..." key for
+    the rest, and strings their first `max_string_length` characters.
+    Containers nested deeper than `max_depth` are replaced by a marker.
+    Numpy arrays, tuples and sets are converted to lists.
+    """
+    elisions = [0]
+    compacted = _compact(value, max_items, max_string_length, max_depth, elisions)
+    return compacted, elisions[0]
+
+def _compact(value: Any, max_items: int, max_string_length: int, depth: int, elisions: List[int]) -> Any:
+    """Compact a value, counting the elision markers in `elisions`."""
+    if isinstance(value, str):
+        if len(value) <= max_string_length:
+            return value
+        elisions[0] += 1
+        return value[:max_string_length] + ELIDED_CHARACTERS.format(count=len(value) - max_string_length)
+
+    if isinstance(value, Mapping):
+        if depth <= 0 and value:
+            elisions[0] += 1
+            return ELIDED_CONTAINER.format(kind="dict", total=len(value))
+        compacted = {}
+        for index, (key, item) in enumerate(value.items()):
+            if index == max_items:
+                elisions[0] += 1
+                compacted[ELIDED_KEY] = ELIDED_KEYS.format(count=len(value) - max_items, total=len(value))
+                break
+            compacted[key] = _compact(item, max_items, max_string_length, depth - 1, elisions)
+        return compacted
+
+    if isinstance(value, (list, tuple, set, frozenset)) or (hasattr(value, "tolist") and hasattr(value, "shape")):
+        if hasattr(value, "shape") and not value.shape:
+            return value.tolist()
+        total = len(value)
+        if depth <= 0 and total:
+            elisions[0] += 1
+            return ELIDED_CONTAINER.format(kind="list", total=total)
+        if isinstance(value, (set, frozenset)):
+            value = list(value)
+        # Numpy arrays are sliced before they are converted, so only the kept items are copied
+        head = value[:max_items]
+        items = head.tolist() if hasattr(head, "tolist") else head
+        compacted = [_compact(item, max_items, max_string_length, depth - 1, elisions) for item in items]
+        if total > max_items:
+            elisions[0] += 1
+            compacted.append(_elided_items(value, max_items, total))
+        return compacted
+
+    if isinstance(value, (bytes, bytearray)):
+        elisions[0] += 1
+        return ELIDED_BYTES.format(total=len(value))
+
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return value
+
+def _elided_items(values: Any, max_items: int, total: int) -> str:
+    """The marker of the items of a list past `max_items`, with a summary if they are all numbers."""
+    if hasattr(values, "dtype"):
+        if values.ndim == 1 and values.dtype.kind in "iuf":
+            return ELIDED_NUMBERS.format(count=total - max_items, total=total, min=values.min(), max=values.max(), mean=float(values.mean()))
+    elif all(isinstance(item, (int, float)) and not isinstance(item, bool) for item in values):
+        return ELIDED_NUMBERS.format(count=total - max_items, total=total, min=min(values), max=max(values), mean=sum(values) / total)
+    return ELIDED_ITEMS.format(count=total - max_items, total=total)
+
+def format_tool_output(
+        output: Any,
+        max_bytes: Optional[int] = DEFAULT_MAX_OUTPUT_BYTES,
+        indent: Optional[int] = None,
+        max_items: int = DEFAULT_MAX_ITEMS,
+        max_string_length: int = DEFAULT_MAX_STRING_LENGTH,
+        max_depth: int = DEFAULT_MAX_DEPTH
+    ) -> FormattedOutput:
+    """
+    Serialize a function output for the prompt within a byte budget.
+
+    An output that fits in `max_bytes` is serialized whole. A larger one is
+    compacted with `compact_value`, halving the number of items and the
+    length of strings kept until it fits; if even the smallest compaction
+    is over budget, the text is cut at the budget and ends with a marker.
+
+    Args:
+    - output (any):
+        The output of the function calls.
+    - max_bytes (int, optional):
+        The byte budget of the serialized output, None for no limit.
+    - indent (int, optional):
+        The indent of the JSON, None for compact separators.
+    - max_items (int):
+        The number of items and keys kept per list and dict in the first compaction.
+    - max_string_length (int):
+        The number of characters kept per string in the first compaction.
+    - max_depth (int):
+        The depth below which lists and dicts are replaced by a marker.
+    """
+    text = encode_json(output, indent)
+    original_bytes = len(text.encode("utf-8"))
+    if max_bytes is None or original_bytes <= max_bytes:
+        return FormattedOutput(text, original_bytes, original_bytes, 0)
+
+    while True:
+        compacted, num_elisions = compact_value(output, max_items, max_string_length, max_depth)
+        text = encode_json(compacted, indent)
+        num_bytes = len(text.encode("utf-8"))
+        if num_bytes <= max_bytes:
+            return FormattedOutput(text, num_bytes, original_bytes, num_elisions)
+        if max_items == 1 and max_string_length == MIN_STRING_LENGTH:
+            break
+        max_items = max(max_items // 2, 1)
+        max_string_length = max(max_string_length // 2, MIN_STRING_LENGTH)
+
+    data = text.encode("utf-8")
+    # The marker is at most as long as its count has digits, which the cut is computed with
+    kept = max(max_bytes - len(ELIDED_TEXT.format(count=len(data))), 0)
+    text = data[:kept].decode("utf-8", "ignore") + ELIDED_TEXT.format(count=len(data) - kept)
+    return FormattedOutput(text, len(text.encode("utf-8")), original_bytes, num_elisions + 1)
@@ -0,0 +1,119 @@
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+import hashlib
+import json
+import threading
+import weakref
+
+from easy_fnc.schemas import FunctionMetadata
+
+# Define constants
+MAX_CACHED_PROMPTS = 128
+CHARACTERS_PER_TOKEN = 4
+
+class CompiledPrompt(NamedTuple):
+    """A compiled system prompt, its content hash and its size."""
+    key: str
+    text: str
+    num_bytes: int
+    num_tokens: int
+
+_compiled_prompts: "OrderedDict[tuple, CompiledPrompt]" = OrderedDict()
+_compiled_prompts_lock = threading.Lock()
+_fingerprints: Dict[int, Tuple[weakref.ref, str]] = {}
+_fingerprints_lock = threading.Lock()
+# The ids of freed objects, queued by their weakref callbacks, which can run
+# at any point of any thread and so do not take the lock themselves
+_freed_fingerprints: List[Tuple[int, weakref.ref]] = []
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text, at roughly four characters per token.
+    """
+    return -(-len(text) // CHARACTERS_PER_TOKEN)
+
+def compile_system_prompt(
+        template: dict,
+        functions: List[FunctionMetadata],
+        compact: bool = False,
+        sort_keys: bool = False,
+        token_counter: Optional[Callable[[str], int]] = None
+    ) -> CompiledPrompt:
+    """
+    Compile the system prompt for the given template and functions.
+
+    Compiled prompts are cached process-wide, keyed by the template and a
+    hash of each function's metadata, so the same tool catalog is only
+    serialized once and the prompt stays byte-stable between model instances.
+    The hash of a FunctionMetadata object is computed once and remembered
+    for the object, so a lookup does not serialize the catalog; function
+    metadata must not be changed in place once it was compiled into a prompt.
+
+    Args:
+    - template (dict):
+        The loaded prompt template.
+    - functions (List[FunctionMetadata]):
+        The metadata of the functions to include in the prompt.
+    - compact (bool):
+        Whether to serialize the functions with minimal separators instead of
+        an indent of four spaces.
+    - sort_keys (bool):
+        Whether to sort the keys of the serialized functions.
+    - token_counter (callable, optional):
+        Counts the tokens of the prompt, defaults to `estimate_tokens`.
+    """
+    prompt_beginning = template["function_call_prompt"]["beginning"]
+    system_prompt_end = template["function_call_prompt"]["system_prompt_end"]
+    token_counter = token_counter or estimate_tokens
+    key = (prompt_beginning, system_prompt_end, tuple(map(_fingerprint, functions)), compact, sort_keys, token_counter)
+
+    with _compiled_prompts_lock:
+        if key in _compiled_prompts:
+            _compiled_prompts.move_to_end(key)
+            return _compiled_prompts[key]
+
+    functions_dump = [f.model_dump() for f in functions]
+    if compact:
+        functions_json = json.dumps(functions_dump, separators=(",", ":"), sort_keys=sort_keys)
+    else:
+        functions_json = json.dumps(functions_dump, indent=4, sort_keys=sort_keys)
+    text = prompt_beginning + functions_json + system_prompt_end
+    data = text.encode("utf-8")
+    compiled_prompt = CompiledPrompt(hashlib.sha256(data).hexdigest(), text, len(data), token_counter(text))
+
+    with _compiled_prompts_lock:
+        _compiled_prompts[key] = compiled_prompt
+        while len(_compiled_prompts) > MAX_CACHED_PROMPTS:
+            _compiled_prompts.popitem(last=False)
+    return compiled_prompt
+
+def clear_prompt_cache() -> None:
+    """
+    Clear the process-wide cache of compiled prompts.
+    """
+    with _compiled_prompts_lock:
+        _compiled_prompts.clear()
+
+def _fingerprint(function: FunctionMetadata) -> str:
+    """Return the hash of the metadata of a function, computed once per object."""
+    key = id(function)
+    with _fingerprints_lock:
+        _forget_freed_fingerprints()
+        entry = _fingerprints.get(key)
+        if entry is not None and entry[0]() is function:
+            return entry[1]
+    fingerprint = hashlib.sha256(
+        json.dumps(function.model_dump(), separators=(",", ":"), sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    reference = weakref.ref(function, lambda reference, key=key: _freed_fingerprints.append((key, reference)))
+    with _fingerprints_lock:
+        _fingerprints[key] = (reference, fingerprint)
+    return fingerprint
+
+def _forget_freed_fingerprints() -> None:
+    """Drop the entries of freed objects, unless their id was reused by a newer entry."""
+    while _freed_fingerprints:
+        key, reference = _freed_fingerprints.pop()
+        entry = _fingerprints.get(key)
+        if entry is not None and entry[0] is reference:
+            del _fingerprints[key]
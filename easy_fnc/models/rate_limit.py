@@ -0,0 +1,60 @@
+from typing import Callable, TypeVar
+import threading
+import random
+import time
+
+T = TypeVar("T")
+
+class TokenBucket:
+    """
+    A thread-safe token bucket rate limiter.
+
+    Tokens are added at `rate` per second up to `capacity`, and every request
+    takes one, so bursts of up to `capacity` requests are allowed while the
+    sustained rate stays at `rate` requests per second.
+    """
+    def __init__(self, rate: float, capacity: float = 1) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = max(capacity, 1)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Take a token, waiting until one is available.
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+def retry_with_backoff(
+        function: Callable[[], T],
+        is_retryable: Callable[[Exception], bool],
+        max_retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0
+    ) -> T:
+    """
+    Call a function, retrying retryable errors with jittered exponential backoff.
+
+    The delay before retry `n` is drawn uniformly from
+    [0, min(max_delay, base_delay * 2 ** n)], which spreads the retries of
+    concurrent requests instead of letting them hit the backend together.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return function()
+        except Exception as e:
+            if attempt == max_retries or not is_retryable(e):
+                raise
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** attempt)))
@@ -0,0 +1,113 @@
+from typing import Dict, List, Any, Optional
+import threading
+import hashlib
+import sqlite3
+import json
+import time
+import sys
+import os
+
+# Define constants
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+BUSY_TIMEOUT_MS = 30_000
+
+class ResponseCache:
+    """
+    A persistent cache of model responses in an SQLite database.
+
+    Responses are keyed on a hash of the model, the messages (system prompt,
+    history and query) and the sampling options. Entries older than `ttl`
+    seconds are not returned, and once the cache holds more than
+    `max_entries` responses or `max_bytes` of them, the least recently used
+    ones are deleted. The database runs in WAL mode with a busy timeout, so
+    one file can be shared by the threads and worker processes of a service.
+    """
+    def __init__(
+            self,
+            path: str,
+            max_entries: Optional[int] = None,
+            max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+            ttl: Optional[float] = None
+        ) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    @staticmethod
+    def make_key(model_name: Optional[str], messages: List[Dict[str, str]], options: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Return the cache key of a request.
+        """
+        request = json.dumps([model_name, messages, options or {}], sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(request.encode("utf-8", "surrogatepass")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Return the cached response of a key, or None if it is missing or expired.
+        """
+        now = time.time()
+        with self._connect() as connection:
+            row = connection.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            response, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            return response
+
+    def put(self, key: str, response: str) -> None:
+        """
+        Cache a response, evicting expired and least recently used entries.
+        """
+        now = time.time()
+        size = len(response.encode("utf-8", "surrogatepass"))
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now)
+            )
+            if self.ttl is not None:
+                connection.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl,))
+            if self.max_entries is not None or self.max_bytes is not None:
+                connection.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    "SELECT key FROM (SELECT key, "
+                    "SUM(size) OVER (ORDER BY accessed_at DESC, rowid DESC) AS total, "
+                    "ROW_NUMBER() OVER (ORDER BY accessed_at DESC, rowid DESC) AS position "
+                    "FROM responses) WHERE total > ? OR position > ?)",
+                    (sys.maxsize if self.max_bytes is None else self.max_bytes, sys.maxsize if self.max_entries is None else self.max_entries)
+                )
+
+    def clear(self) -> None:
+        with self._connect() as connection:
+            connection.execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        with self._connect() as connection:
+            return connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Return the connection of the current thread, opening one after a fork.
+
+        Used as a context manager, the connection commits the transaction on success.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
@@ -0,0 +1,86 @@
+from typing import Dict, List, Any
+import json
+
+from easy_fnc.schemas import FunctionMetadata
+from easy_fnc.utils import THOUGHTS_START, THOUGHTS_END, FUNCTION_CALLS_START, FUNCTION_CALLS_END
+
+# Define constants
+JSON_TYPES = {
+    "int": {"type": "integer"},
+    "float": {"type": "number"},
+    "bool": {"type": "boolean"},
+    "str": {"type": "string"},
+    "list": {"type": "array"},
+    "dict": {"type": "object"},
+}
+STRUCTURED_OUTPUT_INSTRUCTION = """
+Respond with a single JSON object instead of the blocks above, with your thoughts in "thoughts" and the function calls in "function_calls", following this JSON schema:
+"""
+UNSTRUCTURED_ANSWER_INSTRUCTION = """
+Do not respond with a JSON object this time, give your answer in between {start} and {end} blocks.
+"""
+
+def build_function_calls_schema(functions: List[FunctionMetadata]) -> Dict[str, Any]:
+    """
+    Build the JSON schema of a response with thoughts and calls to the given functions.
+
+    Every function call must name one of the functions and pass exactly its
+    parameters. A parameter may always be a string, since it can name the
+    output of a previous call.
+    """
+    calls = []
+    for function in functions:
+        properties = function.parameters.get("properties", {})
+        calls.append({
+            "type": "object",
+            "properties": {
+                "name": {"const": function.name},
+                "kwargs": {
+                    "type": "object",
+                    "properties": {name: _parameter_schema(type_name) for name, type_name in properties.items()},
+                    "required": list(function.parameters.get("required", properties)),
+                    "additionalProperties": False,
+                },
+                "returns": {"type": "array", "items": {"type": "string"}},
+            },
+            "required": ["name", "kwargs", "returns"],
+        })
+    return {
+        "type": "object",
+        "properties": {
+            "thoughts": {"type": "string"},
+            "function_calls": {"type": "array", "items": {"anyOf": calls} if calls else {}},
+        },
+        "required": ["thoughts", "function_calls"],
+    }
+
+def _parameter_schema(type_name: str) -> Dict[str, Any]:
+    """Return the schema of a parameter, allowing a string that names a previous output."""
+    json_type = JSON_TYPES.get(type_name)
+    if json_type is None:
+        return {}
+    if json_type["type"] == "string":
+        return json_type
+    return {"anyOf": [json_type, {"type": "string"}]}
+
+def structured_output_instruction(schema: Dict[str, Any]) -> str:
+    """
+    Return the system prompt addition that asks for a JSON response following the schema.
+    """
+    return STRUCTURED_OUTPUT_INSTRUCTION + json.dumps(schema, separators=(",", ":"))
+
+def to_marker_format(content: str) -> str:
+    """
+    Convert a JSON response into the thoughts and function calls blocks.
+
+    A response that is not a JSON object with those keys is returned as it is.
+    """
+    try:
+        response = json.loads(content)
+        thoughts, function_calls = response["thoughts"], response["function_calls"]
+    except (ValueError, TypeError, KeyError):
+        return content
+    return (
+        f"{THOUGHTS_START}\n{thoughts}\n{THOUGHTS_END}\n"
+        f"{FUNCTION_CALLS_START}\n{json.dumps(function_calls)}\n{FUNCTION_CALLS_END}"
+    )
@@ -0,0 +1,291 @@
+from collections import OrderedDict
+from collections.abc import Mapping, MutableMapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Iterator, Optional, Set, Tuple
+import tempfile
+import threading
+import pickle
+import time
+import os
+
+from easy_fnc.utils import approximate_size
+
+# Define constants
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+class _Entry:
+    """The bookkeeping of a stored output: the path it was spilled to, its size and creation time."""
+    __slots__ = ("path", "size", "created_at")
+
+    def __init__(self, path: Optional[str], size: int, created_at: float) -> None:
+        self.path = path
+        self.size = size
+        self.created_at = created_at
+
+# Stands in the dict for an output that was spilled to a file
+_SPILLED = object()
+
+class OutputStore(dict):
+    """
+    A scoped, bounded store for the outputs of function calls.
+
+    It is a dict, so it can be serialized and passed on like the dict of
+    outputs the engine used to keep, with three additions:
+    - Scopes: outputs stored inside `with store.scope():` are released when
+      the scope ends, so a plan or session does not leak names into the next.
+    - Bounds: every entry's approximate size is tracked, and the oldest
+      entries are evicted once the total exceeds `max_bytes` or an entry is
+      older than `max_age` seconds. Outputs stored inside `with store.pin():`,
+      which the engine opens around every plan it runs, are not evicted until
+      the block ends, so a running plan never loses the outputs it refers to.
+    - Spilling: values of at least `spill_threshold` bytes are pickled to a
+      temporary file and only loaded back when they are accessed.
+
+    Scopes and pins belong to the thread or asyncio task that opened them.
+    """
+    def __init__(
+            self,
+            max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+            max_age: Optional[float] = None,
+            spill_threshold: Optional[int] = None,
+            spill_dir: Optional[str] = None
+        ) -> None:
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+        self.total_size = 0
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._scopes: ContextVar[Tuple[Set[str], ...]] = ContextVar("easy_fnc_output_scopes", default=())
+        self._pin_blocks: ContextVar[Tuple[Set[str], ...]] = ContextVar("easy_fnc_output_pins", default=())
+        self._pins: Dict[str, int] = {}
+        self._spill_directory: Optional[tempfile.TemporaryDirectory] = None
+        self._lock = threading.RLock()
+
+    def __getitem__(self, name: str) -> Any:
+        with self._lock:
+            entry = self._live_entry(name)
+            if entry is None:
+                raise KeyError(name)
+            if entry.path is None:
+                return dict.__getitem__(self, name)
+            path = entry.path
+        with open(path, "rb") as file:
+            return pickle.load(file)
+
+    def __setitem__(self, name: str, value: Any) -> None:
+        size = approximate_size(value)
+        path = None
+        if self.spill_threshold is not None and size >= self.spill_threshold:
+            path = self._spill(value)
+            value = _SPILLED
+
+        with self._lock:
+            if name in self._entries:
+                self._remove(name)
+            self._entries[name] = _Entry(path, size, time.monotonic())
+            dict.__setitem__(self, name, value)
+            self.total_size += size
+            scopes = self._scopes.get()
+            if scopes:
+                scopes[-1].add(name)
+            pin_blocks = self._pin_blocks.get()
+            if pin_blocks and name not in pin_blocks[-1]:
+                pin_blocks[-1].add(name)
+                self._pins[name] = self._pins.get(name, 0) + 1
+            self._evict()
+
+    def __delitem__(self, name: str) -> None:
+        with self._lock:
+            if name not in self._entries:
+                raise KeyError(name)
+            self._remove(name)
+
+    def __contains__(self, name: object) -> bool:
+        with self._lock:
+            return self._live_entry(name) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            self._expire()
+            return iter(list(self._entries))
+
+    def __reversed__(self) -> Iterator[str]:
+        return reversed(list(self))
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire()
+            return len(self._entries)
+
+    def __repr__(self) -> str:
+        return f"OutputStore({dict(self.items())!r})"
+
+    def __ne__(self, other: object) -> bool:
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __or__(self, other: Any) -> Dict[str, Any]:
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return {**self, **other}
+
+    def __ror__(self, other: Any) -> Dict[str, Any]:
+        if not isinstance(other, Mapping):
+            return NotImplemented
+        return {**other, **self}
+
+    def __ior__(self, other: Any) -> "OutputStore":
+        self.update(other)
+        return self
+
+    def __reduce_ex__(self, protocol: int) -> tuple:
+        # The store is pickled and copied as a plain dict of its outputs
+        return (dict, (dict(self.items()),))
+
+    # The dict methods read the dict directly, so the Mapping ones, which go
+    # through the methods above, are used instead
+    __eq__ = Mapping.__eq__
+    get = Mapping.get
+    keys = Mapping.keys
+    items = Mapping.items
+    values = Mapping.values
+    pop = MutableMapping.pop
+    popitem = MutableMapping.popitem
+    setdefault = MutableMapping.setdefault
+    update = MutableMapping.update
+
+    def copy(self) -> Dict[str, Any]:
+        """
+        Return a plain dict of the outputs.
+        """
+        return dict(self.items())
+
+    def size_of(self, name: str) -> int:
+        """
+        Return the approximate size of a stored output, in bytes.
+        """
+        with self._lock:
+            entry = self._live_entry(name)
+            if entry is None:
+                raise KeyError(name)
+            return entry.size
+
+    def sizes(self) -> Dict[str, int]:
+        """
+        Return the approximate size of every stored output, in bytes.
+        """
+        with self._lock:
+            self._expire()
+            return {name: entry.size for name, entry in self._entries.items()}
+
+    @contextmanager
+    def scope(self) -> Iterator["OutputStore"]:
+        """
+        Open a scope; the outputs stored inside it are released when it ends.
+
+        Scopes can be nested. Outputs stored before the scope stay available
+        inside it, but an output overwritten inside the scope is released
+        together with it.
+        """
+        names: Set[str] = set()
+        token = self._scopes.set(self._scopes.get() + (names,))
+        try:
+            yield self
+        finally:
+            self._scopes.reset(token)
+            with self._lock:
+                for name in names:
+                    if name in self._entries:
+                        self._remove(name)
+
+    @contextmanager
+    def pin(self) -> Iterator["OutputStore"]:
+        """
+        Keep the outputs stored inside the block from being evicted or
+        expired until it ends, e.g. while the plan that refers to them runs.
+        """
+        names: Set[str] = set()
+        token = self._pin_blocks.set(self._pin_blocks.get() + (names,))
+        try:
+            yield self
+        finally:
+            self._pin_blocks.reset(token)
+            with self._lock:
+                for name in names:
+                    count = self._pins.pop(name) - 1
+                    if count:
+                        self._pins[name] = count
+                self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            for name in list(self._entries):
+                self._remove(name)
+
+    def close(self) -> None:
+        """
+        Release every output and remove the spill directory.
+        """
+        self.clear()
+        with self._lock:
+            if self._spill_directory is not None:
+                self._spill_directory.cleanup()
+                self._spill_directory = None
+
+    def _live_entry(self, name: object) -> Optional[_Entry]:
+        """Return the entry of a name unless it is missing or too old."""
+        entry = self._entries.get(name)
+        if entry is not None and self._is_expired(name, entry, time.monotonic()):
+            self._remove(name)
+            return None
+        return entry
+
+    def _is_expired(self, name: object, entry: _Entry, now: float) -> bool:
+        """Whether an entry is older than `max_age` and not pinned."""
+        return self.max_age is not None and now - entry.created_at > self.max_age and name not in self._pins
+
+    def _expire(self) -> None:
+        """Release the unpinned entries older than `max_age`, which are at the front."""
+        if self.max_age is None:
+            return
+        deadline = time.monotonic() - self.max_age
+        for name, entry in list(self._entries.items()):
+            if entry.created_at >= deadline:
+                break
+            if name not in self._pins:
+                self._remove(name)
+
+    def _evict(self) -> None:
+        """Release the oldest unpinned entries until the store is within its bounds."""
+        self._expire()
+        if self.max_bytes is None or self.total_size <= self.max_bytes:
+            return
+        for name in list(self._entries)[:-1]:
+            if self.total_size <= self.max_bytes:
+                break
+            if name not in self._pins:
+                self._remove(name)
+
+    def _remove(self, name: str) -> None:
+        entry = self._entries.pop(name)
+        dict.__delitem__(self, name)
+        self.total_size -= entry.size
+        if entry.path is not None:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def _spill(self, value: Any) -> str:
+        """Pickle a value to a file in the spill directory and return its path."""
+        with self._lock:
+            if self._spill_directory is None:
+                self._spill_directory = tempfile.TemporaryDirectory(prefix="easy_fnc_outputs_", dir=self.spill_dir)
+            directory = self._spill_directory.name
+        file_descriptor, path = tempfile.mkstemp(dir=directory)
+        with os.fdopen(file_descriptor, "wb") as file:
+            pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+        return path
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, Callable, Any, NamedTuple, Optional, Tuple
+import threading
+import hashlib
+
+from easy_fnc.executor import build_dependency_graph, copy_kwargs
+
+if TYPE_CHECKING:
+    from easy_fnc.schemas import FunctionCall, ModelResponse
+
+# Define constants
+DEFAULT_MAX_PLANS = 256
+
+class CompiledCall(NamedTuple):
+    """
+    A function call of a compiled plan.
+
+    `slots` are the paths of every string in the kwargs, including inside
+    lists, together with the string; each one that names an output when the
+    call runs is replaced by that output. `nested` tells whether any path
+    goes into a dict or list, so the kwargs need a deep copy.
+    """
+    function_call: FunctionCall
+    function: Optional[Callable]
+    slots: Tuple[Tuple[Tuple[Any, ...], str], ...]
+    nested: bool
+
+    def resolve(self, outputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Return new kwargs with the slots that name an output replaced by it.
+
+        The kwargs of the compiled call are never modified, so the plan can
+        run again.
+        """
+        kwargs = self.function_call.kwargs
+        if not self.nested:
+            function_input = dict(kwargs)
+            for (key,), name in self.slots:
+                if name in outputs:
+                    function_input[key] = outputs[name]
+            return function_input
+
+        function_input = copy_kwargs(kwargs)
+        for path, name in self.slots:
+            if name in outputs:
+                container = function_input
+                for key in path[:-1]:
+                    container = container[key]
+                container[path[-1]] = outputs[name]
+        return function_input
+
+class CompiledPlan(NamedTuple):
+    """
+    A parsed model response, ready to run any number of times.
+
+    Holds the thoughts, the function calls with their reference slots and
+    bound functions, and the dependency graph of the calls.
+    """
+    thoughts: str
+    calls: Tuple[CompiledCall, ...]
+    dependencies: Tuple[frozenset, ...]
+
+    @property
+    def function_calls(self) -> List[FunctionCall]:
+        """
+        Fresh copies of the function calls, which may be modified by the caller.
+        """
+        from easy_fnc.schemas import FunctionCall
+
+        return [
+            FunctionCall.model_construct(name=call.function_call.name, kwargs=copy_kwargs(call.function_call.kwargs), returns=list(call.function_call.returns))
+            for call in self.calls
+        ]
+
+def compile_plan(response: ModelResponse, functions: Dict[str, Callable]) -> CompiledPlan:
+    """
+    Compile a parsed model response into a plan, binding the functions by name.
+    """
+    calls = []
+    for function_call in response.function_calls:
+        slots: List[Tuple[Tuple[Any, ...], str]] = []
+        _collect_slots(function_call.kwargs, (), slots)
+        calls.append(CompiledCall(
+            function_call=function_call,
+            function=functions.get(function_call.name),
+            slots=tuple(slots),
+            nested=any(len(path) > 1 for path, _ in slots)
+        ))
+    dependencies = build_dependency_graph(response.function_calls)
+    return CompiledPlan(response.thoughts, tuple(calls), tuple(map(frozenset, dependencies)))
+
+def _collect_slots(value: Any, path: Tuple[Any, ...], slots: List[Tuple[Tuple[Any, ...], str]]) -> None:
+    """Collect the path of every string in a kwargs value."""
+    if isinstance(value, str):
+        slots.append((path, value))
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            _collect_slots(item, path + (key,), slots)
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            _collect_slots(item, path + (index,), slots)
+
+def hash_response(raw_response: str) -> bytes:
+    """
+    Return the hash that keys a raw response in the plan cache.
+    """
+    return hashlib.blake2b(raw_response.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+class PlanCache:
+    """
+    A thread-safe LRU cache of compiled plans, keyed by the hash of the raw response.
+    """
+    def __init__(self, max_entries: int = DEFAULT_MAX_PLANS) -> None:
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._plans: "OrderedDict[bytes, CompiledPlan]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def get(self, key: bytes) -> Optional[CompiledPlan]:
+        """
+        Return the plan of a response hash, or None if it is not cached.
+        """
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is None:
+                self.misses += 1
+                return None
+            self._plans.move_to_end(key)
+            self.hits += 1
+            return plan
+
+    def put(self, key: bytes, plan: CompiledPlan) -> None:
+        """
+        Cache the plan of a response hash, evicting the least recently used plans.
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Dict, Callable, Any, NamedTuple, Optional, Tuple
+import threading
+import weakref
+import pickle
+import os
+
+from easy_fnc.utils import SYNTHETIC_MODULE_PREFIX
+
+# multiprocessing is only loaded once a function runs in a worker
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+# Define constants
+DEFAULT_SHARED_MEMORY_THRESHOLD = 1024 * 1024
+
+class SharedBuffer(NamedTuple):
+    """
+    A large output of a worker, left in a shared memory block for the parent to read.
+
+    `kind` is "bytes", "bytearray" or "ndarray"; arrays also carry their
+    dtype and shape.
+    """
+    name: str
+    size: int
+    kind: str
+    dtype: Optional[str] = None
+    shape: Optional[Tuple[int, ...]] = None
+
+def cpu_bound(function: Callable) -> Callable:
+    """
+    Mark a function as CPU-bound, so that the engine runs it in its process pool.
+    """
+    function.__easy_fnc_process__ = True
+    return function
+
+def is_cpu_bound(function: Callable) -> bool:
+    """
+    Return whether a function was marked with `cpu_bound`.
+    """
+    return getattr(function, "__easy_fnc_process__", False)
+
+def check_picklable(function_name: str, function: Callable) -> None:
+    """
+    Check that a function can be sent to a worker process, raising a ValueError if not.
+
+    Functions are pickled by reference, so they must be defined at the top
+    level of a module that a worker can import by name; lambdas, nested
+    functions and functions of a file loaded from outside of `sys.path`
+    cannot run in a worker.
+    """
+    try:
+        restored = pickle.loads(pickle.dumps(function))
+    except (pickle.PicklingError, AttributeError, TypeError, ImportError) as e:
+        raise ValueError(f"Function '{function_name}' cannot run in a process pool, it is not picklable: {e}") from e
+    if restored is not function:
+        raise ValueError(f"Function '{function_name}' cannot run in a process pool, it does not unpickle to the same function")
+    module_name = getattr(function, "__module__", None) or ""
+    if module_name.startswith(SYNTHETIC_MODULE_PREFIX):
+        raise ValueError(
+            f"Function '{function_name}' cannot run in a process pool, its file is not under an entry of sys.path, "
+            "so worker processes cannot import it; add its directory to sys.path"
+        )
+
+def _run_in_worker(function: Callable, kwargs: Dict[str, Any], shared_memory_threshold: int) -> Any:
+    """Call a function in a worker, moving a large bytes or array output into shared memory."""
+    output = function(**kwargs)
+    if isinstance(output, (bytes, bytearray)):
+        kind, dtype, shape, size = type(output).__name__, None, None, len(output)
+    elif type(output).__module__ == "numpy" and type(output).__name__ == "ndarray" and not output.dtype.hasobject:
+        kind, dtype, shape, size = "ndarray", output.dtype.str, output.shape, output.nbytes
+    else:
+        return output
+    if size < shared_memory_threshold:
+        return output
+
+    from multiprocessing import shared_memory
+
+    block = shared_memory.SharedMemory(create=True, size=size)
+    try:
+        if kind == "ndarray":
+            import numpy
+            # Copied straight into the block, whatever the memory layout of the output
+            view = numpy.ndarray(shape, dtype=dtype, buffer=block.buf)
+            numpy.copyto(view, output)
+            del view
+        else:
+            block.buf[:size] = output
+    except BaseException:
+        block.close()
+        block.unlink()
+        raise
+    block.close()
+    return SharedBuffer(block.name, size, kind, dtype, shape)
+
+class _SharedArray:
+    """
+    Exposes an array in a shared memory block to numpy, and closes the block
+    once the last array viewing it is freed.
+    """
+    def __init__(self, block: Any, dtype: str, shape: Tuple[int, ...]) -> None:
+        import numpy
+        view = numpy.ndarray(shape, dtype=dtype, buffer=block.buf)
+        self.__array_interface__ = view.__array_interface__
+        # The view must be released before the block can be closed
+        del view
+        finalizer = weakref.finalize(self, block.close)
+        # At exit, arrays may still view the block, which then cannot be closed
+        finalizer.atexit = False
+
+def _read_shared_buffer(buffer: SharedBuffer) -> Any:
+    """
+    Read an output out of its shared memory block and free the block.
+
+    Bytes are copied out of the block once. Arrays are not copied: the
+    returned array views the block, which is unlinked at once and closed
+    when the array and every view of it are freed.
+    """
+    from multiprocessing import shared_memory
+
+    block = shared_memory.SharedMemory(name=buffer.name)
+    # The name is removed at once, the memory stays mapped until the block is closed
+    block.unlink()
+    if buffer.kind == "ndarray":
+        import numpy
+        try:
+            return numpy.asarray(_SharedArray(block, buffer.dtype, buffer.shape))
+        except BaseException:
+            block.close()
+            raise
+    data = block.buf[:buffer.size]
+    try:
+        return bytes(data) if buffer.kind == "bytes" else bytearray(data)
+    finally:
+        data.release()
+        block.close()
+
+class ProcessPoolBackend:
+    """
+    Runs CPU-bound functions in a persistent pool of worker processes.
+
+    The pool is started on first use and reused by every call. Bytes and
+    array outputs of at least `shared_memory_threshold` bytes are returned
+    through a shared memory block instead of being pickled through the
+    pool's result pipe; other outputs are pickled.
+    """
+    def __init__(
+            self,
+            max_workers: Optional[int] = None,
+            shared_memory_threshold: int = DEFAULT_SHARED_MEMORY_THRESHOLD
+        ) -> None:
+        self.max_workers = max_workers
+        self.shared_memory_threshold = shared_memory_threshold
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, function: Callable, kwargs: Dict[str, Any]) -> Future:
+        """
+        Start a call in a worker; pass the result of the future to `receive`.
+        """
+        from concurrent.futures.process import BrokenProcessPool
+
+        executor = self._get_executor()
+        try:
+            future = executor.submit(_run_in_worker, function, kwargs, self.shared_memory_threshold)
+        except BrokenProcessPool:
+            # A worker died since the last call, so the call goes to a new pool
+            self._discard(executor)
+            executor = self._get_executor()
+            future = executor.submit(_run_in_worker, function, kwargs, self.shared_memory_threshold)
+        future.add_done_callback(lambda future: self._check_broken(executor, future))
+        return future
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Return the pool, starting it if needed."""
+        with self._lock:
+            if self._executor is None:
+                from concurrent.futures import ProcessPoolExecutor
+                if os.name == "posix":
+                    from multiprocessing import resource_tracker
+                    # Forked workers then share the resource tracker of this process, which tracks
+                    # the blocks they return until they are unlinked here, and cleans them up if this
+                    # process dies first; a tracker of their own would unlink them when they exit
+                    resource_tracker.ensure_running()
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def _check_broken(self, executor: ProcessPoolExecutor, future: Future) -> None:
+        """Discard the pool of a call that failed because a worker died, so the next call starts a new one."""
+        from concurrent.futures.process import BrokenProcessPool
+
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            self._discard(executor)
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        """Stop a broken pool, unless it was already replaced."""
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+        executor.shutdown(wait=False)
+
+    def receive(self, output: Any) -> Any:
+        """
+        Return the output of a finished call, reading it from shared memory if needed.
+        """
+        return _read_shared_buffer(output) if isinstance(output, SharedBuffer) else output
+
+    def call(self, function: Callable, kwargs: Dict[str, Any]) -> Any:
+        """
+        Call a function in a worker and wait for its output.
+        """
+        return self.receive(self.submit(function, kwargs).result())
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the worker processes; the pool is started again on the next call.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
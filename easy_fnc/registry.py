@@ -0,0 +1,69 @@
+from collections.abc import Mapping
+from typing import Dict, Callable, Iterator, Optional
+import functools
+
+from easy_fnc.core_utils import get_core_utils
+from easy_fnc.functions import get_user_defined_functions
+from easy_fnc.process_pool import check_picklable, is_cpu_bound
+
+class FunctionRegistry(Mapping):
+    """
+    An immutable mapping of function names to functions, shared between
+    engines and threads.
+
+    The functions are loaded once, and every engine created from the
+    registry starts from a copy of them instead of loading them again.
+    Adding functions returns a new registry, so a registry never changes
+    under the engines and threads that hold it.
+    """
+    __slots__ = ("_functions",)
+
+    def __init__(self, functions: Optional[Mapping] = None) -> None:
+        self._functions: Dict[str, Callable] = dict(functions or {})
+
+    def __getitem__(self, name: str) -> Callable:
+        return self._functions[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._functions)
+
+    def __len__(self) -> int:
+        return len(self._functions)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._functions
+
+    def __repr__(self) -> str:
+        return f"FunctionRegistry({list(self._functions)})"
+
+    def get(self, name: str, default: Optional[Callable] = None) -> Optional[Callable]:
+        return self._functions.get(name, default)
+
+    def copy(self) -> Dict[str, Callable]:
+        """
+        Return the functions as a new dict, which may be modified by the caller.
+        """
+        return self._functions.copy()
+
+    def with_functions(self, functions: Mapping) -> "FunctionRegistry":
+        """
+        Return a new registry with the given functions added, replacing those of the same name.
+        """
+        return FunctionRegistry({**self._functions, **functions})
+
+    def with_user_functions(self, file_path: str) -> "FunctionRegistry":
+        """
+        Return a new registry with the user-defined functions from the specified file path added.
+        """
+        user_functions = get_user_defined_functions(file_path)
+        for name, function in user_functions.items():
+            if is_cpu_bound(function):
+                check_picklable(name, function)
+        return self.with_functions(user_functions)
+
+@functools.lru_cache(maxsize=None)
+def core_utils_registry() -> FunctionRegistry:
+    """
+    Return the process-wide registry of the core utility functions.
+    """
+    return FunctionRegistry(get_core_utils())
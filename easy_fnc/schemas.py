@@ -70,9 +70,9 @@ class ModelResponse(BaseModel):
                 raise ValueError("No thoughts or function calls found in the raw response.")
         
             function_calls_loaded = json.loads(function_calls_str)
-            function_calls = [FunctionCall.from_dict(data) for data in function_calls_loaded]
-            
-            return cls(thoughts=thoughts, function_calls=function_calls)
+
+            # Validate all function calls in a single pass
+            return cls.model_validate({"thoughts": thoughts, "function_calls": function_calls_loaded})
         except json.JSONDecodeError as e:
             logger.error(f"Error parsing function calls from the raw response: {str(e)}")
             raise
@@ -0,0 +1,148 @@
+from typing import List, Optional
+import json
+import logging
+
+from easy_fnc.schemas import FunctionCall, ModelResponse
+from easy_fnc.utils import THOUGHTS_START, THOUGHTS_END, FUNCTION_CALLS_START, FUNCTION_CALLS_END
+
+logger = logging.getLogger(__name__)
+
+class StreamingResponseParser:
+    """
+    Incremental parser for streamed model responses.
+
+    Tokens are passed to `feed` as they arrive. The parser recognises the
+    thoughts and function calls blocks and returns every `FunctionCall` as
+    soon as its JSON object closes, so it can be executed while the model is
+    still generating the rest of the response.
+    """
+    def __init__(self) -> None:
+        self.thoughts: str = ""
+        self.function_calls: List[FunctionCall] = []
+        self._state: str = "outside"
+        self._buffer: str = ""
+        self._position: int = 0
+        self._depth: int = 0
+        self._in_string: bool = False
+        self._escaped: bool = False
+        self._object_start: Optional[int] = None
+
+    @property
+    def done(self) -> bool:
+        """Whether the end of the function calls block has been reached."""
+        return self._state == "done"
+
+    def feed(self, chunk: str) -> List[FunctionCall]:
+        """
+        Feed a chunk of the response and return the function calls completed by it.
+        """
+        if self._state == "done":
+            return []
+
+        self._buffer += chunk
+        completed: List[FunctionCall] = []
+        while self._state != "done":
+            if self._state == "outside":
+                progressed = self._find_block_start()
+            elif self._state == "thoughts":
+                progressed = self._read_thoughts()
+            else:
+                progressed = self._read_function_calls(completed)
+            if not progressed:
+                break
+
+        self._compact()
+        return completed
+
+    def close(self) -> ModelResponse:
+        """
+        Finish parsing and return the parsed response.
+        """
+        if self._state == "thoughts":
+            self.thoughts += self._buffer[self._position:]
+        if self._object_start is not None:
+            logger.error("Streamed response ended inside a function call")
+        if not self.thoughts and not self.function_calls:
+            raise ValueError("No thoughts or function calls found in the streamed response.")
+        return ModelResponse(thoughts=self.thoughts.strip(), function_calls=self.function_calls)
+
+    def _find_block_start(self) -> bool:
+        """Skip text until the start of the thoughts or function calls block."""
+        starts = [
+            (index, marker, state)
+            for marker, state in ((THOUGHTS_START, "thoughts"), (FUNCTION_CALLS_START, "function_calls"))
+            if (index := self._buffer.find(marker, self._position)) != -1
+        ]
+        if starts:
+            index, marker, state = min(starts)
+            self._position = index + len(marker)
+            self._state = state
+            return True
+        self._position = max(self._position, len(self._buffer) - len(FUNCTION_CALLS_START) + 1)
+        return False
+
+    def _read_thoughts(self) -> bool:
+        """Accumulate the thoughts until the end of the thoughts block."""
+        index = self._buffer.find(THOUGHTS_END, self._position)
+        if index != -1:
+            self.thoughts += self._buffer[self._position:index]
+            self._position = index + len(THOUGHTS_END)
+            self._state = "outside"
+            return True
+        safe_end = max(self._position, len(self._buffer) - len(THOUGHTS_END) + 1)
+        self.thoughts += self._buffer[self._position:safe_end]
+        self._position = safe_end
+        return False
+
+    def _read_function_calls(self, completed: List[FunctionCall]) -> bool:
+        """Scan the function calls block and emit every JSON object that closes."""
+        buffer = self._buffer
+        position = self._position
+        while position < len(buffer):
+            char = buffer[position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                if self._depth == 0:
+                    self._object_start = position
+                self._depth += 1
+            elif char == "}" and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.append(self._emit(buffer[self._object_start:position + 1]))
+                    self._object_start = None
+            elif char == "<" and self._depth == 0:
+                if buffer.startswith(FUNCTION_CALLS_END, position):
+                    self._position = position + len(FUNCTION_CALLS_END)
+                    self._state = "done"
+                    return True
+                if FUNCTION_CALLS_END.startswith(buffer[position:]):
+                    break
+            position += 1
+        self._position = position
+        return False
+
+    def _emit(self, raw_function_call: str) -> FunctionCall:
+        """Create a FunctionCall from a complete JSON object."""
+        try:
+            function_call = FunctionCall.from_dict(json.loads(raw_function_call))
+        except json.JSONDecodeError as e:
+            logger.error(f"Error parsing streamed function call: {str(e)}")
+            raise
+        self.function_calls.append(function_call)
+        return function_call
+
+    def _compact(self) -> None:
+        """Drop the part of the buffer that has already been consumed."""
+        keep_from = self._position if self._object_start is None else self._object_start
+        self._buffer = self._buffer[keep_from:]
+        self._position -= keep_from
+        if self._object_start is not None:
+            self._object_start = 0
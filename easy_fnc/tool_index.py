@@ -0,0 +1,122 @@
+from collections import Counter
+from typing import Dict, List, Iterable, Optional, Tuple
+import heapq
+import math
+import re
+
+from easy_fnc.schemas import FunctionMetadata
+
+# Define constants
+DEFAULT_K1 = 1.5
+DEFAULT_B = 0.75
+TOKEN_PATTERN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "i", "in", "is", "it",
+    "me", "my", "of", "on", "or", "please", "the", "to", "what", "whats", "with", "you",
+})
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split a text into lowercase terms, breaking up snake_case and camelCase
+    names, dropping stopwords and a plural "s".
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text):
+        term = token.lower()
+        if term in STOPWORDS:
+            continue
+        if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+            term = term[:-1]
+        terms.append(term)
+    return terms
+
+def _document_terms(function: FunctionMetadata) -> List[str]:
+    """The terms of a function: its name, description and parameter names."""
+    parameters = function.parameters.get("properties", {})
+    return tokenize(" ".join([function.name, function.description, *parameters]))
+
+class ToolIndex:
+    """
+    A BM25 index of functions metadata, to select the tools relevant to a query.
+
+    Each function is indexed by the terms of its name, description and
+    parameter names. Functions can be added, replaced and removed one at a
+    time; the index keeps term frequencies and document lengths, so updates
+    do not rebuild it.
+    """
+    def __init__(self, functions: Iterable[FunctionMetadata] = (), k1: float = DEFAULT_K1, b: float = DEFAULT_B) -> None:
+        self.k1 = k1
+        self.b = b
+        self.functions: Dict[str, FunctionMetadata] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        self._total_length = 0
+        self.add(functions)
+
+    def __len__(self) -> int:
+        return len(self.functions)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.functions
+
+    def add(self, functions: Iterable[FunctionMetadata]) -> None:
+        """
+        Add functions to the index, replacing indexed functions of the same name.
+        """
+        for function in functions:
+            if function.name in self.functions:
+                self.remove(function.name)
+            terms = Counter(_document_terms(function))
+            for term, count in terms.items():
+                self._postings.setdefault(term, {})[function.name] = count
+            length = sum(terms.values())
+            self._lengths[function.name] = length
+            self._total_length += length
+            self.functions[function.name] = function
+
+    def remove(self, name: str) -> None:
+        """
+        Remove a function from the index.
+        """
+        function = self.functions.pop(name)
+        for term in set(_document_terms(function)):
+            postings = self._postings[term]
+            del postings[name]
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(name)
+
+    def search(self, query: str, k: int) -> List[Tuple[FunctionMetadata, float]]:
+        """
+        Return the k functions with the highest BM25 score for a query, with
+        their scores. Functions that share no term with the query are not returned.
+        """
+        if not self.functions:
+            return []
+        num_functions = len(self.functions)
+        average_length = self._total_length / num_functions or 1
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (num_functions - len(postings) + 0.5) / (len(postings) + 0.5))
+            for name, count in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[name] / average_length)
+                scores[name] = scores.get(name, 0.0) + idf * count * (self.k1 + 1) / (count + norm)
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.functions[name], score) for name, score in top]
+
+    def select(self, query: str, k: int, always_include: Optional[Iterable[str]] = None) -> List[FunctionMetadata]:
+        """
+        Return the k most relevant functions for a query, plus the functions
+        named in `always_include`, in the order they were added.
+
+        Only functions that share a term with the query are selected, so the
+        selection can be smaller than k, or empty; falling back to other
+        functions is left to the caller. Keeping the catalog order makes the
+        prompt for the same selection byte-identical, whatever the scores.
+        """
+        selected = {function.name for function, _ in self.search(query, k)}
+        selected.update(name for name in always_include or () if name in self.functions)
+        return [function for name, function in self.functions.items() if name in selected]
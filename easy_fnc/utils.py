@@ -1,10 +1,73 @@
 import json
-import tomllib
-import re
+import sys
 import os
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 
 # Define constants
 TEMPLATE_FILE_TYPES = ["json", "toml"]
+SYNTHETIC_MODULE_PREFIX = "_easy_fnc_"
+THOUGHTS_START = "<|thoughts|>"
+THOUGHTS_END = "<|end_thoughts|>"
+FUNCTION_CALLS_START = "<|function_calls|>"
+FUNCTION_CALLS_END = "<|end_function_calls|>"
+ANSWER_START = "<|answer|>"
+ANSWER_END = "<|end_answer|>"
+RESPONSE_BLOCKS = {
+    "function_calls": (FUNCTION_CALLS_START, FUNCTION_CALLS_END),
+    "answer": (ANSWER_START, ANSWER_END),
+}
+
+class ResponseBlock(NamedTuple):
+    """A thoughts block followed by a function calls block, with its character offsets."""
+    thoughts: str
+    function_calls: str
+    start: int
+    end: int
+
+class MalformedRegion(NamedTuple):
+    """A region of the response that could not be extracted, with its character and byte offsets."""
+    start: int
+    end: int
+    byte_start: int
+    byte_end: int
+    reason: str
+
+class ScanResult(NamedTuple):
+    """The result of scanning a raw model response."""
+    blocks: List[ResponseBlock]
+    malformed: List[MalformedRegion]
+
+def close_open_block(response: str, blocks: List[Tuple[str, str]]) -> str:
+    """
+    Append the end marker of a block the response leaves open.
+
+    Backends drop the stop sequence that ended the generation, so a response
+    stopped at e.g. `<|end_function_calls|>` ends inside its block.
+
+    Args:
+    - response (str):
+        The response of the backend.
+    - blocks (List[Tuple[str, str]]):
+        The start and end markers of the blocks that end a response.
+    """
+    for start_marker, end_marker in blocks:
+        if response.rfind(start_marker) > response.rfind(end_marker):
+            return response.rstrip() + "\n" + end_marker
+    return response
+
+def get_response_blocks(template: dict) -> Dict[str, Tuple[str, str]]:
+    """
+    Return the start and end markers of the blocks that end a response, the
+    function calls and answer blocks, from the `response_blocks` table of a
+    template; the markers it does not list default to the ones the responses
+    are parsed with.
+    """
+    blocks = dict(RESPONSE_BLOCKS)
+    for name, markers in template.get("response_blocks", {}).items():
+        if len(markers) != 2:
+            raise ValueError(f"Expected the start and end markers of the {name} block, got {markers}")
+        blocks[name] = (markers[0], markers[1])
+    return blocks
 
 def get_template_path():
     """
@@ -17,12 +80,13 @@ def get_template_path():
     return os.path.join(current_dir, "models", "templates", "base.toml")
 
 def load_template(
-        file_path: str = get_template_path(),
+        file_path: Optional[str] = None,
         file_type: str = "toml"
     ) -> dict:
     """
     Load a template from a JSON file and return it as a dictionary.
     """
+    file_path = file_path or get_template_path()
     if file_type not in TEMPLATE_FILE_TYPES:
         raise ValueError(f"Invalid file type. Expected one of {TEMPLATE_FILE_TYPES}")
     if file_type == "json":
@@ -46,6 +110,8 @@ def load_toml(file_path: str) -> dict:
     """
     Load a TOML file and return it as a dictionary.
     """
+    import tomllib
+
     try:
         with open(file_path, "rb") as file:
             data = tomllib.load(file)
@@ -55,16 +121,131 @@ def load_toml(file_path: str) -> dict:
         raise tomllib.TOMLDecodeError(f"Error decoding TOML file {file_path}")
     return data
 
+def scan_response(raw_response: str) -> ScanResult:
+    """
+    Scan the raw model response for every thoughts and function calls block.
+
+    The scan is a single forward pass that never revisits a character more
+    than a constant number of times, so it runs in linear time even on large
+    or malformed responses. Regions that could not be extracted (a missing end
+    marker, a repeated start marker or a thoughts block that is not followed
+    by a function calls block) are reported with their offsets.
+    """
+    blocks: List[ResponseBlock] = []
+    malformed: List[MalformedRegion] = []
+    byte_offsets = _ByteOffsets(raw_response)
+
+    def mark_malformed(start: int, end: int, reason: str) -> None:
+        malformed.append(MalformedRegion(start, end, byte_offsets(start), byte_offsets(end), reason))
+
+    length = len(raw_response)
+    position = 0
+    while True:
+        start = raw_response.find(THOUGHTS_START, position)
+        if start == -1:
+            break
+
+        thoughts_end = raw_response.find(THOUGHTS_END, start + len(THOUGHTS_START))
+        if thoughts_end == -1:
+            mark_malformed(start, length, "unterminated thoughts block")
+            break
+
+        restart = raw_response.rfind(THOUGHTS_START, start + len(THOUGHTS_START), thoughts_end)
+        if restart != -1:
+            mark_malformed(start, restart, "repeated thoughts start marker")
+            start = restart
+
+        position = thoughts_end + len(THOUGHTS_END)
+        while position < length and raw_response[position].isspace():
+            position += 1
+
+        if not raw_response.startswith(FUNCTION_CALLS_START, position):
+            mark_malformed(start, position, "thoughts block not followed by a function calls block")
+            continue
+
+        function_calls_end = raw_response.find(FUNCTION_CALLS_END, position + len(FUNCTION_CALLS_START))
+        if function_calls_end == -1:
+            mark_malformed(start, length, "unterminated function calls block")
+            break
+
+        end = function_calls_end + len(FUNCTION_CALLS_END)
+        blocks.append(ResponseBlock(
+            thoughts=raw_response[start + len(THOUGHTS_START):thoughts_end].strip(),
+            function_calls=raw_response[position + len(FUNCTION_CALLS_START):function_calls_end].strip(),
+            start=start,
+            end=end
+        ))
+        position = end
+
+    return ScanResult(blocks, malformed)
+
+def approximate_size(value: Any) -> int:
+    """
+    Approximate the memory used by a value, in bytes, including the items of
+    the lists, tuples, sets and dicts it contains.
+    """
+    seen = set()
+    size = 0
+    stack = [value]
+    while stack:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        size += sys.getsizeof(item)
+        if isinstance(item, dict):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            stack.extend(item)
+    return size
+
 def extract_thoughts_and_function_calls(raw_response: str) -> tuple[str, str]:
     """
     Extract the thoughts and function calls from the raw model response.
     """
-    pattern = r'<\|thoughts\|>(.*?)<\|end_thoughts\|>\s*<\|function_calls\|>(.*?)<\|end_function_calls\|>'
-    match = re.search(pattern, raw_response, re.DOTALL)
-    
-    if match:
-        thoughts = match.group(1).strip()
-        function_calls = match.group(2).strip()
-        return thoughts, function_calls
+    blocks = scan_response(raw_response).blocks
+    if blocks:
+        return blocks[0].thoughts, blocks[0].function_calls
     else:
-        return "", ""
\ No newline at end of file
+        return "", ""
+
+def extract_all_thoughts_and_function_calls(raw_response: str) -> tuple[str, str]:
+    """
+    Extract the thoughts and function calls from every block of the raw model response.
+
+    The thoughts are joined with newlines and the function call lists are
+    merged into a single list, so this can be used as the extraction function
+    of a FunctionCallingEngine.
+    """
+    blocks = scan_response(raw_response).blocks
+    if not blocks:
+        return "", ""
+
+    function_calls = [
+        block.function_calls[1:-1].strip()
+        if block.function_calls.startswith("[") and block.function_calls.endswith("]")
+        else block.function_calls
+        for block in blocks
+    ]
+    return (
+        "\n".join(block.thoughts for block in blocks),
+        "[" + ", ".join(calls for calls in function_calls if calls) + "]"
+    )
+
+class _ByteOffsets:
+    """
+    Converts increasing character offsets to UTF-8 byte offsets, encoding
+    each part of the text only once.
+    """
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.character_offset = 0
+        self.byte_offset = 0
+
+    def __call__(self, character_offset: int) -> int:
+        if character_offset < self.character_offset:
+            return len(self.text[:character_offset].encode("utf-8"))
+        self.byte_offset += len(self.text[self.character_offset:character_offset].encode("utf-8"))
+        self.character_offset = character_offset
+        return self.byte_offset
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Dict, List, Callable, Any, NamedTuple, Optional, Set, Tuple
+import typing
+import inspect
+
+from easy_fnc.executor import REMAINING_TIME_PARAMETER
+
+if TYPE_CHECKING:
+    from easy_fnc.schemas import FunctionCall
+
+# Define constants
+TRUE_STRINGS = {"true", "yes", "1"}
+FALSE_STRINGS = {"false", "no", "0"}
+
+class ArgumentError(NamedTuple):
+    """An invalid argument of a function call in a plan."""
+    call_index: int
+    function_name: str
+    argument: Optional[str]
+    message: str
+
+    def __str__(self) -> str:
+        location = f"{self.function_name}({self.argument})" if self.argument else self.function_name
+        return f"call {self.call_index} {location}: {self.message}"
+
+class FunctionCallValidationError(ValueError):
+    """Raised when the function calls of a plan have invalid arguments."""
+    def __init__(self, errors: List[ArgumentError]) -> None:
+        self.errors = errors
+        super().__init__("Invalid function calls:\n" + "\n".join(f"- {error}" for error in errors))
+
+def _coerce_int(value: Any) -> Any:
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return int(value.strip())
+    raise ValueError
+
+def _coerce_float(value: Any) -> Any:
+    if isinstance(value, bool):
+        raise ValueError
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        return float(value.strip())
+    raise ValueError
+
+def _coerce_bool(value: Any) -> Any:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in TRUE_STRINGS | FALSE_STRINGS:
+        return value.strip().lower() in TRUE_STRINGS
+    raise ValueError
+
+def _coerce_str(value: Any) -> Any:
+    if isinstance(value, str):
+        return value
+    raise ValueError
+
+def _check_type(expected_type: type) -> Callable[[Any], Any]:
+    def _check(value: Any) -> Any:
+        if isinstance(value, expected_type):
+            return value
+        raise ValueError
+    return _check
+
+COERCERS: Dict[Any, Callable[[Any], Any]] = {
+    int: _coerce_int,
+    float: _coerce_float,
+    bool: _coerce_bool,
+    str: _coerce_str,
+}
+
+class ArgumentValidator:
+    """
+    Validates and coerces the kwargs of calls to one function.
+
+    Compiled once from the signature and annotations of the function: the
+    required and accepted parameter names, and a coercer for every parameter
+    annotated with a simple type. `int`, `float`, `bool` and `str` values are
+    coerced from compatible values (e.g. "5" to 5), containers such as
+    `list[str]` or `dict[str, Any]` are only checked against their container
+    type, and other annotations are not checked.
+    """
+    def __init__(self, function: Callable) -> None:
+        try:
+            signature = inspect.signature(function, eval_str=True)
+        except (NameError, TypeError):
+            signature = inspect.signature(function)
+
+        self.required: List[str] = []
+        self.accepted: Set[str] = set()
+        self.accepts_any: bool = False
+        self.coercers: Dict[str, Tuple[str, Callable[[Any], Any]]] = {}
+        for name, parameter in signature.parameters.items():
+            if parameter.kind == inspect.Parameter.VAR_KEYWORD:
+                self.accepts_any = True
+                continue
+            if parameter.kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.VAR_POSITIONAL):
+                continue
+            self.accepted.add(name)
+            # The remaining time is passed by the engine, not by the model
+            if parameter.default is inspect.Parameter.empty and name != REMAINING_TIME_PARAMETER:
+                self.required.append(name)
+            coercer = _compile_coercer(parameter.annotation)
+            if coercer is not None:
+                self.coercers[name] = (_type_name(parameter.annotation), coercer)
+
+    def validate(self, kwargs: Dict[str, Any], references: Set[str]) -> Tuple[Dict[str, Any], List[Tuple[Optional[str], str]]]:
+        """
+        Validate the kwargs of a call and return the coerced kwargs and the errors.
+
+        String values in `references` name outputs of previous calls; they are
+        resolved at execution time, so their types are not checked.
+        """
+        errors: List[Tuple[Optional[str], str]] = []
+        coerced = dict(kwargs)
+        for name in self.required:
+            if name not in kwargs:
+                errors.append((name, "missing required argument"))
+        for name, value in kwargs.items():
+            if name not in self.accepted:
+                if not self.accepts_any:
+                    errors.append((name, "unexpected argument"))
+                continue
+            if name not in self.coercers or (isinstance(value, str) and value in references):
+                continue
+            type_name, coercer = self.coercers[name]
+            try:
+                coerced[name] = coercer(value)
+            except (ValueError, TypeError):
+                errors.append((name, f"expected {type_name}, got {type(value).__name__} {value!r}"))
+        return coerced, errors
+
+def _compile_coercer(annotation: Any) -> Optional[Callable[[Any], Any]]:
+    """Return the coercer for an annotation, or None if it is not checked."""
+    if annotation in COERCERS:
+        return COERCERS[annotation]
+    origin = typing.get_origin(annotation) or annotation
+    if origin in (list, dict, tuple, set):
+        return _check_type(origin)
+    return None
+
+def _type_name(annotation: Any) -> str:
+    """Return a readable name for an annotation."""
+    return annotation.__name__ if isinstance(annotation, type) else str(annotation)
+
+def validate_function_calls(
+        function_calls: List[FunctionCall],
+        get_validator: Callable[[str], Optional[ArgumentValidator]],
+        known_outputs: Callable[[str], bool]
+    ) -> None:
+    """
+    Validate every function call of a plan in one pass, before any of them runs.
+
+    The kwargs of valid calls are coerced in place. If any call is invalid,
+    a FunctionCallValidationError listing every error is raised.
+
+    Args:
+    - function_calls (List[FunctionCall]):
+        The function calls of the plan.
+    - get_validator (callable):
+        Returns the validator of a function name, or None if it is not registered.
+    - known_outputs (callable):
+        Whether a name is an output that exists before the plan runs.
+    """
+    errors: List[ArgumentError] = []
+    coerced_kwargs: List[Dict[str, Any]] = []
+    returned: Set[str] = set()
+    for index, function_call in enumerate(function_calls):
+        validator = get_validator(function_call.name)
+        if validator is None:
+            errors.append(ArgumentError(index, function_call.name, None, "function not found"))
+            coerced_kwargs.append(function_call.kwargs)
+        else:
+            references = {
+                value for value in function_call.kwargs.values()
+                if isinstance(value, str) and (value in returned or known_outputs(value))
+            }
+            coerced, call_errors = validator.validate(function_call.kwargs, references)
+            errors.extend(ArgumentError(index, function_call.name, name, message) for name, message in call_errors)
+            coerced_kwargs.append(coerced)
+        returned.update(function_call.returns)
+
+    if errors:
+        raise FunctionCallValidationError(errors)
+    for function_call, kwargs in zip(function_calls, coerced_kwargs):
+        function_call.kwargs = kwargs
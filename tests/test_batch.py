@@ -0,0 +1,75 @@
+import threading
+import time
+import unittest
+from easy_fnc.models.model import EasyFNCModel
+from easy_fnc.models.rate_limit import TokenBucket, retry_with_backoff
+
+class FakeModel(EasyFNCModel):
+    def __init__(self):
+        super().__init__([])
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.failures = {}
+
+    def generate(self, user_input: str, output_turn=None) -> str:
+        return self._chat([{"role": "user", "content": self.format_user_input(user_input)}])
+
+    def _chat(self, messages, structured=False):
+        content = messages[-1]["content"]
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            failures = self.failures.get(content, 0)
+            self.failures[content] = failures + 1
+        time.sleep(0.01)
+        with self.lock:
+            self.in_flight -= 1
+        if "flaky" in content and failures == 0:
+            raise ConnectionError("connection reset")
+        if "broken" in content:
+            raise ValueError("bad request")
+        return content.upper()
+
+class TestGenerateBatch(unittest.TestCase):
+    def test_results_in_input_order_with_bounded_concurrency(self):
+        model = FakeModel()
+        queries = [f"query {i}" for i in range(20)]
+        responses = model.generate_batch(queries, max_concurrency=4)
+        self.assertEqual(responses, [model.format_user_input(q).upper() for q in queries])
+        self.assertLessEqual(model.max_in_flight, 4)
+        self.assertGreater(model.max_in_flight, 1)
+        self.assertEqual(len(model.messages), 1)
+
+    def test_retries_retryable_errors(self):
+        model = FakeModel()
+        responses = model.generate_batch(["flaky"], max_retries=1)
+        self.assertEqual(responses, [model.format_user_input("flaky").upper()])
+
+    def test_errors(self):
+        model = FakeModel()
+        with self.assertRaises(ValueError):
+            model.generate_batch(["ok", "broken"])
+        responses = model.generate_batch(["ok", "broken"], return_exceptions=True)
+        self.assertIsInstance(responses[1], ValueError)
+        self.assertEqual(model.failures[model.format_user_input("broken")], 2)
+
+class TestRateLimit(unittest.TestCase):
+    def test_token_bucket_throttles(self):
+        bucket = TokenBucket(rate=100, capacity=1)
+        start = time.monotonic()
+        for _ in range(6):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.045)
+
+    def test_retry_gives_up_on_non_retryable(self):
+        calls = []
+        def fail():
+            calls.append(1)
+            raise ValueError()
+        with self.assertRaises(ValueError):
+            retry_with_backoff(fail, lambda e: isinstance(e, ConnectionError), max_retries=3)
+        self.assertEqual(len(calls), 1)
+
+if __name__ == '__main__':
+    unittest.main()
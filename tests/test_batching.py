@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import unittest
+from easy_fnc.function_caller import FunctionCallingEngine
+from easy_fnc.schemas import FunctionCall
+
+class TestBatching(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+        def forecast(city: str) -> str:
+            return f"sunny in {city}"
+        def forecast_batch(inputs: list) -> list:
+            self.batches.append([kwargs['city'] for kwargs in inputs])
+            return [f"sunny in {kwargs['city']}" for kwargs in inputs]
+        def upper(text: str) -> str:
+            return text.upper()
+        self.engine = FunctionCallingEngine(auto_load_core_utils=False)
+        self.engine.functions.update({'forecast': forecast, 'upper': upper})
+        self.engine.register_batch_function('forecast', forecast_batch)
+
+    def plan(self):
+        return [
+            FunctionCall(name='forecast', kwargs={'city': 'Paris'}, returns=['paris']),
+            FunctionCall(name='upper', kwargs={'text': 'paris'}, returns=['city']),
+            FunctionCall(name='forecast', kwargs={'city': 'Rome'}, returns=['rome']),
+            FunctionCall(name='forecast', kwargs={'city': 'city'}, returns=['shouted']),
+            FunctionCall(name='forecast', kwargs={'city': 'Oslo'}, returns=['oslo']),
+        ]
+
+    def expected(self):
+        serial = FunctionCallingEngine(auto_load_core_utils=False)
+        serial.functions.update(self.engine.functions)
+        return dict(serial.call_functions(self.plan()))
+
+    def test_serial_coalescing(self):
+        outputs = self.engine.call_functions(self.plan())
+        self.assertEqual(dict(outputs), self.expected())
+        self.assertEqual(self.batches, [['Paris', 'Rome', 'Oslo'], ['SUNNY IN PARIS']])
+
+    def test_parallel_coalescing(self):
+        outputs = self.engine.call_functions(self.plan(), parallel=True)
+        self.assertEqual(dict(outputs), self.expected())
+        self.assertEqual(self.batches, [['Paris', 'Rome', 'Oslo'], ['SUNNY IN PARIS']])
+
+    def test_async_coalescing(self):
+        outputs = asyncio.run(self.engine.acall_functions(self.plan()))
+        self.assertEqual(dict(outputs), self.expected())
+        self.assertEqual(self.batches, [['Paris', 'Rome', 'Oslo'], ['SUNNY IN PARIS']])
+
+    def test_async_batch_error(self):
+        self.engine.register_batch_function('forecast', lambda inputs: [])
+        with self.assertRaises(ValueError):
+            asyncio.run(self.engine.acall_functions(self.plan()))
+
+    def test_window_coalesces_async_plans(self):
+        self.engine.register_batch_function('forecast', self.engine.batch_policies['forecast'].batch_function, window=0.2)
+
+        async def run_plans():
+            calls = [[FunctionCall(name='forecast', kwargs={'city': city}, returns=[city])] for city in ('Paris', 'Rome')]
+            return await asyncio.gather(*(self.engine.acall_functions(plan, context=self.engine.create_context()) for plan in calls))
+
+        paris, rome = asyncio.run(run_plans())
+        self.assertEqual(len(self.batches), 1)
+        self.assertEqual(sorted(self.batches[0]), ['Paris', 'Rome'])
+        self.assertEqual(rome['Rome'], 'sunny in Rome')
+
+    def test_max_batch_size(self):
+        self.engine.register_batch_function('forecast', self.engine.batch_policies['forecast'].batch_function, max_batch_size=2)
+        self.engine.call_functions(self.plan())
+        self.assertEqual(self.batches, [['Paris', 'Rome'], ['Oslo'], ['SUNNY IN PARIS']])
+
+    def test_wrong_number_of_outputs(self):
+        self.engine.register_batch_function('forecast', lambda inputs: [])
+        with self.assertRaises(ValueError):
+            self.engine.call_functions(self.plan())
+
+    def test_window_coalesces_concurrent_plans(self):
+        self.engine.register_batch_function('forecast', self.engine.batch_policies['forecast'].batch_function, window=0.2)
+        barrier = threading.Barrier(2)
+        results = {}
+        def run(city):
+            barrier.wait()
+            calls = [FunctionCall(name='forecast', kwargs={'city': city}, returns=[city])]
+            results[city] = self.engine.call_functions(calls)[city]
+        threads = [threading.Thread(target=run, args=(city,)) for city in ('Paris', 'Rome')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.batches), 1)
+        self.assertEqual(sorted(self.batches[0]), ['Paris', 'Rome'])
+        self.assertEqual(results['Rome'], 'sunny in Rome')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from benchmarks import run
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_json_output_and_baseline_comparison(self):
+        with tempfile.TemporaryDirectory() as directory:
+            results_path = os.path.join(directory, "results.json")
+            arguments = ["--scenarios", "small", "--min-time", "0.001", "--repeat", "1"]
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertEqual(run.main(arguments + ["--json", results_path]), 0)
+            with open(results_path) as file:
+                results = json.load(file)["results"]
+            self.assertIn("small/map_previous_outputs", results)
+            self.assertIn("small/generate_system_prompt", results)
+
+            for result in results.values():
+                result["min_s"] /= 100
+            with open(results_path, "w") as file:
+                json.dump({"results": results}, file)
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                self.assertEqual(run.main(arguments + ["--baseline", results_path]), 1)
+            self.assertIn("REGRESSION", output.getvalue())
+
+    def test_noise_is_not_a_regression(self):
+        baseline = {
+            "fast": {"median_s": 1e-7, "min_s": 1e-7},
+            "noisy": {"median_s": 1e-4, "min_s": 1e-4},
+            "slower": {"median_s": 1e-4, "min_s": 1e-4},
+        }
+        results = {
+            "fast": {"median_s": 2e-7, "min_s": 2e-7},
+            "noisy": {"median_s": 2e-4, "min_s": 1.05e-4},
+            "slower": {"median_s": 2e-4, "min_s": 2e-4},
+        }
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(run.compare(results, baseline, 0.2), ["slower"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from easy_fnc.caching import ResultCache, cacheable
+from easy_fnc.function_caller import FunctionCallingEngine
+from easy_fnc.schemas import FunctionCall
+
+class TestResultCache(unittest.TestCase):
+    def test_lru_eviction(self):
+        cache = ResultCache(max_entries=2)
+        cache.put('f', 'a', 1)
+        cache.put('f', 'b', 2)
+        cache.get('f', 'a')
+        cache.put('f', 'c', 3)
+        self.assertEqual(cache.get('f', 'a'), (True, 1))
+        self.assertEqual(cache.get('f', 'b'), (False, None))
+        self.assertEqual(cache.stats['f'].evictions, 1)
+
+    def test_memory_cap(self):
+        cache = ResultCache(max_bytes=1000)
+        cache.put('f', 'a', 'x' * 600)
+        cache.put('f', 'b', 'y' * 600)
+        self.assertEqual(len(cache), 1)
+        self.assertLessEqual(cache.size, 1000)
+        cache.put('f', 'c', 'z' * 2000)
+        self.assertEqual(cache.get('f', 'c'), (False, None))
+
+    def test_ttl_expiry(self):
+        cache = ResultCache()
+        cache.put('f', 'a', 1, ttl=0)
+        self.assertEqual(cache.get('f', 'a'), (False, None))
+        self.assertEqual(cache.stats['f'].evictions, 1)
+
+class TestEngineCaching(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        def lookup(key: str, options: dict) -> str:
+            self.calls.append(key)
+            return key.upper()
+        self.engine = FunctionCallingEngine(auto_load_core_utils=False)
+        self.engine.functions['lookup'] = lookup
+
+    def test_mark_cacheable(self):
+        self.engine.mark_cacheable('lookup')
+        function_calls = [
+            FunctionCall(name='lookup', kwargs={'key': 'a', 'options': {'x': 1, 'y': 2}}, returns=['first']),
+            FunctionCall(name='lookup', kwargs={'options': {'y': 2, 'x': 1}, 'key': 'a'}, returns=['second']),
+            FunctionCall(name='lookup', kwargs={'key': 'b', 'options': {}}, returns=['third']),
+        ]
+        outputs = self.engine.call_functions(function_calls)
+        self.assertEqual(outputs, {'first': 'A', 'second': 'A', 'third': 'B'})
+        self.assertEqual(self.calls, ['a', 'b'])
+        self.assertEqual(self.engine.cache_stats['lookup'], {'hits': 1, 'misses': 2, 'evictions': 0})
+
+    def test_cacheable_decorator(self):
+        @cacheable(ttl=60)
+        def square(x: int) -> int:
+            self.calls.append(x)
+            return x * x
+        self.engine.functions['square'] = square
+        for _ in range(3):
+            self.engine.call_functions([FunctionCall(name='square', kwargs={'x': 3}, returns=['y'])])
+        self.assertEqual(self.calls, [3])
+
+    def test_uncached_by_default(self):
+        function_call = FunctionCall(name='lookup', kwargs={'key': 'a', 'options': {}}, returns=['first'])
+        self.engine.call_functions([function_call, function_call.model_copy(deep=True)])
+        self.assertEqual(self.calls, ['a', 'a'])
+        self.assertEqual(self.engine.cache_stats, {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import array
+import unittest
+from unittest import mock
+from easy_fnc import core_utils
+from easy_fnc.core_utils import get_core_utils
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class TestCoreUtils(unittest.TestCase):
+    def setUp(self):
+        self.utils = get_core_utils()
+
+    def test_existing_utils(self):
+        self.assertEqual(self.utils['get_val_from_dict']('a', {'a': 1}), 1)
+        self.assertEqual(self.utils['concatenate_strings'](['a', 'b']), 'ab')
+        self.assertEqual(self.utils['_mean']([1, 2, 3]), 2)
+
+    def test_statistics(self):
+        values = [4, 1, 3, 2]
+        self.assertEqual(self.utils['sum_values'](values), 10)
+        self.assertEqual(self.utils['median'](values), 2.5)
+        self.assertEqual(self.utils['min_value'](values), 1)
+        self.assertEqual(self.utils['max_value'](values), 4)
+        self.assertAlmostEqual(self.utils['variance'](values), 1.25)
+        self.assertEqual(self.utils['describe_values'](values)['count'], 4)
+
+    def test_transformations(self):
+        values = [3, 1, 2, 3]
+        self.assertEqual(self.utils['sort_values'](values, reverse=True), [3, 3, 2, 1])
+        self.assertEqual(self.utils['top_k_values'](values, 2), [3, 3])
+        self.assertEqual(self.utils['top_k_values'](values, 2, largest=False), [1, 2])
+        self.assertEqual(self.utils['filter_values'](values, '>=', 2), [3, 2, 3])
+        self.assertEqual(self.utils['unique_values'](values), [1, 2, 3])
+        self.assertEqual(self.utils['count_values'](values), {3: 2, 1: 1, 2: 1})
+        with self.assertRaises(ValueError):
+            self.utils['filter_values'](values, '~', 2)
+
+    def test_group_by_key(self):
+        items = [{'city': 'a', 'n': 1}, {'city': 'b', 'n': 2}, {'city': 'a', 'n': 3}, {'n': 4}]
+        groups = self.utils['group_by_key'](items, 'city')
+        self.assertEqual([item['n'] for item in groups['a']], [1, 3])
+        self.assertEqual(list(groups), ['a', 'b'])
+
+    def test_buffers(self):
+        values = array.array('d', [1.0, 2.0, 3.0, 6.0])
+        self.assertEqual(self.utils['mean'](values), 3.0)
+        self.assertEqual(list(self.utils['sort_values'](values, reverse=True)), [6.0, 3.0, 2.0, 1.0])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpy_fast_path(self):
+        values = list(range(core_utils.NUMPY_THRESHOLD * 2))
+        self.assertEqual(self.utils['sum_values'](values), sum(values))
+        self.assertEqual(self.utils['top_k_values'](values, 3), values[-3:][::-1])
+        self.assertIsInstance(self.utils['sort_values'](values), list)
+        array_values = numpy.arange(10.0)
+        filtered = self.utils['filter_values'](array_values, '<', 3)
+        self.assertIsInstance(filtered, numpy.ndarray)
+        self.assertEqual(filtered.tolist(), [0.0, 1.0, 2.0])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpy_fast_path_is_exact(self):
+        self.assertEqual(self.utils['sum_values']([2 ** 62] * 2048), 2 ** 73)
+        self.assertEqual(self.utils['sum_values'](numpy.full(4, 2 ** 62)), 2 ** 64)
+        self.assertEqual(self.utils['sum_values']([2 ** 70] * 2048), 2 ** 81)
+
+        mixed = [1, 2.5] * 600
+        calls = [('sort_values', ()), ('top_k_values', (3,)), ('filter_values', ('<', 2)), ('unique_values', ()), ('min_value', ())]
+        with mock.patch('easy_fnc.core_utils._numpy', return_value=None):
+            expected = [self.utils[name](mixed, *args) for name, args in calls]
+        for (name, args), fallback in zip(calls, expected):
+            result = self.utils[name](mixed, *args)
+            self.assertEqual(result, fallback, name)
+            self.assertEqual(repr(result), repr(fallback), name)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import time
+import unittest
+from easy_fnc.function_caller import FunctionCallingEngine, create_functions_metadata
+from easy_fnc.schemas import FunctionCall
+
+class TestDeadlines(unittest.TestCase):
+    def setUp(self):
+        self.budgets = []
+        def sleep(seconds: float) -> float:
+            time.sleep(seconds)
+            return seconds
+        def echo(value: str) -> str:
+            return value
+        def fail() -> None:
+            raise RuntimeError("boom")
+        def degrade(query: str, remaining_time: float = None) -> str:
+            self.budgets.append(remaining_time)
+            return query
+        self.engine = FunctionCallingEngine(auto_load_core_utils=False)
+        self.engine.functions.update({'sleep': sleep, 'echo': echo, 'fail': fail, 'degrade': degrade})
+
+    def test_all_completed(self):
+        calls = [
+            FunctionCall(name='echo', kwargs={'value': 'hi'}, returns=['a']),
+            FunctionCall(name='echo', kwargs={'value': 'a'}, returns=['b']),
+        ]
+        result = self.engine.call_functions_with_deadline(calls, timeout=5)
+        self.assertTrue(result.ok)
+        self.assertEqual(result.completed, [0, 1])
+        self.assertEqual(result.outputs['b'], 'hi')
+
+    def test_call_timeout(self):
+        self.engine.set_call_timeout('sleep', 0.05)
+        calls = [
+            FunctionCall(name='sleep', kwargs={'seconds': 1}, returns=['slept']),
+            FunctionCall(name='echo', kwargs={'value': 'slept'}, returns=['dependent']),
+            FunctionCall(name='echo', kwargs={'value': 'independent'}, returns=['independent']),
+        ]
+        start = time.monotonic()
+        result = self.engine.call_functions_with_deadline(calls)
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(result.timed_out, [0])
+        self.assertEqual(result.not_run, [1])
+        self.assertEqual(result.completed, [2])
+        self.assertNotIn('slept', result.outputs)
+
+    def test_plan_deadline(self):
+        calls = [
+            FunctionCall(name='sleep', kwargs={'seconds': 0.01}, returns=['first']),
+            FunctionCall(name='sleep', kwargs={'seconds': 1}, returns=['second']),
+            FunctionCall(name='echo', kwargs={'value': 'never'}, returns=['third']),
+        ]
+        for parallel in (False, True):
+            with self.subTest(parallel=parallel):
+                result = self.engine.call_functions_with_deadline(calls, timeout=0.2, parallel=parallel)
+                self.assertIn(0, result.completed)
+                self.assertEqual(result.timed_out, [1])
+                if not parallel:
+                    self.assertEqual(result.not_run, [2])
+
+    def test_failures_are_reported(self):
+        calls = [
+            FunctionCall(name='fail', kwargs={}, returns=['x']),
+            FunctionCall(name='echo', kwargs={'value': 'x'}, returns=['y']),
+        ]
+        result = self.engine.call_functions_with_deadline(calls, timeout=1)
+        self.assertIsInstance(result.failed[0], RuntimeError)
+        self.assertEqual(result.not_run, [1])
+        self.assertFalse(result.ok)
+
+    def test_remaining_time_is_passed(self):
+        calls = [FunctionCall(name='degrade', kwargs={'query': 'q'}, returns=['r'])]
+        self.engine.call_functions_with_deadline(calls, timeout=2)
+        self.assertGreater(self.budgets[0], 0)
+        self.assertLessEqual(self.budgets[0], 2)
+        self.engine.call_functions(calls)
+        self.assertEqual(self.budgets[1], None)
+        metadata = create_functions_metadata({'degrade': self.engine.functions['degrade']})
+        self.assertEqual(list(metadata[0].parameters['properties']), ['query'])
+
+if __name__ == '__main__':
+    unittest.main()
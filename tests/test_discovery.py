@@ -0,0 +1,105 @@
+import os
+import py_compile
+import sys
+import tempfile
+import textwrap
+import unittest
+from easy_fnc import discovery
+from easy_fnc.discovery import discover_functions, load_function_descriptions, get_manifest_path
+from easy_fnc.function_caller import create_functions_metadata
+
+TOOLS_SOURCE = textwrap.dedent('''
+    def double(x: int) -> int:
+        """Doubles a number."""
+        def nested():
+            pass
+        return 2 * x
+
+    async def fetch(url: str) -> str:
+        """Fetches a url."""
+        return url
+
+    def _private() -> None:
+        pass
+
+    class Tool:
+        def method(self) -> None:
+            pass
+''')
+
+class TestDiscovery(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.directory.name, "tools.py")
+        with open(self.file_path, "w") as file:
+            file.write(TOOLS_SOURCE)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _forget_module(self):
+        discovery._discovered.clear()
+        for name, module in list(sys.modules.items()):
+            if getattr(module, "__file__", None) == self.file_path:
+                del sys.modules[name]
+
+    def test_discovers_top_level_public_functions(self):
+        functions = discover_functions(self.file_path)
+        self.assertEqual(list(functions), ["double", "fetch"])
+        self.assertEqual(functions["double"](2), 4)
+
+    def test_manifest_skips_import(self):
+        expected = create_functions_metadata(functions=discover_functions(self.file_path))
+        self.assertTrue(os.path.exists(get_manifest_path(self.file_path)))
+        self._forget_module()
+
+        metadata = create_functions_metadata(file_path=self.file_path)
+        self.assertEqual(metadata, expected)
+        self.assertFalse(any(getattr(module, "__file__", None) == self.file_path for module in list(sys.modules.values())))
+
+    def test_manifest_is_invalidated_on_change(self):
+        discover_functions(self.file_path)
+        self._forget_module()
+        with open(self.file_path, "a") as file:
+            file.write("\ndef triple(x: int) -> int:\n    return 3 * x\n")
+
+        names = [description["name"] for description in load_function_descriptions(self.file_path)]
+        self.assertEqual(names, ["double", "fetch", "triple"])
+
+    def test_changed_file_is_imported_again(self):
+        discover_functions(self.file_path)
+        with open(self.file_path, "w") as file:
+            file.write(TOOLS_SOURCE.replace("def double(x: int)", "def double(x: int, y: int = 1)") + "\ndef triple(x: int) -> int:\n    return 3 * x\n")
+
+        functions = discover_functions(self.file_path)
+        self.assertEqual(list(functions), ["double", "fetch", "triple"])
+        self.assertEqual(functions["triple"](2), 6)
+        self._forget_module()
+        descriptions = load_function_descriptions(self.file_path)
+        self.assertEqual(descriptions[0]["parameters"], {"x": "int", "y": "int"})
+        self.assertEqual(descriptions[2]["name"], "triple")
+
+    def test_reload_keeps_regular_imports_and_bytecode(self):
+        bytecode_path = py_compile.compile(self.file_path)
+        bytecode_stat = os.stat(bytecode_path)
+        sys.path.insert(0, self.directory.name)
+        try:
+            import tools
+            functions = discover_functions(self.file_path)
+            self.assertIs(functions["double"], tools.double)
+
+            with open(self.file_path, "a") as file:
+                file.write("\ndef triple(x: int) -> int:\n    return 3 * x\n")
+            functions = discover_functions(self.file_path)
+            self.assertEqual(functions["triple"](2), 6)
+            self.assertIs(sys.modules["tools"], tools)
+            self.assertFalse(hasattr(tools, "triple"))
+            self.assertIsNot(functions["double"], tools.double)
+            self.assertEqual(os.stat(bytecode_path).st_mtime_ns, bytecode_stat.st_mtime_ns)
+        finally:
+            sys.path.remove(self.directory.name)
+            sys.modules.pop("tools", None)
+            self._forget_module()
+
+if __name__ == '__main__':
+    unittest.main()
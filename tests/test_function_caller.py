@@ -1,3 +1,5 @@
+import asyncio
+import threading
 import unittest
 from easy_fnc.function_caller import FunctionCallingEngine, create_functions_metadata
 from easy_fnc.schemas import FunctionMetadata, FunctionReturn, ModelResponse, FunctionCall
@@ -6,6 +8,10 @@ def addition_function(x: int, y: int) -> int:
     """Test function that adds two numbers."""
     return x + y
 
+def failing_function(x: int) -> int:
+    """Test function that always fails."""
+    raise RuntimeError("failure")
+
 class TestFunctionCallingEngine(unittest.TestCase):
     def setUp(self):
         self.engine = FunctionCallingEngine(auto_load_core_utils=False)
@@ -48,5 +54,111 @@ The user wants to add two numbers. I'll use the addition_function for this.
         outputs = self.engine.call_functions(function_calls)
         self.assertEqual(outputs['result'], 8)
 
+    def test_call_functions_maps_outputs_in_lists(self):
+        self.engine.functions['total'] = lambda values: sum(values)
+        function_calls = [
+            FunctionCall(name='addition_function', kwargs={'x': 1, 'y': 2}, returns=['a']),
+            FunctionCall(name='total', kwargs={'values': ['a', 4]}, returns=['b']),
+        ]
+        outputs = self.engine.call_functions(function_calls, parallel=True)
+        self.assertEqual(outputs['b'], 7)
+
+    def test_outputs_in_lists_are_resolved_by_every_mode(self):
+        self.engine.functions['collect'] = lambda values: values
+        raw_response = """<|thoughts|>Collect the sums.<|end_thoughts|>
+<|function_calls|>
+[
+    {"name": "addition_function", "kwargs": {"x": 1, "y": 2}, "returns": ["a"]},
+    {"name": "collect", "kwargs": {"values": ["a", "literal", ["a", {"nested": "a"}]]}, "returns": ["b"]}
+]
+<|end_function_calls|>"""
+        expected = [3, "literal", [3, {"nested": 3}]]
+        function_calls = self.engine.parse_model_response(raw_response).function_calls
+
+        def run(mode):
+            engine = FunctionCallingEngine(auto_load_core_utils=False)
+            engine.functions.update(self.engine.functions)
+            calls = [call.model_copy(deep=True) for call in function_calls]
+            if mode == "serial":
+                return engine.call_functions(calls)
+            if mode == "parallel":
+                return engine.call_functions(calls, parallel=True)
+            if mode == "async":
+                return asyncio.run(engine.acall_functions(calls))
+            if mode == "stream":
+                return engine.call_functions_stream([raw_response])
+            return engine.run_plan(engine.compile_plan(raw_response), parallel=mode == "parallel plan")
+
+        for mode in ["serial", "parallel", "async", "stream", "plan", "parallel plan"]:
+            with self.subTest(mode=mode):
+                self.assertEqual(run(mode)['b'], expected)
+
+    def test_call_functions_parallel_matches_serial(self):
+        function_calls = [
+            FunctionCall(name='addition_function', kwargs={'x': 1, 'y': 2}, returns=['a']),
+            FunctionCall(name='addition_function', kwargs={'x': 3, 'y': 4}, returns=['b']),
+            FunctionCall(name='addition_function', kwargs={'x': 'a', 'y': 'b'}, returns=['c']),
+            FunctionCall(name='addition_function', kwargs={'x': 'c', 'y': 10}, returns=['a']),
+        ]
+        serial_engine = FunctionCallingEngine(auto_load_core_utils=False)
+        serial_engine.functions['addition_function'] = addition_function
+        serial_outputs = serial_engine.call_functions([call.model_copy(deep=True) for call in function_calls])
+        parallel_outputs = self.engine.call_functions(function_calls, parallel=True)
+        self.assertEqual(parallel_outputs, serial_outputs)
+        self.assertEqual(list(parallel_outputs), list(serial_outputs))
+
+    def test_call_functions_parallel_runs_independent_calls_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+        def wait_for_other(x: int) -> int:
+            barrier.wait()
+            return x
+        self.engine.functions['wait_for_other'] = wait_for_other
+        function_calls = [
+            FunctionCall(name='wait_for_other', kwargs={'x': 1}, returns=['a']),
+            FunctionCall(name='wait_for_other', kwargs={'x': 2}, returns=['b']),
+        ]
+        outputs = self.engine.call_functions(function_calls, parallel=True)
+        self.assertEqual(outputs, {'a': 1, 'b': 2})
+
+    def test_call_functions_parallel_failure_cancels_downstream_only(self):
+        self.engine.functions['failing_function'] = failing_function
+        function_calls = [
+            FunctionCall(name='failing_function', kwargs={'x': 1}, returns=['a']),
+            FunctionCall(name='addition_function', kwargs={'x': 'a', 'y': 1}, returns=['b']),
+            FunctionCall(name='addition_function', kwargs={'x': 1, 'y': 1}, returns=['c']),
+        ]
+        with self.assertRaises(RuntimeError):
+            self.engine.call_functions(function_calls, parallel=True)
+        self.assertEqual(self.engine.outputs, {'c': 2})
+
+class TestFunctionCallingEngineAsync(unittest.IsolatedAsyncioTestCase):
+    async def test_acall_functions(self):
+        async def async_addition_function(x: int, y: int) -> int:
+            await asyncio.sleep(0)
+            return x + y
+        engine = FunctionCallingEngine(auto_load_core_utils=False)
+        engine.functions['addition_function'] = addition_function
+        engine.functions['async_addition_function'] = async_addition_function
+        function_calls = [
+            FunctionCall(name='async_addition_function', kwargs={'x': 1, 'y': 2}, returns=['a']),
+            FunctionCall(name='addition_function', kwargs={'x': 3, 'y': 4}, returns=['b']),
+            FunctionCall(name='async_addition_function', kwargs={'x': 'a', 'y': 'b'}, returns=['c']),
+        ]
+        outputs = await engine.acall_functions(function_calls)
+        self.assertEqual(outputs, {'a': 3, 'b': 7, 'c': 10})
+
+    async def test_acall_functions_failure_cancels_downstream_only(self):
+        engine = FunctionCallingEngine(auto_load_core_utils=False)
+        engine.functions['addition_function'] = addition_function
+        engine.functions['failing_function'] = failing_function
+        function_calls = [
+            FunctionCall(name='failing_function', kwargs={'x': 1}, returns=['a']),
+            FunctionCall(name='addition_function', kwargs={'x': 'a', 'y': 1}, returns=['b']),
+            FunctionCall(name='addition_function', kwargs={'x': 1, 'y': 1}, returns=['c']),
+        ]
+        with self.assertRaises(RuntimeError):
+            await engine.acall_functions(function_calls)
+        self.assertEqual(engine.outputs, {'c': 2})
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
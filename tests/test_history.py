@@ -0,0 +1,50 @@
+import unittest
+from easy_fnc.models.history import ConversationHistory
+
+def add_turn(history, index, size=100):
+    history.append("user", f"question {index} " + "q" * size)
+    history.append("assistant", f"answer {index} " + "a" * size)
+
+class TestConversationHistory(unittest.TestCase):
+    def test_unbounded_by_default(self):
+        history = ConversationHistory("system")
+        for index in range(50):
+            add_turn(history, index)
+        self.assertEqual(len(history.messages), 101)
+
+    def test_keeps_system_prompt_and_recent_turns(self):
+        history = ConversationHistory("system", max_characters=1000, keep_last_turns=2)
+        for index in range(20):
+            add_turn(history, index)
+            self.assertLessEqual(history.num_characters, 1000)
+        self.assertEqual(history.messages[0], {"role": "system", "content": "system"})
+        self.assertTrue(history.messages[-2]["content"].startswith("question 19"))
+        self.assertTrue(history.messages[-4]["content"].startswith("question 18"))
+
+    def test_prefix_is_stable_between_trims(self):
+        history = ConversationHistory("system", max_characters=2000, keep_last_turns=1)
+        trims = 0
+        for index in range(30):
+            before = list(history.messages)
+            add_turn(history, index)
+            if history.messages[:len(before)] != before:
+                trims += 1
+        self.assertLess(trims, 10)
+
+    def test_token_budget_with_summarizer(self):
+        history = ConversationHistory(
+            "system",
+            max_tokens=10,
+            keep_last_turns=1,
+            token_counter=lambda text: 1,
+            summarizer=lambda messages: f"summary of {len(messages)} messages"
+        )
+        for index in range(12):
+            add_turn(history, index, size=0)
+        self.assertEqual(history.messages[1]["role"], "system")
+        self.assertTrue(history.messages[1]["content"].startswith("summary of"))
+        self.assertLessEqual(history.num_tokens, 10)
+        self.assertTrue(history.messages[-2]["content"].startswith("question 11"))
+
+if __name__ == '__main__':
+    unittest.main()
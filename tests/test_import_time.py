@@ -0,0 +1,40 @@
+import subprocess
+import unittest
+import json
+import sys
+
+# Define constants
+IMPORT_TIME_BUDGET = 0.25
+NUM_RUNS = 3
+DEFERRED_MODULES = ["pydantic", "asyncio", "multiprocessing", "tomllib", "ollama", "groq"]
+
+def import_in_subprocess(module_name: str) -> dict:
+    """Import a module in a fresh interpreter, returning the import time and the deferred modules it loaded."""
+    code = (
+        "import sys, time, json\n"
+        "start = time.perf_counter()\n"
+        f"import {module_name}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"print(json.dumps({{'time': elapsed, 'loaded': [m for m in {DEFERRED_MODULES!r} if m in sys.modules]}}))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+class TestImportTime(unittest.TestCase):
+    def test_function_caller_defers_heavy_imports(self):
+        self.assertEqual(import_in_subprocess("easy_fnc.function_caller")["loaded"], [])
+
+    def test_models_load_backends_on_first_use(self):
+        self.assertEqual(import_in_subprocess("easy_fnc.models")["loaded"], [])
+        import easy_fnc.models
+        with self.assertRaises(ValueError):
+            easy_fnc.models.get_backend("UnknownModel")
+        with self.assertRaises(AttributeError):
+            easy_fnc.models.UnknownModel
+
+    def test_function_caller_import_budget(self):
+        best = min(import_in_subprocess("easy_fnc.function_caller")["time"] for _ in range(NUM_RUNS))
+        self.assertLess(best, IMPORT_TIME_BUDGET)
+
+if __name__ == '__main__':
+    unittest.main()
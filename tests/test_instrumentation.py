@@ -0,0 +1,70 @@
+import unittest
+from easy_fnc.instrumentation import Exporter, Instrumentation, LatencyHistogram, MetricsInstrumentation, get_instrumentation, set_instrumentation
+from easy_fnc.function_caller import FunctionCallingEngine
+from easy_fnc.schemas import FunctionCall
+
+class ListExporter(Exporter):
+    def __init__(self):
+        self.events = []
+
+    def export(self, event):
+        self.events.append(event)
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for _ in range(90):
+            histogram.record(0.001)
+        for _ in range(10):
+            histogram.record(1.0, error=True)
+        self.assertEqual(histogram.count, 100)
+        self.assertEqual(histogram.errors, 10)
+        self.assertLess(histogram.percentile(50), 0.01)
+        self.assertGreaterEqual(histogram.percentile(99), 1.0)
+        self.assertAlmostEqual(histogram.mean, 0.1009)
+
+class TestEngineInstrumentation(unittest.TestCase):
+    def setUp(self):
+        def double(x: int) -> int:
+            return x * 2
+        def fail() -> None:
+            raise RuntimeError("boom")
+        self.exporter = ListExporter()
+        self.instrumentation = MetricsInstrumentation(exporters=[self.exporter])
+        self.engine = FunctionCallingEngine(auto_load_core_utils=False, instrumentation=self.instrumentation)
+        self.engine.functions.update({'double': double, 'fail': fail})
+
+    def test_function_call_spans(self):
+        calls = [
+            FunctionCall(name='double', kwargs={'x': 1}, returns=['a']),
+            FunctionCall(name='double', kwargs={'x': 'a'}, returns=['b']),
+        ]
+        self.engine.call_functions(calls)
+        histogram = self.instrumentation.histogram('function_call', 'double')
+        self.assertEqual(histogram.count, 2)
+        self.assertEqual(histogram.errors, 0)
+        self.assertEqual([event.label for event in self.exporter.events], ['double', 'double'])
+
+    def test_errors_are_counted(self):
+        with self.assertRaises(RuntimeError):
+            self.engine.call_functions([FunctionCall(name='fail', kwargs={}, returns=[])])
+        self.assertEqual(self.instrumentation.histogram('function_call', 'fail').errors, 1)
+        self.assertEqual(self.exporter.events[0].error, "RuntimeError: boom")
+
+    def test_parse_span(self):
+        self.engine.parse_model_response('<|thoughts|>Hi<|end_thoughts|><|function_calls|>[]<|end_function_calls|>')
+        self.assertIn('parse', self.instrumentation.summary())
+
+    def test_process_wide_instrumentation(self):
+        engine = FunctionCallingEngine(auto_load_core_utils=False)
+        self.assertIs(type(engine.instrumentation), Instrumentation)
+        instrumentation = MetricsInstrumentation()
+        set_instrumentation(instrumentation)
+        try:
+            self.assertIs(engine.instrumentation, instrumentation)
+        finally:
+            set_instrumentation(None)
+        self.assertIs(type(get_instrumentation()), Instrumentation)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import json
+import unittest
+from unittest import mock
+from easy_fnc.output_store import OutputStore
+from easy_fnc.models.ollama import OllamaModel
+from easy_fnc.models.output_format import compact_value, encode_json, format_tool_output
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+class TestOutputFormat(unittest.TestCase):
+    def test_small_output_is_kept_whole(self):
+        output = {"city": "Paris", "forecast": ["sunny", "cloudy"]}
+        formatted = format_tool_output(output)
+        self.assertEqual(json.loads(formatted.text), output)
+        self.assertEqual(formatted.text, '{"city":"Paris","forecast":["sunny","cloudy"]}')
+        self.assertEqual((formatted.bytes_saved, formatted.num_elisions), (0, 0))
+
+    def test_compact_value_elides_with_markers(self):
+        output = {"values": list(range(100)), "names": ["a", "b", "c"], "text": "x" * 20, "more": 1}
+        compacted, num_elisions = compact_value(output, max_items=3, max_string_length=10)
+        self.assertEqual(compacted["values"], [0, 1, 2, "...(97 more items of 100; min 0, max 99, mean 49.5)"])
+        self.assertEqual(compacted["names"], ["a", "b", "c"])
+        self.assertEqual(compacted["text"], "x" * 10 + "...(10 more characters)")
+        self.assertEqual(compacted["..."], "...(1 more keys of 4)")
+        self.assertEqual(num_elisions, 3)
+
+        compacted, _ = compact_value({"a": {"b": [1, 2]}}, max_depth=1)
+        self.assertEqual(compacted, {"a": "...(nested dict of length 1)"})
+
+    def test_large_output_fits_the_budget(self):
+        for size in (1_000, 100_000):
+            output = {"rows": [{"id": index, "name": f"row {index}", "payload": "p" * 200} for index in range(size)]}
+            formatted = format_tool_output(output, max_bytes=2048)
+            self.assertLessEqual(formatted.num_bytes, 2048)
+            self.assertIn(f"more items of {size}", formatted.text)
+            self.assertEqual(formatted.bytes_saved, len(encode_json(output).encode("utf-8")) - formatted.num_bytes)
+
+        formatted = format_tool_output("é" * 10_000, max_bytes=100)
+        self.assertLessEqual(formatted.num_bytes, 100)
+        self.assertTrue(formatted.text.endswith("more characters)\""))
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpy_outputs_become_lists(self):
+        self.assertEqual(json.loads(format_tool_output({"values": numpy.arange(3)}).text), {"values": [0, 1, 2]})
+        formatted = format_tool_output(numpy.arange(1_000_000), max_bytes=512)
+        self.assertIn("more items of 1000000; min 0, max 999999", formatted.text)
+
+    def test_model_format_output(self):
+        model = OllamaModel("model", [])
+        prompt = model.format_output({"rows": list(range(10_000))}, "Sum the rows.")
+        self.assertIn("Sum the rows.", prompt)
+        self.assertIn("more items of 10000", prompt)
+        self.assertGreater(model.output_bytes_saved, 40_000)
+
+        store = OutputStore()
+        store["forecast"] = {"city": "Paris"}
+        self.assertIn('{"forecast":{"city":"Paris"}}', model.format_output(store, "Weather?"))
+
+        indented = OllamaModel("model", [], compact_output=False, max_output_bytes=None)
+        self.assertIn(json.dumps({"a": 1}, indent=4), indented.format_output({"a": 1}, "Query"))
+
+    def test_encode_json_without_orjson(self):
+        output = {"value": 2 ** 70, 1: ["a"]}
+        with mock.patch("easy_fnc.models.output_format._orjson", return_value=None):
+            self.assertEqual(encode_json(output), '{"value":1180591620717411303424,"1":["a"]}')
+        self.assertEqual(encode_json(output), '{"value":1180591620717411303424,"1":["a"]}')
+
+if __name__ == '__main__':
+    unittest.main()
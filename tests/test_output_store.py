@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import threading
+import unittest
+from easy_fnc.output_store import DEFAULT_MAX_BYTES, OutputStore
+from easy_fnc.function_caller import FunctionCallingEngine
+from easy_fnc.schemas import FunctionCall
+
+class TestOutputStore(unittest.TestCase):
+    def test_scope_releases_outputs(self):
+        store = OutputStore()
+        store['session'] = 1
+        with store.scope():
+            store['plan'] = 2
+            self.assertEqual(dict(store), {'session': 1, 'plan': 2})
+        self.assertEqual(dict(store), {'session': 1})
+        self.assertNotIn('plan', store)
+
+    def test_evicts_oldest_by_size(self):
+        store = OutputStore(max_bytes=2000)
+        store['a'] = 'x' * 900
+        store['b'] = 'y' * 900
+        store['c'] = 'z' * 900
+        self.assertEqual(list(store), ['b', 'c'])
+        self.assertEqual(store.total_size, sum(store.sizes().values()))
+        self.assertLessEqual(store.total_size, 2000)
+
+    def test_evicts_by_age(self):
+        store = OutputStore(max_age=0.01)
+        store['a'] = 1
+        time.sleep(0.02)
+        self.assertNotIn('a', store)
+        self.assertEqual(len(store), 0)
+
+    def test_spills_large_values(self):
+        store = OutputStore(spill_threshold=1000)
+        store['small'] = 'x'
+        store['large'] = list(range(1000))
+        entry = store._entries['large']
+        self.assertIsNone(store._entries['small'].path)
+        self.assertTrue(os.path.exists(entry.path))
+        self.assertEqual(store['large'], list(range(1000)))
+        store.close()
+        self.assertFalse(os.path.exists(entry.path))
+
+    def test_is_a_dict(self):
+        store = OutputStore(spill_threshold=1000)
+        store['small'] = 'x'
+        store['large'] = list(range(1000))
+        expected = {'small': 'x', 'large': list(range(1000))}
+        self.assertIsInstance(store, dict)
+        self.assertEqual(json.loads(json.dumps(store)), expected)
+        self.assertEqual(dict(store), expected)
+        self.assertEqual(store, expected)
+        self.assertEqual(expected, store)
+        self.assertEqual(store.copy(), expected)
+        self.assertIs(type(store.copy()), dict)
+        store.close()
+
+    def test_pinned_outputs_are_not_evicted(self):
+        store = OutputStore(max_bytes=2000)
+        with store.pin():
+            store['a'] = 'x' * 900
+            store['b'] = 'y' * 900
+            store['c'] = 'z' * 900
+            self.assertEqual(list(store), ['a', 'b', 'c'])
+        self.assertEqual(list(store), ['b', 'c'])
+
+    def test_scopes_are_per_thread(self):
+        store = OutputStore()
+        inside, released = threading.Event(), threading.Event()
+
+        def other_thread():
+            store['other'] = 1
+            inside.set()
+            released.wait()
+
+        with store.scope():
+            thread = threading.Thread(target=other_thread)
+            thread.start()
+            inside.wait()
+            store['mine'] = 2
+        released.set()
+        thread.join()
+        self.assertEqual(dict(store), {'other': 1})
+
+class TestEngineOutputStore(unittest.TestCase):
+    def test_plan_scope(self):
+        engine = FunctionCallingEngine(auto_load_core_utils=False)
+        engine.functions['identity'] = lambda value: value
+        with engine.outputs.scope():
+            engine.call_functions([FunctionCall(name='identity', kwargs={'value': 1}, returns=['x'])])
+            self.assertEqual(engine.outputs['x'], 1)
+        outputs = engine.call_functions([FunctionCall(name='identity', kwargs={'value': 'x'}, returns=['y'])])
+        self.assertEqual(outputs['y'], 'x')
+        self.assertEqual(json.loads(json.dumps(outputs)), {'y': 'x'})
+
+    def test_running_plan_keeps_its_outputs(self):
+        engine = FunctionCallingEngine(auto_load_core_utils=False, output_store=OutputStore(max_bytes=2000))
+        engine.functions['repeat'] = lambda text: text * 900
+        engine.functions['length'] = lambda value: len(value)
+        engine.call_functions([
+            FunctionCall(name='repeat', kwargs={'text': 'a'}, returns=['a']),
+            FunctionCall(name='repeat', kwargs={'text': 'b'}, returns=['b']),
+            FunctionCall(name='repeat', kwargs={'text': 'c'}, returns=['c']),
+            FunctionCall(name='length', kwargs={'value': 'a'}, returns=['length']),
+        ])
+        self.assertEqual(engine.outputs['length'], 900)
+        self.assertNotIn('a', engine.outputs)
+        self.assertLessEqual(engine.outputs.total_size, 2000)
+
+    def test_default_store_is_bounded(self):
+        self.assertEqual(FunctionCallingEngine(auto_load_core_utils=False).outputs.max_bytes, DEFAULT_MAX_BYTES)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from unittest import mock
+from easy_fnc.function_caller import FunctionCallingEngine
+from easy_fnc.plans import PlanCache
+
+RAW_RESPONSE = """<|thoughts|>Add, then total.<|end_thoughts|>
+<|function_calls|>
+[
+    {"name": "add", "kwargs": {"x": 1, "y": 2}, "returns": ["a"]},
+    {"name": "add", "kwargs": {"x": "a", "y": 3}, "returns": ["b"]},
+    {"name": "total", "kwargs": {"values": ["a", "b", 10], "options": {"scale": "a"}}, "returns": ["c"]}
+]
+<|end_function_calls|>"""
+
+def add(x: int, y: int) -> int:
+    return x + y
+
+def total(values: list, options: dict) -> int:
+    return sum(values) * options['scale']
+
+class TestCompiledPlans(unittest.TestCase):
+    def setUp(self):
+        self.engine = FunctionCallingEngine(auto_load_core_utils=False, plan_cache=PlanCache(max_entries=2))
+        self.engine.functions.update({'add': add, 'total': total})
+
+    def test_run_plan_matches_call_functions(self):
+        plan = self.engine.compile_plan(RAW_RESPONSE)
+        outputs = dict(self.engine.run_plan(plan))
+        expected = FunctionCallingEngine(auto_load_core_utils=False)
+        expected.functions.update(self.engine.functions)
+        response = expected.parse_model_response(RAW_RESPONSE)
+        self.assertEqual(outputs, dict(expected.call_functions(response.function_calls)))
+        self.assertEqual(outputs['c'], (3 + 6 + 10) * 3)
+
+    def test_plan_is_reusable(self):
+        plan = self.engine.compile_plan(RAW_RESPONSE)
+        first = dict(self.engine.run_plan(plan))
+        self.engine.outputs.clear()
+        self.assertEqual(dict(self.engine.run_plan(plan)), first)
+        self.assertEqual(plan.calls[2].function_call.kwargs, {'values': ['a', 'b', 10], 'options': {'scale': 'a'}})
+        self.engine.outputs.clear()
+        self.assertEqual(dict(self.engine.run_plan(plan, parallel=True)), first)
+
+    def test_parallel_run_uses_the_plan_dependencies(self):
+        plan = self.engine.compile_plan(RAW_RESPONSE)
+        self.assertEqual(plan.dependencies, (frozenset(), frozenset({0}), frozenset({0, 1})))
+        with mock.patch('easy_fnc.executor.build_dependency_graph', side_effect=AssertionError("rebuilt")):
+            outputs = dict(self.engine.run_plan(plan, parallel=True, context=self.engine.create_context()))
+        self.assertEqual(outputs, dict(self.engine.run_plan(plan, context=self.engine.create_context())))
+
+    def test_plan_cache(self):
+        plan = self.engine.compile_plan(RAW_RESPONSE)
+        self.assertIs(self.engine.compile_plan(RAW_RESPONSE), plan)
+        self.assertEqual((self.engine.plan_cache.hits, self.engine.plan_cache.misses), (1, 1))
+        self.engine.compile_plan(RAW_RESPONSE + " ")
+        self.engine.compile_plan(RAW_RESPONSE + "  ")
+        self.assertEqual(len(self.engine.plan_cache), 2)
+        self.assertIsNot(self.engine.compile_plan(RAW_RESPONSE), plan)
+
+    def test_replaced_function_is_called(self):
+        plan = self.engine.compile_plan(RAW_RESPONSE)
+        self.engine.functions['total'] = lambda values, options: 'replaced'
+        self.assertEqual(self.engine.run_plan(plan)['c'], 'replaced')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+import os
+import sys
+import asyncio
+import tempfile
+import unittest
+from easy_fnc.function_caller import FunctionCallingEngine
+from easy_fnc.process_pool import ProcessPoolBackend, cpu_bound
+from easy_fnc.registry import FunctionRegistry
+from easy_fnc.schemas import FunctionCall
+
+def worker_pid() -> int:
+    return os.getpid()
+
+def make_payload(size: int) -> bytes:
+    return b"x" * size
+
+def make_transposed_array(size: int):
+    import numpy
+    return numpy.arange(size * size, dtype=numpy.float64).reshape(size, size).T
+
+def make_object_array(size: int):
+    import numpy
+    return numpy.array([str(number) for number in range(size)], dtype=object)
+
+def make_bytearray(size: int) -> bytearray:
+    return bytearray(b"y" * size)
+
+def crash_worker() -> None:
+    os._exit(1)
+
+CPU_BOUND_FILE = '''from easy_fnc.process_pool import cpu_bound
+
+@cpu_bound
+def square(x: int) -> int:
+    """Square a number."""
+    return x * x
+'''
+
+@cpu_bound
+def count_bytes(data: bytes) -> int:
+    return len(data)
+
+class TestProcessPoolBackend(unittest.TestCase):
+    def setUp(self):
+        self.backend = ProcessPoolBackend(max_workers=1, shared_memory_threshold=1024)
+
+    def tearDown(self):
+        self.backend.shutdown()
+
+    def test_shared_memory_output(self):
+        self.assertEqual(self.backend.call(make_payload, {'size': 4096}), b"x" * 4096)
+        self.assertEqual(self.backend.call(make_payload, {'size': 10}), b"x" * 10)
+
+    def test_shared_memory_array_is_a_view(self):
+        import gc
+        import weakref
+        import numpy
+
+        array = self.backend.call(make_transposed_array, {'size': 64})
+        numpy.testing.assert_array_equal(array, make_transposed_array(64))
+        self.assertFalse(array.flags["OWNDATA"])
+        shared_array = weakref.ref(array.base)
+        array[0, 0] = -1.0
+        column = array[:, 1]
+        del array
+        gc.collect()
+        self.assertIsNotNone(shared_array())
+        self.assertEqual(column[0], 64.0)
+        del column
+        gc.collect()
+        self.assertIsNone(shared_array())
+
+    def test_shared_memory_bytearray_and_object_array(self):
+        self.assertEqual(self.backend.call(make_bytearray, {'size': 4096}), bytearray(b"y" * 4096))
+        self.assertEqual(list(self.backend.call(make_object_array, {'size': 1000})), [str(number) for number in range(1000)])
+
+    def test_persistent_pool(self):
+        first = self.backend.call(worker_pid, {})
+        self.assertNotEqual(first, os.getpid())
+        self.assertEqual(self.backend.call(worker_pid, {}), first)
+
+    def test_broken_pool_is_replaced(self):
+        from concurrent.futures.process import BrokenProcessPool
+
+        with self.assertRaises(BrokenProcessPool):
+            self.backend.call(crash_worker, {})
+        self.assertNotEqual(self.backend.call(worker_pid, {}), os.getpid())
+
+class TestEngineProcessPool(unittest.TestCase):
+    def setUp(self):
+        self.engine = FunctionCallingEngine(auto_load_core_utils=False, process_pool=ProcessPoolBackend(max_workers=2, shared_memory_threshold=1024))
+        self.engine.functions.update({'worker_pid': worker_pid, 'make_payload': make_payload, 'count_bytes': count_bytes})
+
+    def tearDown(self):
+        self.engine.process_pool.shutdown()
+
+    def test_mark_cpu_bound(self):
+        self.engine.mark_cpu_bound('worker_pid')
+        self.engine.mark_cpu_bound('make_payload')
+        outputs = self.engine.call_functions([
+            FunctionCall(name='worker_pid', kwargs={}, returns=['pid']),
+            FunctionCall(name='make_payload', kwargs={'size': 2048}, returns=['payload']),
+            FunctionCall(name='count_bytes', kwargs={'data': 'payload'}, returns=['size']),
+        ])
+        self.assertNotEqual(outputs['pid'], os.getpid())
+        self.assertEqual(outputs['payload'], b"x" * 2048)
+        self.assertEqual(outputs['size'], 2048)
+
+    def test_unpicklable_function(self):
+        self.engine.functions['local'] = lambda: 1
+        with self.assertRaises(ValueError):
+            self.engine.mark_cpu_bound('local')
+
+    def test_function_outside_sys_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "cpu_tools.py")
+            with open(path, "w") as file:
+                file.write(CPU_BOUND_FILE)
+            self.assertNotIn(directory, sys.path)
+            with self.assertRaisesRegex(ValueError, "sys.path"):
+                FunctionRegistry().with_user_functions(path)
+
+    def test_async(self):
+        self.engine.mark_cpu_bound('make_payload')
+        calls = [FunctionCall(name='make_payload', kwargs={'size': 4096}, returns=['payload'])]
+        outputs = asyncio.run(self.engine.acall_functions(calls))
+        self.assertEqual(outputs['payload'], b"x" * 4096)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import threading
+import unittest
+from unittest import mock
+from easy_fnc.function_caller import create_functions_metadata
+from easy_fnc.models.model import EasyFNCModel
+from easy_fnc.models import prompt_cache
+from easy_fnc.models.prompt_cache import clear_prompt_cache, compile_system_prompt
+from easy_fnc.schemas import FunctionMetadata
+
+def addition_function(x: int, y: int) -> int:
+    """Test function that adds two numbers."""
+    return x + y
+
+class EchoModel(EasyFNCModel):
+    def generate(self, user_input: str, output_turn=None) -> str:
+        return user_input
+
+class TestPromptCache(unittest.TestCase):
+    def setUp(self):
+        clear_prompt_cache()
+        self.functions = create_functions_metadata({'addition_function': addition_function})
+
+    def test_default_prompt_is_unchanged(self):
+        model = EchoModel(self.functions)
+        beginning = model.template["function_call_prompt"]["beginning"]
+        end = model.template["function_call_prompt"]["system_prompt_end"]
+        expected = beginning + json.dumps([f.model_dump() for f in self.functions], indent=4) + end
+        self.assertEqual(model.generate_system_prompt(), expected)
+
+    def test_prompt_is_shared_between_instances(self):
+        first = EchoModel(self.functions).compile_system_prompt()
+        second = EchoModel(create_functions_metadata({'addition_function': addition_function})).compile_system_prompt()
+        self.assertIs(first, second)
+
+    def test_compact_prompt(self):
+        model = EchoModel(self.functions)
+        compact_model = EchoModel(self.functions, compact_prompt=True, sort_keys=True)
+        compiled = model.compile_system_prompt()
+        compact = compact_model.compile_system_prompt()
+        self.assertNotEqual(compiled.key, compact.key)
+        self.assertLess(compact.num_bytes, compiled.num_bytes)
+        self.assertIn('{"description":"Test function that adds two numbers."', compact.text)
+        self.assertEqual(compact.num_bytes, len(compact.text.encode("utf-8")))
+
+    def test_lookup_does_not_serialize_the_functions(self):
+        template = EchoModel(self.functions).template
+        compiled = compile_system_prompt(template, self.functions)
+        with mock.patch.object(FunctionMetadata, "model_dump", side_effect=AssertionError("serialized")):
+            self.assertIs(compile_system_prompt(template, self.functions), compiled)
+
+        changed = [self.functions[0].model_copy(update={"description": "Adds two numbers."})]
+        recompiled = compile_system_prompt(template, changed)
+        self.assertIn("Adds two numbers.", recompiled.text)
+        self.assertNotEqual(recompiled.key, compiled.key)
+
+    def test_token_counter(self):
+        compiled = compile_system_prompt(EchoModel(self.functions).template, self.functions, token_counter=lambda text: 7)
+        self.assertEqual(compiled.num_tokens, 7)
+
+    def test_model_recompiles_replaced_functions(self):
+        model = EchoModel(self.functions)
+        compiled = model.compile_system_prompt()
+        self.assertIs(model.compile_system_prompt(), compiled)
+        model.functions[0] = self.functions[0].model_copy(update={"description": "Adds two numbers."})
+        self.assertIn("Adds two numbers.", model.compile_system_prompt().text)
+        self.assertIs(model._compiled_prompt_functions[0], model.functions[0])
+
+    def test_freed_fingerprint_does_not_drop_a_reused_id(self):
+        function = self.functions[0]
+        fingerprint = prompt_cache._fingerprint(function)
+        stale_reference = mock.Mock()
+        prompt_cache._freed_fingerprints.append((id(function), stale_reference))
+        with mock.patch.object(FunctionMetadata, "model_dump", side_effect=AssertionError("serialized")):
+            self.assertEqual(prompt_cache._fingerprint(function), fingerprint)
+
+        copy = function.model_copy()
+        key = id(copy)
+        prompt_cache._fingerprint(copy)
+        del copy
+        prompt_cache._fingerprint(function)
+        self.assertNotIn(key, prompt_cache._fingerprints)
+
+    def test_fingerprints_are_thread_safe(self):
+        functions = [self.functions[0].model_copy(update={"description": str(number)}) for number in range(200)]
+        results = []
+
+        def fingerprint_all():
+            results.append([prompt_cache._fingerprint(function) for function in functions])
+
+        threads = [threading.Thread(target=fingerprint_all) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertEqual(len(set(results[0])), 200)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import unittest
+from easy_fnc.function_caller import FunctionCallingEngine
+from easy_fnc.registry import FunctionRegistry, core_utils_registry
+from easy_fnc.schemas import FunctionCall
+
+def addition_function(x: int, y: int) -> int:
+    """Test function that adds two numbers."""
+    return x + y
+
+def double(value: int) -> int:
+    """Test function that doubles a number."""
+    return value * 2
+
+RAW_RESPONSE = """<|thoughts|>Add, then double.<|end_thoughts|>
+<|function_calls|>
+[
+    {"name": "addition_function", "kwargs": {"x": 1, "y": 2}, "returns": ["sum"]},
+    {"name": "double", "kwargs": {"value": "sum"}, "returns": ["result"]}
+]
+<|end_function_calls|>
+"""
+
+class TestFunctionRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = FunctionRegistry({'addition_function': addition_function})
+
+    def test_registry_is_immutable(self):
+        extended = self.registry.with_functions({'double': double})
+        self.assertNotIn('double', self.registry)
+        self.assertEqual(list(extended), ['addition_function', 'double'])
+        with self.assertRaises(TypeError):
+            self.registry['double'] = double
+
+    def test_engines_share_the_registry(self):
+        first = FunctionCallingEngine(registry=self.registry)
+        second = FunctionCallingEngine(registry=self.registry)
+        first.functions['double'] = double
+        self.assertNotIn('double', second.functions)
+        self.assertNotIn('double', self.registry)
+        self.assertIs(FunctionCallingEngine().registry, core_utils_registry())
+
+class TestExecutionContext(unittest.TestCase):
+    def setUp(self):
+        self.engine = FunctionCallingEngine(registry=FunctionRegistry({'addition_function': addition_function, 'double': double}))
+
+    def test_context_holds_the_outputs(self):
+        context = self.engine.create_context()
+        outputs = self.engine.call_functions(
+            [FunctionCall(name='addition_function', kwargs={'x': 1, 'y': 2}, returns=['sum'])],
+            context=context
+        )
+        self.assertIs(outputs, context.outputs)
+        self.assertEqual(context.outputs, {'sum': 3})
+        self.assertEqual(len(self.engine.outputs), 0)
+
+    def test_concurrent_requests_do_not_collide(self):
+        plan = self.engine.compile_plan(RAW_RESPONSE)
+        errors = []
+
+        def request(index: int) -> None:
+            for iteration in range(50):
+                context = self.engine.create_context()
+                function_calls = [
+                    FunctionCall(name='addition_function', kwargs={'x': index, 'y': iteration}, returns=['sum']),
+                    FunctionCall(name='double', kwargs={'value': 'sum'}, returns=['result'])
+                ]
+                self.engine.call_functions(function_calls, parallel=iteration % 2 == 0, context=context)
+                if context.outputs['result'] != 2 * (index + iteration):
+                    errors.append((index, iteration, dict(context.outputs)))
+                if self.engine.run_plan(plan, context=self.engine.create_context())['result'] != 6:
+                    errors.append((index, iteration, 'plan'))
+
+        threads = [threading.Thread(target=request, args=(index,)) for index in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.engine.outputs), 0)
+
+    def test_async_and_deadline_calls_use_the_context(self):
+        context = self.engine.create_context()
+        function_calls = [
+            FunctionCall(name='addition_function', kwargs={'x': 2, 'y': 3}, returns=['sum']),
+            FunctionCall(name='double', kwargs={'value': 'sum'}, returns=['result'])
+        ]
+        asyncio.run(self.engine.acall_functions(function_calls, context=context))
+        self.assertEqual(context.outputs['result'], 10)
+
+        deadline_context = self.engine.create_context({'sum': 7})
+        result = self.engine.call_functions_with_deadline(
+            [FunctionCall(name='double', kwargs={'value': 'sum'}, returns=['result'])],
+            timeout=5,
+            context=deadline_context
+        )
+        self.assertTrue(result.ok)
+        self.assertEqual(deadline_context.outputs['result'], 14)
+        self.assertEqual(len(self.engine.outputs), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import time
+import tempfile
+import unittest
+import multiprocessing
+from unittest import mock
+from easy_fnc.models.model import EasyFNCModel
+from easy_fnc.models.ollama import OllamaModel
+from easy_fnc.models.response_cache import ResponseCache
+
+class CountingModel(EasyFNCModel):
+    def __init__(self, **kwargs):
+        super().__init__([], **kwargs)
+        self.model_name = "counting"
+        self.requests = 0
+
+    def generate(self, user_input: str, output_turn=None) -> str:
+        self.history.append("user", self.format_user_input(user_input))
+        return self._complete(self.messages)
+
+    def _chat(self, messages, structured=False):
+        self.requests += 1
+        return messages[-1]["content"].upper()
+
+def put_from_child(path: str) -> None:
+    ResponseCache(path).put("child", "from another process")
+
+class TestResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "responses.sqlite3")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_get_and_put(self):
+        cache = ResponseCache(self.path)
+        key = cache.make_key("model", [{"role": "user", "content": "hi"}], {"temperature": 0})
+        self.assertNotEqual(key, cache.make_key("model", [{"role": "user", "content": "hi"}], {"temperature": 1}))
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "hello")
+        self.assertEqual(cache.get(key), "hello")
+        self.assertEqual(ResponseCache(self.path).get(key), "hello")
+
+    def test_ttl(self):
+        cache = ResponseCache(self.path, ttl=0.01)
+        cache.put("a", "response")
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_size_limits_evict_least_recently_used(self):
+        cache = ResponseCache(self.path, max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        time.sleep(0.001)
+        cache.get("a")
+        cache.put("c", "3")
+        self.assertEqual((cache.get("a"), cache.get("b"), cache.get("c")), ("1", None, "3"))
+        cache = ResponseCache(self.path, max_bytes=10)
+        cache.put("d", "x" * 8)
+        self.assertLessEqual(sum(len(cache.get(key) or "") for key in "acd"), 10)
+
+    def test_shared_between_processes(self):
+        process = multiprocessing.get_context("spawn").Process(target=put_from_child, args=(self.path,))
+        process.start()
+        process.join()
+        self.assertEqual(ResponseCache(self.path).get("child"), "from another process")
+
+    def test_model_uses_cache(self):
+        cache = ResponseCache(self.path)
+        model = CountingModel(response_cache=cache)
+        first = model.generate("hi")
+        self.assertEqual(CountingModel(response_cache=cache).generate("hi"), first)
+        self.assertEqual(model.requests, 1)
+        other = CountingModel(response_cache=cache, options={"temperature": 1})
+        other.generate("hi")
+        self.assertEqual(other.requests, 1)
+        self.assertEqual(model.generate_batch(["hi", "there"]), [first, model.format_user_input("there").upper()])
+        self.assertEqual(model.requests, 2)
+
+    def test_key_covers_the_request_parameters(self):
+        cache = ResponseCache(self.path)
+        response = {"message": {"content": "<|answer|>hello<|end_answer|>"}}
+        with mock.patch("ollama.chat", return_value=response) as chat:
+            OllamaModel("model", [], response_cache=cache).generate("hi")
+            OllamaModel("model", [], response_cache=cache).generate("hi")
+            self.assertEqual(chat.call_count, 1)
+            OllamaModel("model", [], response_cache=cache, early_stop=False).generate("hi")
+            self.assertEqual(chat.call_count, 2)
+            OllamaModel("model", [], response_cache=cache, structured_output=True).generate("hi")
+            self.assertEqual(chat.call_count, 3)
+
+if __name__ == '__main__':
+    unittest.main()
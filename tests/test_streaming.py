@@ -0,0 +1,58 @@
+import unittest
+from easy_fnc.function_caller import FunctionCallingEngine
+from easy_fnc.streaming import StreamingResponseParser
+from easy_fnc.schemas import FunctionCall
+
+RAW_RESPONSE = """<|thoughts|>
+I'll add the numbers {"x": 1} and then add again.
+<|end_thoughts|>
+<|function_calls|>
+[
+    {"name": "addition_function", "kwargs": {"x": 5, "y": 3}, "returns": ["result"]},
+    {"name": "addition_function", "kwargs": {"x": "result", "y": 2}, "returns": ["result_2"]},
+    {"name": "concatenate", "kwargs": {"text": "a } \\" { b"}, "returns": []}
+]
+<|end_function_calls|>
+"""
+
+def addition_function(x: int, y: int) -> int:
+    """Test function that adds two numbers."""
+    return x + y
+
+def chunked(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+class TestStreamingResponseParser(unittest.TestCase):
+    def test_emits_function_calls_as_they_close(self):
+        parser = StreamingResponseParser()
+        emitted = []
+        for chunk in chunked(RAW_RESPONSE, 3):
+            for function_call in parser.feed(chunk):
+                emitted.append((function_call.name, len(parser.function_calls)))
+        self.assertTrue(parser.done)
+        self.assertEqual([name for name, _ in emitted], ['addition_function', 'addition_function', 'concatenate'])
+        self.assertEqual(parser.function_calls[2].kwargs, {'text': 'a } " { b'})
+
+    def test_first_call_emitted_before_stream_ends(self):
+        parser = StreamingResponseParser()
+        end_of_first_call = RAW_RESPONSE.index('["result"]}') + len('["result"]}')
+        emitted = parser.feed(RAW_RESPONSE[:end_of_first_call])
+        self.assertEqual(emitted, [FunctionCall(name='addition_function', kwargs={'x': 5, 'y': 3}, returns=['result'])])
+
+    def test_close_matches_full_parse(self):
+        parser = StreamingResponseParser()
+        for chunk in chunked(RAW_RESPONSE, 1):
+            parser.feed(chunk)
+        response = parser.close()
+        self.assertEqual(response.thoughts, 'I\'ll add the numbers {"x": 1} and then add again.')
+        self.assertEqual(len(response.function_calls), 3)
+
+    def test_call_functions_stream(self):
+        engine = FunctionCallingEngine(auto_load_core_utils=False)
+        engine.functions['addition_function'] = addition_function
+        engine.functions['concatenate'] = lambda text: text
+        outputs = engine.call_functions_stream(chunked(RAW_RESPONSE, 7))
+        self.assertEqual(outputs, {'result': 8, 'result_2': 10})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import json
+import unittest
+from unittest import mock
+from easy_fnc.function_caller import create_functions_metadata
+from easy_fnc.models.ollama import OllamaModel
+from easy_fnc.models.structured_output import build_function_calls_schema, to_marker_format
+from easy_fnc.schemas import ModelResponse
+from easy_fnc.utils import close_open_block, get_response_blocks, RESPONSE_BLOCKS, FUNCTION_CALLS_END, ANSWER_END
+
+def get_weather(city: str, days: int) -> dict:
+    """Get the weather forecast of a city."""
+    return {}
+
+STOPPED_RESPONSE = """<|thoughts|>Check the weather.<|end_thoughts|>
+<|function_calls|>
+[{"name": "get_weather", "kwargs": {"city": "Paris", "days": 2}, "returns": ["forecast"]}]
+"""
+
+class TestEarlyStop(unittest.TestCase):
+    def test_close_open_block(self):
+        blocks = list(RESPONSE_BLOCKS.values())
+        closed = close_open_block(STOPPED_RESPONSE, blocks)
+        self.assertTrue(closed.endswith("]\n" + FUNCTION_CALLS_END))
+        self.assertEqual(close_open_block(closed, blocks), closed)
+        self.assertEqual(close_open_block("<|answer|>42", blocks), "<|answer|>42\n" + ANSWER_END)
+        self.assertEqual(close_open_block("<answer>42", [("<answer>", "</answer>")]), "<answer>42\n</answer>")
+
+    def test_stop_sequences_follow_the_template_blocks(self):
+        self.assertEqual(get_response_blocks({}), RESPONSE_BLOCKS)
+        template = {"response_blocks": {"answer": ["<answer>", "</answer>"]}}
+        self.assertEqual(get_response_blocks(template)["answer"], ("<answer>", "</answer>"))
+        with self.assertRaises(ValueError):
+            get_response_blocks({"response_blocks": {"answer": ["</answer>"]}})
+
+        model = OllamaModel("model", [])
+        self.assertEqual(model.stop_sequences, [FUNCTION_CALLS_END, ANSWER_END])
+        model.template["response_blocks"] = template["response_blocks"]
+        with mock.patch("easy_fnc.models.model.load_template", return_value=model.template):
+            model = OllamaModel("model", [])
+        self.assertEqual(model.stop_sequences, [FUNCTION_CALLS_END, "</answer>"])
+        with mock.patch("ollama.chat", return_value={"message": {"content": "<answer>42"}}):
+            self.assertEqual(model.generate("6 times 7?"), "<answer>42\n</answer>")
+
+    def test_ollama_passes_stop_sequences(self):
+        functions = create_functions_metadata({'get_weather': get_weather})
+        model = OllamaModel("model", functions)
+        with mock.patch("ollama.chat", return_value={"message": {"content": STOPPED_RESPONSE}}) as chat:
+            response = model.generate("Weather in Paris?")
+        self.assertEqual(chat.call_args.kwargs["options"], {"stop": [FUNCTION_CALLS_END, ANSWER_END]})
+        self.assertIsNone(chat.call_args.kwargs["format"])
+        self.assertEqual(ModelResponse.from_raw_response(response).function_calls[0].kwargs, {"city": "Paris", "days": 2})
+
+    def test_ollama_stream_appends_end_marker(self):
+        model = OllamaModel("model", [])
+        chunks = [{"message": {"content": STOPPED_RESPONSE[:40]}}, {"message": {"content": STOPPED_RESPONSE[40:]}}]
+        with mock.patch("ollama.chat", return_value=iter(chunks)):
+            streamed = "".join(model.generate_stream("Weather in Paris?"))
+        self.assertTrue(streamed.endswith(FUNCTION_CALLS_END))
+
+class TestStructuredOutput(unittest.TestCase):
+    def setUp(self):
+        self.functions = create_functions_metadata({'get_weather': get_weather})
+
+    def test_schema(self):
+        schema = build_function_calls_schema(self.functions)
+        call = schema["properties"]["function_calls"]["items"]["anyOf"][0]
+        self.assertEqual(call["properties"]["name"], {"const": "get_weather"})
+        kwargs = call["properties"]["kwargs"]
+        self.assertEqual(kwargs["required"], ["city", "days"])
+        self.assertEqual(kwargs["properties"]["days"], {"anyOf": [{"type": "integer"}, {"type": "string"}]})
+
+    def test_to_marker_format(self):
+        content = json.dumps({"thoughts": "It's sunny?", "function_calls": [{"name": "get_weather", "kwargs": {"city": "Paris", "days": 1}, "returns": ["f"]}]})
+        response = ModelResponse.from_raw_response(to_marker_format(content))
+        self.assertEqual(response.thoughts.strip(), "It's sunny?")
+        self.assertEqual(response.function_calls[0].returns, ["f"])
+        self.assertEqual(to_marker_format("not json"), "not json")
+
+    def test_ollama_structured_output(self):
+        model = OllamaModel("model", self.functions, structured_output=True)
+        self.assertIn('"function_calls"', model.messages[0]["content"])
+        content = json.dumps({"thoughts": "Weather.", "function_calls": [{"name": "get_weather", "kwargs": {"city": "Paris", "days": 1}, "returns": ["f"]}]})
+        with mock.patch("ollama.chat", return_value={"message": {"content": content}}) as chat:
+            response = model.generate("Weather in Paris?")
+        self.assertEqual(chat.call_args.kwargs["format"], model.function_calls_schema)
+        self.assertIsNone(chat.call_args.kwargs["options"])
+        self.assertEqual(ModelResponse.from_raw_response(response).function_calls[0].name, "get_weather")
+
+    def test_output_prompt_is_not_structured(self):
+        model = OllamaModel("model", self.functions, structured_output=True)
+        with mock.patch("ollama.chat", return_value={"message": {"content": "<|answer|>It is sunny."}}) as chat:
+            response = model.generate(model.format_output({"f": "sunny"}, "Weather in Paris?"))
+        self.assertIsNone(chat.call_args.kwargs["format"])
+        self.assertEqual(chat.call_args.kwargs["options"], {"stop": [FUNCTION_CALLS_END, ANSWER_END]})
+        self.assertEqual(response, "<|answer|>It is sunny.\n" + ANSWER_END)
+
+    def test_output_turn_is_explicit(self):
+        model = OllamaModel("model", self.functions, structured_output=True)
+        prompt = model.format_output({"f": "sunny"}, "Weather in Paris?")
+        with mock.patch("ollama.chat", return_value={"message": {"content": "{}"}}) as chat:
+            model.generate(str(prompt))
+            self.assertEqual(chat.call_args.kwargs["format"], model.function_calls_schema)
+            model.generate(str(prompt), output_turn=True)
+            self.assertIsNone(chat.call_args.kwargs["format"])
+            model.generate(prompt, output_turn=False)
+            self.assertEqual(chat.call_args.kwargs["format"], model.function_calls_schema)
+
+    def test_output_prompt_overrides_the_json_instruction(self):
+        model = OllamaModel("model", self.functions, structured_output=True)
+        prompt = model.format_output({"f": "sunny"}, "Weather in Paris?")
+        self.assertTrue(prompt.rstrip().endswith("Do not respond with a JSON object this time, give your answer in between <|answer|> and <|end_answer|> blocks."))
+        self.assertNotIn("JSON object", OllamaModel("model", self.functions).format_output({"f": "sunny"}, "Weather in Paris?"))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import json
+import unittest
+from unittest import mock
+from easy_fnc.function_caller import create_functions_metadata
+from easy_fnc.models.ollama import OllamaModel
+from easy_fnc.models.prompt_cache import clear_prompt_cache
+from easy_fnc.tool_index import ToolIndex, tokenize
+
+def get_weather_forecast(city: str, days: int) -> dict:
+    """Get the weather forecast of a city for the next days."""
+    return {}
+
+def get_stock_price(ticker: str) -> float:
+    """Get the latest price of a stock."""
+    return 0.0
+
+def send_email(recipient: str, subject: str, body: str) -> bool:
+    """Send an email message to a recipient."""
+    return True
+
+def convertCurrency(amount: float, target_currency: str) -> float:
+    """Convert an amount of money with the current exchange rates."""
+    return amount
+
+class TestToolIndex(unittest.TestCase):
+    def setUp(self):
+        self.functions = create_functions_metadata({
+            'get_weather_forecast': get_weather_forecast,
+            'get_stock_price': get_stock_price,
+            'send_email': send_email,
+            'convertCurrency': convertCurrency
+        })
+        self.index = ToolIndex(self.functions)
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("convertCurrency to_target_currency"), ["convert", "currency", "target", "currency"])
+        self.assertEqual(tokenize("What is the price of the stocks?"), ["price", "stock"])
+
+    def test_search(self):
+        results = self.index.search("What will the weather be like in Paris?", 2)
+        self.assertEqual([function.name for function, _ in results], ["get_weather_forecast"])
+        self.assertEqual(self.index.search("email the report to Bob", 1)[0][0].name, "send_email")
+        self.assertEqual(self.index.search("convert 10 dollars to euros", 1)[0][0].name, "convertCurrency")
+        self.assertEqual(self.index.search("unrelated words", 3), [])
+
+    def test_select_keeps_catalog_order(self):
+        selected = self.index.select("send the stock price and the weather", 3, always_include=["convertCurrency"])
+        self.assertEqual([function.name for function in selected], ["get_weather_forecast", "get_stock_price", "send_email", "convertCurrency"])
+
+    def test_select_returns_only_matches(self):
+        self.assertEqual(self.index.select("Hello there, can you help?", 2), [])
+        selected = self.index.select("send an email", 2)
+        self.assertEqual([function.name for function in selected], ["send_email"])
+        selected = self.index.select("Hello there", 2, always_include=["convertCurrency"])
+        self.assertEqual([function.name for function in selected], ["convertCurrency"])
+
+    def test_incremental_updates(self):
+        self.index.remove("send_email")
+        self.assertNotIn("send_email", self.index)
+        self.assertEqual(self.index.search("send an email", 3), [])
+
+        replacement = self.functions[2].model_copy(update={"description": "Send an email or a text message."})
+        self.index.add([replacement])
+        self.index.add([replacement])
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.search("text message", 1)[0][0].name, "send_email")
+        self.assertEqual(self.index._total_length, sum(self.index._lengths.values()))
+
+    def test_model_lists_selected_functions(self):
+        model = OllamaModel("model", self.functions, tool_index=self.index, max_tools=1)
+        with mock.patch("ollama.chat", return_value={"message": {"content": "<|answer|>ok<|end_answer|>"}}) as chat:
+            model.generate("What's the price of AAPL stock?")
+        system_prompt = chat.call_args.kwargs["messages"][0]["content"]
+        self.assertIn("get_stock_price", system_prompt)
+        self.assertNotIn("send_email", system_prompt)
+        self.assertEqual(model.history.num_characters, sum(len(message["content"]) for message in model.messages))
+
+    def test_output_prompt_keeps_the_selection(self):
+        model = OllamaModel("model", self.functions, tool_index=self.index, max_tools=1)
+        with mock.patch("ollama.chat", return_value={"message": {"content": "<|answer|>ok<|end_answer|>"}}) as chat:
+            model.generate("Send an email to Bob")
+            system_prompt = chat.call_args.kwargs["messages"][0]["content"]
+            model.generate(model.format_output({"stock_price": 1.0, "stock": "AAPL", "latest_price": 2.0}, "Send an email to Bob"))
+        self.assertEqual(chat.call_args.kwargs["messages"][0]["content"], system_prompt)
+        self.assertIn("send_email", system_prompt)
+
+    def test_model_falls_back_to_all_functions(self):
+        model = OllamaModel("model", self.functions, tool_index=self.index, max_tools=1)
+        full_prompt = model.messages[0]["content"]
+        with mock.patch("ollama.chat", return_value={"message": {"content": "<|answer|>ok<|end_answer|>"}}) as chat:
+            model.generate("Hello there, can you help?")
+        self.assertEqual(chat.call_args.kwargs["messages"][0]["content"], full_prompt)
+
+    def test_same_selection_keeps_the_cached_prefix(self):
+        model = OllamaModel("model", self.functions, tool_index=self.index, max_tools=1)
+        clear_prompt_cache()
+        with mock.patch("ollama.chat", return_value={"message": {"content": "<|answer|>ok<|end_answer|>"}}) as chat, \
+                mock.patch("easy_fnc.models.prompt_cache.json.dumps", wraps=json.dumps) as dumps:
+            model.generate("What's the price of AAPL stock?")
+            first = chat.call_args.kwargs["messages"][0]["content"]
+            model.generate("And the stock price of MSFT?")
+            self.assertEqual(chat.call_args.kwargs["messages"][0]["content"], first)
+            self.assertEqual(dumps.call_count, 1)
+            model.generate("Send an email to Bob")
+            self.assertNotEqual(chat.call_args.kwargs["messages"][0]["content"], first)
+
+if __name__ == '__main__':
+    unittest.main()
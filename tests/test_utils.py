@@ -0,0 +1,44 @@
+import unittest
+from easy_fnc.utils import (
+    scan_response,
+    extract_thoughts_and_function_calls,
+    extract_all_thoughts_and_function_calls,
+)
+
+BLOCK = '<|thoughts|>{thoughts}<|end_thoughts|>\n<|function_calls|>\n{calls}\n<|end_function_calls|>'
+
+class TestScanResponse(unittest.TestCase):
+    def test_extracts_first_block(self):
+        raw_response = "Sure.\n" + BLOCK.format(thoughts=" add ", calls='[{"name": "f"}]')
+        self.assertEqual(extract_thoughts_and_function_calls(raw_response), ('add', '[{"name": "f"}]'))
+
+    def test_no_block(self):
+        self.assertEqual(extract_thoughts_and_function_calls("<|answer|>42<|end_answer|>"), ("", ""))
+
+    def test_returns_every_block(self):
+        raw_response = BLOCK.format(thoughts="a", calls='[{"name": "f"}]') + "\n" + BLOCK.format(thoughts="b", calls='[{"name": "g"}]')
+        result = scan_response(raw_response)
+        self.assertEqual([block.thoughts for block in result.blocks], ['a', 'b'])
+        self.assertEqual(result.malformed, [])
+        self.assertEqual(
+            extract_all_thoughts_and_function_calls(raw_response),
+            ('a\nb', '[{"name": "f"}, {"name": "g"}]')
+        )
+
+    def test_reports_malformed_regions(self):
+        raw_response = "ü<|thoughts|>a<|thoughts|>b<|end_thoughts|>\n" + BLOCK.format(thoughts="c", calls="[]") + "<|thoughts|>d"
+        result = scan_response(raw_response)
+        self.assertEqual([block.thoughts for block in result.blocks], ['c'])
+        reasons = [region.reason for region in result.malformed]
+        self.assertEqual(reasons, [
+            'repeated thoughts start marker',
+            'thoughts block not followed by a function calls block',
+            'unterminated thoughts block',
+        ])
+        first = result.malformed[0]
+        self.assertEqual((first.start, first.end), (1, raw_response.index("<|thoughts|>b")))
+        self.assertEqual((first.byte_start, first.byte_end), (2, raw_response.index("<|thoughts|>b") + 1))
+        self.assertEqual(result.malformed[-1].end, len(raw_response))
+
+if __name__ == '__main__':
+    unittest.main()
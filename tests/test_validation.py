@@ -0,0 +1,52 @@
+import unittest
+from easy_fnc.function_caller import FunctionCallingEngine
+from easy_fnc.schemas import FunctionCall
+from easy_fnc.validation import FunctionCallValidationError
+
+def scale(value: float, factor: int, clamp: bool = False) -> float:
+    """Test function that scales a number."""
+    return value * factor
+
+def describe(tags: list[str], **options) -> str:
+    """Test function that accepts any options."""
+    return ",".join(tags)
+
+class TestValidation(unittest.TestCase):
+    def setUp(self):
+        self.calls = []
+        def record(x: int) -> int:
+            self.calls.append(x)
+            return x
+        self.engine = FunctionCallingEngine(auto_load_core_utils=False, validate_calls=True)
+        self.engine.functions.update({'scale': scale, 'describe': describe, 'record': record})
+
+    def test_coerces_simple_types(self):
+        function_calls = [FunctionCall(name='scale', kwargs={'value': '1.5', 'factor': '4', 'clamp': 'true'}, returns=['y'])]
+        outputs = self.engine.call_functions(function_calls)
+        self.assertEqual(outputs['y'], 6.0)
+        self.assertEqual(function_calls[0].kwargs, {'value': 1.5, 'factor': 4, 'clamp': True})
+
+    def test_reports_all_errors_before_running(self):
+        function_calls = [
+            FunctionCall(name='record', kwargs={'x': 1}, returns=['a']),
+            FunctionCall(name='scale', kwargs={'value': 'abc', 'unknown': 1}, returns=['b']),
+            FunctionCall(name='missing', kwargs={}, returns=[]),
+            FunctionCall(name='describe', kwargs={'tags': 'x', 'color': 'red'}, returns=[]),
+        ]
+        with self.assertRaises(FunctionCallValidationError) as context:
+            self.engine.call_functions(function_calls)
+        errors = [(error.call_index, error.argument) for error in context.exception.errors]
+        self.assertEqual(errors, [(1, 'factor'), (1, 'value'), (1, 'unknown'), (2, None), (3, 'tags')])
+        self.assertEqual(self.calls, [])
+
+    def test_references_are_not_type_checked(self):
+        self.engine.outputs['previous'] = 2
+        function_calls = [
+            FunctionCall(name='record', kwargs={'x': 3}, returns=['three']),
+            FunctionCall(name='scale', kwargs={'value': 'three', 'factor': 'previous'}, returns=['y']),
+        ]
+        outputs = self.engine.call_functions(function_calls)
+        self.assertEqual(outputs['y'], 6)
+
+if __name__ == '__main__':
+    unittest.main()